@@ -2,6 +2,8 @@
 
 import streamlit as st
 from pathlib import Path
+import json
+import shutil
 import sys
 import os
 
@@ -9,10 +11,10 @@ import os
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.utils import settings, log
-from src.ingestion import DocumentLoader, TextCleaner, TextChunker
-from src.embeddings import EmbeddingModel
-from src.vector_store import EndeeClient, VectorIndexer, VectorRetriever
-from src.generation import RAGGenerator
+from src.utils.metrics import start_metrics_server
+from src.ingestion import DocumentLoader, IngestionProfiler
+from src.ingestion.loader import READ_BLOCK_SIZE
+from src.generation import RAGComponents, IndexingInProgress
 
 # Page configuration
 st.set_page_config(
@@ -55,117 +57,112 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state
-if 'rag_generator' not in st.session_state:
-    st.session_state.rag_generator = None
-if 'indexed' not in st.session_state:
-    st.session_state.indexed = False
+# Initialize session state (per-user state only; heavy components are shared)
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
+@st.cache_resource(show_spinner="Initializing RAG system...")
+def get_components() -> RAGComponents:
+    """Build the embedding model, Endee/LLM clients and generator once per process."""
+    components = RAGComponents()
+    
+    if settings.metrics_port:
+        try:
+            server = start_metrics_server(settings.metrics_host, settings.metrics_port)
+            log.info(f"Serving metrics on {server.url}")
+        except OSError as e:
+            log.warning(f"Could not start metrics endpoint: {e}")
+    
+    return components
+
 def initialize_system():
-    """Initialize RAG system components."""
+    """Get the shared RAG components, or None if they could not be built."""
     try:
-        with st.spinner("Initializing RAG system..."):
-            # Check if Endee is accessible
-            try:
-                client = EndeeClient()
-                st.success("✅ Connected to Endee vector database")
-            except Exception as e:
-                st.error(f"❌ Could not connect to Endee: {e}")
-                st.info("Please ensure Endee is running: `docker compose up -d`")
-                return False
-            
-            # Initialize components
-            embedding_model = EmbeddingModel()
-            retriever = VectorRetriever(client)
-            rag_generator = RAGGenerator(
-                embedding_model=embedding_model,
-                retriever=retriever
-            )
-            
-            st.session_state.rag_generator = rag_generator
-            st.success("✅ RAG system initialized successfully")
-            return True
-            
+        return get_components()
     except Exception as e:
-        st.error(f"Error initializing system: {e}")
-        return False
+        st.error(f"❌ Error initializing system: {e}")
+        st.info("Please ensure Endee is running: `docker compose up -d`")
+        return None
 
-def index_documents(uploaded_files):
-    """Index uploaded documents."""
+def start_indexing(components: RAGComponents, uploaded_files, profile: bool = False):
+    """Start indexing uploaded documents in the background, straight from memory."""
     if not uploaded_files:
         st.warning("Please upload documents first")
-        return False
+        return None
     
     try:
-        with st.spinner("Processing and indexing documents..."):
-            # Save uploaded files
-            data_dir = settings.raw_data_dir
-            saved_files = []
-            
+        # Keep a copy of the uploads only if asked, streamed in blocks
+        if settings.persist_uploads:
             for uploaded_file in uploaded_files:
-                file_path = data_dir / uploaded_file.name
-                with open(file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                saved_files.append(file_path)
-            
-            st.info(f"Saved {len(saved_files)} files")
-            
-            # Load documents
-            loader = DocumentLoader()
-            documents = []
-            for file_path in saved_files:
-                doc = loader.load_file(file_path)
-                if doc:
-                    documents.append(doc)
-            
-            st.info(f"Loaded {len(documents)} documents")
-            
-            # Clean and chunk
-            cleaner = TextCleaner()
-            chunker = TextChunker()
-            
-            all_chunks = []
-            for doc in documents:
-                cleaned_text = cleaner.preprocess(doc['text'])
-                doc['text'] = cleaned_text
-                chunks = chunker.chunk_document(doc, strategy="tokens")
-                all_chunks.extend(chunks)
-            
-            st.info(f"Created {len(all_chunks)} chunks")
-            
-            # Generate embeddings
-            embedding_model = EmbeddingModel()
-            texts = [chunk['text'] for chunk in all_chunks]
-            embeddings = embedding_model.encode_batch(texts, batch_size=32)
-            
-            st.info(f"Generated {len(embeddings)} embeddings")
-            
-            # Index in Endee
-            client = EndeeClient()
-            indexer = VectorIndexer(client)
-            indexer.setup_index(force_recreate=True)
-            num_indexed = indexer.upsert_chunks(all_chunks, embeddings)
-            
-            st.success(f"✅ Indexed {num_indexed} chunks in Endee")
-            st.session_state.indexed = True
-            
-            # Reinitialize RAG generator so retriever picks up the new index
-            embedding_model = EmbeddingModel()
-            retriever = VectorRetriever(client)
-            st.session_state.rag_generator = RAGGenerator(
-                embedding_model=embedding_model,
-                retriever=retriever
-            )
-            st.info("✅ System refreshed - ready to answer questions!")
-            
-            return True
-            
+                uploaded_file.seek(0)
+                with open(settings.raw_data_dir / uploaded_file.name, "wb") as f:
+                    shutil.copyfileobj(uploaded_file, f, READ_BLOCK_SIZE)
+                uploaded_file.seek(0)
+        
+        # Load, clean, chunk, embed and index into a new index (shared by all
+        # sessions); questions are answered from the current one meanwhile.
+        # Uploads with identical content are indexed once.
+        profiler = IngestionProfiler(
+            sample_interval=settings.ingestion_profile_sample_ms / 1000 or None
+        ) if profile else None
+        job = components.start_indexing(uploaded_files, profiler=profiler)
+        st.session_state.index_job = job.id
+        return job
+        
+    except IndexingInProgress as e:
+        st.warning(str(e))
+        return None
     except Exception as e:
         st.error(f"Error indexing documents: {e}")
         log.error(f"Indexing error: {e}")
-        return False
+        return None
+
+@st.fragment(run_every=1)
+def indexing_status(components: RAGComponents):
+    """Progress of the running (or this session's last) indexing job, refreshed every second."""
+    job = components.jobs.latest()
+    if job is None or (job.finished and job.id != st.session_state.get("index_job")):
+        return
+    
+    progress = job.progress
+    if not job.finished:
+        total = progress["files_total"] or 1
+        st.progress(
+            progress["files_done"] / total,
+            text=f"Indexing job {job.id}: {progress['files_done']}/{progress['files_total']} files ({job.status})"
+        )
+        eta = progress.get("eta")
+        st.caption(
+            f"{progress['chunks']} chunks, {progress['vectors']} vectors · "
+            f"{progress.get('docs_per_second', 0.0):.1f} docs/s, "
+            f"{progress.get('vectors_per_second', 0.0):.0f} vectors/s"
+            + (f" · ETA {eta:.0f} s" if eta is not None else "")
+        )
+        st.caption("Questions are answered from the current index until this job finishes.")
+        if st.button("✖ Cancel indexing", use_container_width=True, disabled=job.cancel_requested):
+            components.jobs.cancel(job.id)
+        return
+    
+    # Finished: rerun the whole page once so status and document scopes update
+    if st.session_state.get("index_job_seen") != job.id:
+        st.session_state.index_job_seen = job.id
+        if job.profile:
+            st.session_state.ingestion_profile = job.profile
+        st.rerun()
+    
+    if job.status == "done":
+        result = job.result
+        st.success(f"✅ Indexed {result['indexed']} chunks from {result['documents']} documents")
+        if result["duplicates"]:
+            st.info("Skipped duplicates: " + ", ".join(
+                f"{name} (same as {original})" for name, original in result["duplicates"].items()
+            ))
+        if result["failed"]:
+            st.warning(f"No text extracted from: {', '.join(result['failed'])}")
+    elif job.status == "cancelled":
+        st.info("Indexing cancelled; the previous index is still in use")
+    else:
+        st.error(f"Error indexing documents: {job.error}")
 
 def main():
     """Main application."""
@@ -174,6 +171,9 @@ def main():
     st.markdown('<h1 class="main-header">🤖 Enterprise Documentation Q&A</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">RAG-powered technical documentation assistant using Endee Vector Database</p>', unsafe_allow_html=True)
     
+    components = initialize_system()
+    rag_generator = components.generator if components else None
+    
     # Sidebar
     with st.sidebar:
         st.header("⚙️ Configuration")
@@ -195,12 +195,41 @@ def main():
             help="Upload technical documentation files"
         )
         
-        if st.button("🔄 Index Documents", use_container_width=True):
+        profile_ingestion = st.checkbox(
+            "Profile ingestion",
+            value=settings.ingestion_profile,
+            help="Record per-file and per-stage time and memory, and write a JSON/HTML report"
+        )
+        
+        if st.button(
+            "🔄 Index Documents",
+            use_container_width=True,
+            disabled=components is None or components.indexing
+        ):
             if uploaded_files:
-                index_documents(uploaded_files)
+                start_indexing(components, uploaded_files, profile=profile_ingestion)
             else:
                 st.warning("Please upload files first")
         
+        if components is not None:
+            indexing_status(components)
+        
+        if st.session_state.get("ingestion_profile"):
+            json_path, html_path = st.session_state.ingestion_profile
+            report = json.loads(Path(json_path).read_text(encoding="utf-8"))
+            st.caption(
+                f"Last ingestion: {report['wall_seconds']:.1f} s, "
+                f"{report['throughput']['tokens_per_s']:.0f} tokens/s. "
+                f"Slowest stages: {', '.join(report['slowest_stages'][:3])}; "
+                f"slowest file: {Path(report['slowest_files'][0]).name if report['slowest_files'] else '-'}"
+            )
+            st.download_button(
+                "Download profile (HTML)",
+                Path(html_path).read_bytes(),
+                file_name=Path(html_path).name,
+                mime="text/html"
+            )
+        
         st.divider()
         
         # Settings
@@ -208,27 +237,110 @@ def main():
         top_k = st.slider("Number of context chunks", 1, 10, 5)
         temperature = st.slider("LLM Temperature", 0.0, 1.0, 0.3, 0.1)
         min_similarity = st.slider("Minimum Similarity", 0.0, 1.0, 0.0, 0.05)
+        diversity_modes = ["none", "mmr", "doc_cap"]
+        diversity = st.selectbox(
+            "Result Diversity",
+            diversity_modes,
+            index=diversity_modes.index(settings.retrieval_diversity)
+            if settings.retrieval_diversity in diversity_modes else 0,
+            format_func={
+                "none": "Off",
+                "mmr": "Maximal marginal relevance",
+                "doc_cap": "Cap chunks per document"
+            }.get,
+            help="Over-fetch candidates and drop near-duplicate chunks"
+        )
+        hybrid = st.checkbox(
+            "Hybrid keyword search",
+            value=settings.hybrid_search,
+            help="Fuse BM25 keyword matches (error codes, config keys, API names) with semantic results"
+        )
+        fast_path = st.checkbox(
+            "Extractive fast path",
+            value=settings.fast_path,
+            help="Answer straight from the top source, without the LLM, when retrieval is very confident"
+        )
+        compress = st.checkbox(
+            "Compress context",
+            value=settings.context_compression,
+            help="Send only the sentences most relevant to the question to the LLM"
+        )
+        
+        # Scoped retrieval (pushed down to the Endee query as filters)
+        scope_files = st.multiselect(
+            "Limit to documents",
+            components.indexed_files if components else [],
+            help="Only search the selected documents"
+        )
+        scope_formats = st.multiselect(
+            "Limit to formats",
+            sorted(DocumentLoader.SUPPORTED_FORMATS),
+            help="Only search documents of the selected formats"
+        )
+        filters = {}
+        if scope_files:
+            filters["filename"] = scope_files
+        if scope_formats:
+            filters["format"] = scope_formats
         
         st.divider()
         
         # System status
         st.header("📊 System Status")
-        if st.session_state.indexed:
+        if components and components.indexed:
             st.success("✅ Documents Indexed")
+            if components.indexing:
+                st.info("⏳ Re-indexing in the background...")
+        elif components and components.indexing:
+            st.info("⏳ Indexing in progress...")
         else:
             st.info("ℹ️ No documents indexed yet")
+        
+        if rag_generator is not None and rag_generator.retriever.cache is not None:
+            cache_stats = rag_generator.retriever.cache.stats()
+            st.caption(
+                f"Retrieval cache: {cache_stats['hit_rate']:.0%} hit rate "
+                f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), "
+                f"{cache_stats['entries']}/{cache_stats['max_entries']} entries"
+            )
+        if rag_generator is not None:
+            fast_stats = rag_generator.fast_path_stats()
+            if fast_stats["hit"] or fast_stats["declined"] or fast_stats["ineligible"]:
+                st.caption(
+                    f"Fast path: {fast_stats['rate']:.0%} of questions answered without the LLM; "
+                    + ", ".join(f"{path} {ms:.0f} ms avg" for path, ms in fast_stats["mean_ms"].items())
+                )
+            if rag_generator.router is not None:
+                route_stats = rag_generator.router.stats()
+                if route_stats["decisions"]:
+                    routed = {tier: sum(reasons.values()) for tier, reasons in route_stats["decisions"].items()}
+                    st.caption(
+                        "Model routing: "
+                        + ", ".join(
+                            f"{tier} {count} ({route_stats['mean_ms'].get(tier, 0):.0f} ms avg)"
+                            for tier, count in routed.items()
+                        )
+                        + f"; {route_stats['escalations']} escalated"
+                    )
+            
+            stage_stats = rag_generator.stage_latency_stats()
+            if stage_stats:
+                st.caption("Query latency by stage (ms)")
+                st.table({
+                    stage: {"p50": v["p50"], "p95": v["p95"], "p99": v["p99"], "n": v["count"]}
+                    for stage, v in stage_stats.items()
+                })
     
     # Main content
     tab1, tab2, tab3 = st.tabs(["💬 Ask Questions", "📚 About", "🔧 Setup"])
     
     with tab1:
-        # Initialize system if not done
-        if st.session_state.rag_generator is None:
-            if not initialize_system():
-                st.stop()
+        # Stop if the shared components could not be built
+        if components is None:
+            st.stop()
         
         # Check if documents are indexed
-        if not st.session_state.indexed:
+        if not components.indexed:
             st.warning("⚠️ Please upload and index documents first using the sidebar")
             st.stop()
         
@@ -252,14 +364,47 @@ def main():
             st.rerun()
         
         if ask_button and query:
-            with st.spinner("Generating answer..."):
-                result = st.session_state.rag_generator.generate_answer(
+            # Stream sources first, then answer tokens as they arrive
+            stream_area = st.empty()
+            with stream_area.container():
+                st.divider()
+                st.header("💡 Answer")
+                st.markdown(f"**Question:** {query}")
+                sources_caption = st.empty()
+                answer_placeholder = st.empty()
+                answer_placeholder.markdown("_Retrieving context..._")
+                
+                partial_answer = ""
+                result = None
+                for event in rag_generator.generate_answer_stream(
                     query=query,
                     top_k=top_k,
                     min_similarity=min_similarity,
-                    temperature=temperature
-                )
-                
+                    temperature=temperature,
+                    filters=filters or None,
+                    diversity=diversity,
+                    hybrid=hybrid,
+                    compress=compress,
+                    fast_path=fast_path
+                ):
+                    if event["type"] == "sources":
+                        sources_caption.caption(
+                            f"📖 {event['num_sources']} sources retrieved "
+                            f"(top similarity {event['top_similarity']:.2%})"
+                        )
+                        answer_placeholder.markdown("_Generating answer..._")
+                    elif event["type"] == "token":
+                        partial_answer += event["text"]
+                        answer_placeholder.markdown(f"**Answer:**\n\n{partial_answer}▌")
+                    elif event["type"] == "reset":
+                        # Fast model was unsure; the large model's answer replaces it
+                        partial_answer = ""
+                        answer_placeholder.markdown("_Escalating to the larger model..._")
+                    elif event["type"] == "done":
+                        result = event["result"]
+            
+            stream_area.empty()
+            if result is not None:
                 st.session_state.chat_history.append(result)
         
         # Display results
@@ -271,7 +416,10 @@ def main():
             
             # Answer
             st.markdown(f"**Question:** {latest['query']}")
-            st.markdown(f"**Answer:**\n\n{latest['answer']}")
+            if latest.get('error'):
+                st.error(latest['answer'])
+            else:
+                st.markdown(f"**Answer:**\n\n{latest['answer']}")
             
             # Metrics
             col1, col2, col3 = st.columns(3)
@@ -282,6 +430,55 @@ def main():
             with col3:
                 st.metric("Confidence", "High" if latest['top_similarity'] > 0.7 else "Medium")
             
+            if latest.get('time_to_first_token_ms') is not None:
+                st.caption(f"⏱️ Time to first token: {latest['time_to_first_token_ms']:.0f} ms")
+            
+            if latest.get('fast_path'):
+                st.caption(
+                    f"⚡ Extractive answer from the top source (LLM skipped, "
+                    f"match score {latest['fast_path_score']:.2f})"
+                )
+                if st.button("✨ Expand with LLM"):
+                    with st.spinner("Generating a full answer..."):
+                        expanded = rag_generator.generate_answer(
+                            query=latest['query'],
+                            top_k=top_k,
+                            min_similarity=min_similarity,
+                            temperature=temperature,
+                            filters=filters or None,
+                            diversity=diversity,
+                            hybrid=hybrid,
+                            compress=compress,
+                            fast_path=False
+                        )
+                    st.session_state.chat_history[-1] = expanded
+                    st.rerun()
+            
+            if latest.get('compression'):
+                compression = latest['compression']
+                st.caption(
+                    f"✂️ Context compressed to {compression['ratio']:.0%} "
+                    f"({compression['input_tokens']} → {compression['output_tokens']} tokens, "
+                    f"+{compression['ms']:.0f} ms)"
+                )
+            
+            if latest.get('route'):
+                route = latest['route']
+                st.caption(
+                    f"🧭 Answered by {latest['model']} ({route['tier']} tier, {route['reason'].replace('_', ' ')}"
+                    + (", escalated)" if route['escalated'] else ")")
+                )
+            
+            if latest.get('cache'):
+                st.caption(f"⚡ Served from {latest['cache']} answer cache")
+            
+            if latest.get('filters'):
+                applied = ", ".join(
+                    f"{field} ({'during search' if how == 'pushdown' else 'after search'})"
+                    for field, how in latest['filters'].items()
+                )
+                st.caption(f"🔎 Scoped by: {applied}")
+            
             # Sources
             if latest['sources']:
                 st.divider()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Benchmark BM25 lexical index build cost, ingestion cost and query latency.
+
+Ingestion adds the corpus in batches (as upsert_chunks does) and flushes
+after each one, reporting the cost of the first and last batches: with the
+change log it should not grow with the size of the index.
+
+Usage:
+    python benchmarks/bench_lexical.py --chunks 20000 --queries 500
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.vector_store.lexical import LexicalIndex
+
+
+def make_corpus(num_chunks: int, words_per_chunk: int = 380, seed: int = 0):
+    """Build a deterministic synthetic corpus of chunks with embedded identifiers."""
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"word{i}" for i in range(20000)]
+    identifiers = [f"ERR_{i:05d}" for i in range(2000)] + [f"pool.max_size_{i}" for i in range(2000)]
+
+    # Zipf-like word frequencies, as in natural text
+    ranks = np.arange(1, len(vocabulary) + 1)
+    probs = 1.0 / ranks
+    probs /= probs.sum()
+
+    chunks = []
+    for i in range(num_chunks):
+        words = rng.choice(len(vocabulary), size=words_per_chunk, p=probs)
+        text = " ".join(vocabulary[w] for w in words)
+        ident = identifiers[rng.integers(len(identifiers))]
+        chunks.append({
+            "text": f"{text} {ident}",
+            "source": f"doc_{i // 20}.txt",
+            "filename": f"doc_{i // 20}.txt",
+            "format": ".txt",
+            "chunk_id": i % 20
+        })
+    return chunks, identifiers
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=50, help="Chunks per ingestion batch")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    chunks, identifiers = make_corpus(args.chunks)
+    ids = [f"{c['source']}_{c['chunk_id']}" for c in chunks]
+    text_bytes = sum(len(c["text"].encode("utf-8")) for c in chunks)
+
+    index = LexicalIndex()
+    start = time.perf_counter()
+    index.add(ids, chunks)
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.bm25.npz"
+
+        start = time.perf_counter()
+        size = index.save(path)
+        save_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = LexicalIndex.load(path)
+        load_s = time.perf_counter() - start
+
+        # Incremental ingestion: add a batch, flush, repeat
+        ingest_path = Path(tmp) / "ingest.bm25.npz"
+        ingest = LexicalIndex()
+        batch_times = []
+        for first in range(0, len(chunks), args.batch):
+            start = time.perf_counter()
+            ingest.add(ids[first:first + args.batch], chunks[first:first + args.batch])
+            ingest.flush(ingest_path)
+            batch_times.append(time.perf_counter() - start)
+        tail = max(1, len(batch_times) // 10)
+
+    rng = np.random.default_rng(1)
+    queries = [
+        f"what does {identifiers[rng.integers(len(identifiers))]} mean for word{rng.integers(200)}"
+        for _ in range(args.queries)
+    ]
+    index.search(queries[0], args.top_k)  # warm up
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, args.top_k)
+        latencies.append(time.perf_counter() - start)
+
+    results = {
+        "chunks": args.chunks,
+        "text_mb": round(text_bytes / 1e6, 2),
+        "build_s": round(build_s, 3),
+        "build_chunks_per_s": round(args.chunks / build_s, 1),
+        "build_mb_per_s": round(text_bytes / 1e6 / build_s, 2),
+        "save_s": round(save_s, 3),
+        "load_s": round(load_s, 3),
+        "ingest_batch": args.batch,
+        "ingest_s": round(sum(batch_times), 3),
+        "ingest_first_batches_ms": round(float(np.median(batch_times[:tail])) * 1000, 3),
+        "ingest_last_batches_ms": round(float(np.median(batch_times[-tail:])) * 1000, 3),
+        "ingest_max_batch_ms": round(max(batch_times) * 1000, 3),
+        "index_mb": round(size / 1e6, 2),
+        "index_to_text_ratio": round(size / text_bytes, 3),
+        "query_p50_ms": percentile_ms(latencies, 50),
+        "query_p95_ms": percentile_ms(latencies, 95),
+        "query_p99_ms": percentile_ms(latencies, 99),
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
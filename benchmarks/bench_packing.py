@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Measure prompt-token reduction from context packing.
+
+Chunks a document corpus (default: the repository's markdown docs) with the
+production TextChunker, retrieves chunks per query with the BM25 lexical
+index (no embedding model or Endee needed) and builds each prompt with and
+without packing.
+
+Usage:
+    python benchmarks/bench_packing.py --top-k 3 5 10 --budget 3000
+    python benchmarks/bench_packing.py --queries eval.jsonl   # {"query": ...} per line
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ingestion.chunker import TextChunker
+from src.generation.prompt_builder import PromptBuilder
+from src.vector_store.lexical import LexicalIndex
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def load_corpus(paths):
+    """Chunk every file with the default chunker settings."""
+    chunker = TextChunker()
+    chunks = []
+    for path in paths:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        chunks.extend(chunker.chunk_by_tokens(
+            text, {"source": path.name, "filename": path.name, "format": path.suffix}
+        ))
+    return chunks
+
+
+def sample_queries(chunks, num_queries, seed=0):
+    """Use sentences from the corpus as stand-in questions."""
+    rng = np.random.default_rng(seed)
+    sentences = [
+        s.strip() for c in chunks
+        for s in re.split(r"(?<=[.!?])\s+|\n+", c["text"])
+        if 6 <= len(s.split()) <= 30
+    ]
+    picks = rng.choice(len(sentences), size=min(num_queries, len(sentences)), replace=False)
+    return [sentences[i] for i in picks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=Path, nargs="*", help="Documents to index (default: repo *.md)")
+    parser.add_argument("--queries", type=Path, help="JSONL file with a 'query' field per line")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    chunks = load_corpus(args.docs or sorted(REPO_ROOT.glob("*.md")))
+    ids = [f"{c['source']}_{c['chunk_id']}" for c in chunks]
+    index = LexicalIndex()
+    index.add(ids, chunks)
+
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [json.loads(line)["query"] for line in f if line.strip()]
+    else:
+        queries = sample_queries(chunks, args.num_queries)
+
+    builders = {
+        "verbatim": PromptBuilder(packing=False),
+        "merged": PromptBuilder(packing=True, context_token_budget=0),
+        f"merged+budget{args.budget}": PromptBuilder(packing=True, context_token_budget=args.budget),
+    }
+
+    results = {"chunks": len(chunks), "queries": len(queries), "by_top_k": {}}
+    for top_k in args.top_k:
+        tokens = {name: [] for name in builders}
+        pack_ms = []
+        for query in queries:
+            hits = index.search(query, top_k)
+            for name, builder in builders.items():
+                stats = {}
+                builder.build_prompt_with_results(query, hits, stats=stats)
+                tokens[name].append(stats["prompt_tokens"])
+                if "pack_ms" in stats and name != "verbatim":
+                    pack_ms.append(stats["pack_ms"])
+
+        baseline = float(np.mean(tokens["verbatim"]))
+        results["by_top_k"][top_k] = {
+            **{
+                f"{name}_prompt_tokens": round(float(np.mean(values)), 1)
+                for name, values in tokens.items()
+            },
+            **{
+                f"{name}_reduction_pct": round(100 * (1 - float(np.mean(values)) / baseline), 1)
+                for name, values in tokens.items() if name != "verbatim"
+            },
+            "pack_ms_p50": round(float(np.percentile(pack_ms, 50)), 3) if pack_ms else 0.0,
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Memory cost of each additional app session.
+
+Simulates N browser sessions two ways and reports resident memory per
+additional session:
+
+- per-session: every session builds its own EmbeddingModel, EndeeClient,
+  LLMClient and RAGGenerator (how the app used to work)
+- shared: one RAGComponents per process; sessions hold only chat history
+  and query settings (how the app works now)
+
+Each session asks one question so lazily built state is included. Endee and
+the LLM provider are the local stand-ins. The embedding model is the real
+sentence-transformers model unless --hashing is given; the model weights are
+what per-session copies multiply.
+
+Usage:
+    python benchmarks/bench_sessions.py --sessions 1 5 10 20
+    python benchmarks/bench_sessions.py --mode shared --sessions 1 50 --hashing
+"""
+
+import argparse
+import gc
+import json
+import resource
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import make_documents, write_corpus, questions
+from src.utils import settings, log
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def embedding_model(args):
+    if args.hashing:
+        from src.stubs import HashingEmbeddingModel
+        return HashingEmbeddingModel()
+    from src.embeddings import EmbeddingModel
+    return EmbeddingModel()
+
+
+def new_session(mode, shared, args, endee_url, llm_url):
+    """One simulated session: the objects a browser session keeps alive."""
+    from src.vector_store import EndeeClient, VectorRetriever
+    from src.generation import LLMClient, RAGGenerator
+
+    session = {"chat_history": [], "settings": {"top_k": 5, "temperature": 0.3}}
+    if mode == "shared":
+        session["generator"] = shared.generator
+    else:
+        client = EndeeClient(base_url=endee_url)
+        session["generator"] = RAGGenerator(
+            embedding_model=embedding_model(args),
+            retriever=VectorRetriever(client),
+            llm_client=LLMClient(api_key="bench", provider="openai", model="fake-model", base_url=llm_url),
+            answer_cache=False
+        )
+    return session
+
+
+def measure(mode, counts, args, endee_url, llm_url, query):
+    from src.vector_store import EndeeClient
+    from src.generation import LLMClient, RAGComponents
+
+    gc.collect()
+    baseline = rss_mb()
+    shared = None
+    if mode == "shared":
+        shared = RAGComponents(
+            client=EndeeClient(base_url=endee_url),
+            embedding_model=embedding_model(args),
+            llm_client=LLMClient(api_key="bench", provider="openai", model="fake-model", base_url=llm_url)
+        )
+        shared.generator.answer_cache = None
+
+    sessions, points = [], []
+    for count in sorted(counts):
+        while len(sessions) < count:
+            session = new_session(mode, shared, args, endee_url, llm_url)
+            session["chat_history"].append(session["generator"].generate_answer(query, use_cache=False))
+            sessions.append(session)
+        gc.collect()
+        points.append({"sessions": count, "rss_mb": round(rss_mb() - baseline, 1)})
+
+    first, last = points[0], points[-1]
+    per_session = (
+        (last["rss_mb"] - first["rss_mb"]) / (last["sessions"] - first["sessions"])
+        if last["sessions"] > first["sessions"] else None
+    )
+    return {
+        "points": points,
+        "first_session_mb": first["rss_mb"] if first["sessions"] == 1 else None,
+        "per_additional_session_mb": round(per_session, 2) if per_session is not None else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--mode", choices=["both", "shared", "per-session"], default="both")
+    parser.add_argument("--hashing", action="store_true", help="Use hashing embeddings instead of the model")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    from src.ingestion import IngestionPipeline
+    from src.stubs import FakeEndeeServer, FakeLLMServer
+    from src.vector_store import EndeeClient, VectorIndexer
+
+    log.remove()
+    log.add(sys.stderr, level="WARNING")
+
+    report = {"embeddings": "hashing" if args.hashing else settings.embedding_model, "modes": {}}
+    with tempfile.TemporaryDirectory() as tmp, FakeEndeeServer() as endee, \
+            FakeLLMServer(latency_ms=0, token_delay_ms=0) as llm:
+        settings.processed_data_dir = Path(tmp) / "processed"
+        settings.processed_data_dir.mkdir()
+        settings.index_name = "bench_sessions"
+        settings.retrieval_cache_size = 0
+
+        documents = make_documents(20)
+        paths = write_corpus(documents, Path(tmp) / "corpus")
+        IngestionPipeline(
+            embedding_model=embedding_model(args), indexer=VectorIndexer(EndeeClient(base_url=endee.base_url))
+        ).run(paths)
+        query = questions(documents)[0]["query"]
+
+        # Shared first: per-session copies would otherwise inflate the baseline
+        modes = ["shared", "per-session"] if args.mode == "both" else [args.mode]
+        for mode in modes:
+            print(f"Measuring {mode} sessions...", file=sys.stderr)
+            report["modes"][mode] = measure(mode, args.sessions, args, endee.base_url, llm.base_url, query)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for the ingestion and query stages.
+
+Runs every stage of the system on deterministic synthetic corpora (see
+synthetic.py) against local stand-ins. Endee is replaced by FakeEndeeServer,
+which speaks the SDK's wire format. The LLM provider is replaced by
+FakeLLMServer. Embeddings come from HashingEmbeddingModel, or from the
+sentence-transformers model with --real-embeddings. No network or
+containers are needed. Results are JSON. With --baseline, each stage's time
+is compared to a stored run and the exit status is 1 when any stage is
+slower than the baseline by more than --tolerance.
+
+Stages: load, clean, chunk, embed, upsert (ingestion, timed per corpus) and
+retrieve, pack, query (per question; query is the end-to-end generate_answer).
+
+benchmarks/baseline.json is the committed baseline; its "meta" records the
+machine it was measured on. Timings only compare on similar hardware, so
+regenerate it with --save-baseline when the reference machine changes.
+
+Usage:
+    python benchmarks/bench_suite.py --sizes small medium --output results.json
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import SIZES, make_documents, write_corpus, questions
+from src.utils import settings, log
+
+REPO_ROOT = Path(__file__).parent.parent
+
+# Stages timed per question; compared on their median
+QUERY_STAGES = ("retrieve", "pack", "query")
+
+
+def median_ms(samples):
+    return round(float(np.median(samples)) * 1000, 3)
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def timed(fn, repeat):
+    """Run fn `repeat` times; return (median seconds, last result)."""
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), result
+
+
+def bench_size(name, num_docs, args, endee_url, llm_url, workdir):
+    """Benchmark all stages on one corpus size."""
+    from src.ingestion import DocumentLoader, TextCleaner, TextChunker
+    from src.embeddings import EmbeddingModel
+    from src.stubs import HashingEmbeddingModel
+    from src.vector_store import EndeeClient, VectorIndexer, VectorRetriever
+    from src.generation import LLMClient, PromptBuilder, RAGGenerator
+
+    documents = make_documents(num_docs, seed=args.seed)
+    paths = write_corpus(documents, workdir / name)
+    total_bytes = sum(p.stat().st_size for p in paths)
+    results = {"documents": num_docs, "bytes": total_bytes}
+
+    loader, cleaner, chunker = DocumentLoader(), TextCleaner(), TextChunker()
+    embedding_model = EmbeddingModel() if args.real_embeddings else HashingEmbeddingModel()
+
+    seconds, docs = timed(lambda: [loader.load_file(p) for p in paths], args.repeat)
+    results["load"] = {"ms": round(seconds * 1000, 3), "mb_per_s": round(total_bytes / 2 ** 20 / seconds, 2)}
+
+    seconds, texts = timed(lambda: [cleaner.preprocess(d["text"]) for d in docs], args.repeat)
+    results["clean"] = {"ms": round(seconds * 1000, 3), "mb_per_s": round(total_bytes / 2 ** 20 / seconds, 2)}
+    for doc, text in zip(docs, texts):
+        doc["text"] = text
+
+    seconds, chunk_lists = timed(lambda: [chunker.chunk_document(d) for d in docs], args.repeat)
+    chunks = [c for chunk_list in chunk_lists for c in chunk_list]
+    results["chunk"] = {"ms": round(seconds * 1000, 3), "chunks": len(chunks), "chunks_per_s": round(len(chunks) / seconds, 1)}
+
+    chunk_texts = [c["text"] for c in chunks]
+    seconds, embeddings = timed(lambda: embedding_model.encode_batch(chunk_texts, batch_size=32), args.repeat)
+    results["embed"] = {"ms": round(seconds * 1000, 3), "chunks_per_s": round(len(chunks) / seconds, 1)}
+
+    client = EndeeClient(base_url=endee_url)
+    indexer = VectorIndexer(client)
+    upsert_times = []
+    for _ in range(args.repeat):
+        indexer.setup_index(dimension=embedding_model.get_dimension(), force_recreate=True)
+        start = time.perf_counter()
+        indexer.upsert_chunks(chunks, embeddings)
+        indexer.flush()
+        upsert_times.append(time.perf_counter() - start)
+    seconds = float(np.median(upsert_times))
+    results["upsert"] = {"ms": round(seconds * 1000, 3), "chunks_per_s": round(len(chunks) / seconds, 1)}
+
+    # Query path, one question at a time
+    qs = [q["query"] for q in questions(documents)][:args.queries]
+    retriever = VectorRetriever(client)
+    builder = PromptBuilder()
+    llm = LLMClient(api_key="bench", provider="openai", model="fake-model", base_url=llm_url)
+    generator = RAGGenerator(
+        embedding_model=embedding_model, retriever=retriever, llm_client=llm,
+        prompt_builder=builder, answer_cache=False
+    )
+
+    samples = {stage: [] for stage in QUERY_STAGES}
+    stage_ms = {}
+    for query in qs:
+        vector = embedding_model.encode_single(query)
+        start = time.perf_counter()
+        hits = retriever.get_context(vector, top_k=args.top_k)
+        samples["retrieve"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        builder.build_prompt_with_results(query, hits)
+        samples["pack"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        response = generator.generate_answer(query, top_k=args.top_k, use_cache=False)
+        samples["query"].append(time.perf_counter() - start)
+        for stage, ms in response.get("timings", {}).items():
+            stage_ms.setdefault(stage, []).append(ms)
+
+    for stage in QUERY_STAGES:
+        results[stage] = {
+            "ms": median_ms(samples[stage]),
+            "p95_ms": percentile_ms(samples[stage], 95),
+            "queries": len(qs)
+        }
+    results["query"]["timings_p50_ms"] = {
+        stage: round(float(np.median(values)), 3) for stage, values in stage_ms.items()
+    }
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def cpu_model():
+    """CPU model name where /proc/cpuinfo is available."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """List stages slower than the baseline by more than the tolerance."""
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage, metrics in stages.items():
+            if not isinstance(metrics, dict) or "ms" not in metrics:
+                continue
+            reference = baseline.get("results", {}).get(size, {}).get(stage, {}).get("ms")
+            if not reference:
+                continue
+            ratio = metrics["ms"] / reference
+            if ratio > 1 + tolerance and metrics["ms"] - reference > min_delta_ms:
+                regressions.append({
+                    "size": size,
+                    "stage": stage,
+                    "baseline_ms": reference,
+                    "current_ms": metrics["ms"],
+                    "change_pct": round((ratio - 1) * 100, 1)
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=sorted(SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per ingestion stage (median is kept)")
+    parser.add_argument("--queries", type=int, default=50, help="Questions per corpus for query stages")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--real-embeddings", action="store_true", help="Use the sentence-transformers model")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Fake LLM response latency")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Compare against this results file")
+    parser.add_argument("--save-baseline", type=Path, help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    from src.stubs import FakeEndeeServer, FakeLLMServer
+
+    log.remove()
+    log.add(sys.stderr, level="WARNING")
+
+    with tempfile.TemporaryDirectory() as tmp, FakeEndeeServer() as endee, \
+            FakeLLMServer(latency_ms=args.llm_latency_ms, token_delay_ms=0, seed=args.seed) as llm:
+        workdir = Path(tmp)
+        # Keep benchmark state (lexical index, version markers) out of data/
+        settings.processed_data_dir = workdir / "processed"
+        settings.processed_data_dir.mkdir()
+        settings.index_name = "bench_suite"
+        settings.retrieval_cache_size = 0
+        settings.llm_routing = False
+        settings.fast_path = False
+
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "processor": cpu_model(),
+                "cpus": os.cpu_count(),
+                "embeddings": "sentence-transformers" if args.real_embeddings else "hashing",
+                "repeat": args.repeat,
+                "queries": args.queries,
+                "top_k": args.top_k,
+                "seed": args.seed
+            },
+            "results": {}
+        }
+        for size in args.sizes:
+            print(f"Benchmarking '{size}' corpus ({SIZES[size]} documents)...", file=sys.stderr)
+            report["results"][size] = bench_size(size, SIZES[size], args, endee.base_url, llm.base_url, workdir)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        report["regressions"] = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        report["baseline"] = {"path": str(args.baseline), "commit": baseline.get("meta", {}).get("commit")}
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text)
+    if args.save_baseline:
+        args.save_baseline.write_text(text)
+
+    if report.get("regressions"):
+        for r in report["regressions"]:
+            print(
+                f"REGRESSION {r['size']}/{r['stage']}: {r['baseline_ms']} ms -> {r['current_ms']} ms "
+                f"(+{r['change_pct']}%)",
+                file=sys.stderr
+            )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""Retrieval quality and latency evaluation on labeled QA sets.
+
+Runs labeled questions through VectorRetriever.get_context for several named
+configurations. It reports recall@k, MRR, answer hit rate, prompt tokens and
+latency side by side, so an optimization can be accepted or rejected on data.
+With --generate, questions also go through RAGGenerator.generate_answer,
+adding end-to-end latency, final prompt tokens (after compression) and the
+rate of answers containing the labeled answer.
+
+Dataset (JSONL, one question per line):
+    {"query": "...", "relevant": ["manual.pdf"], "answer": "optional text"}
+
+'relevant' lists the source files that answer the question (matched against
+chunk filenames). Without --dataset, the synthetic corpus and its generated
+questions are used.
+
+Configurations (JSON object, name -> overrides):
+    {
+      "baseline": {},
+      "mmr": {"diversity": "mmr"},
+      "small_chunks": {"MAX_CHUNK_SIZE": 256, "CHUNK_OVERLAP": 32},
+      "int8": {"PRECISION": "INT8D"},
+      "compressed": {"compress": true}
+    }
+Keys top_k, min_similarity, diversity, hybrid, compress and fast_path are
+passed to the calls. Any other key is a setting (env name or field name)
+applied while the configuration runs. Settings that change how the corpus is
+indexed trigger a re-index, which needs a corpus: --corpus DIR or the
+synthetic one. The first configuration is the baseline for deltas.
+
+Backends:
+    stub  In-memory Endee, hashing embeddings (--real-embeddings for the
+          sentence-transformers model) and, with --generate, a fake LLM
+    real  The configured Endee, embedding model and LLM provider (.env). With
+          --corpus the files are indexed into --index-name (default
+          'rag_eval'); otherwise the existing index is evaluated as is.
+
+Usage:
+    python benchmarks/evaluate.py
+    python benchmarks/evaluate.py --configs configs.json --dataset qa.jsonl --corpus docs/
+    python benchmarks/evaluate.py --backend real --dataset qa.jsonl --generate --output eval.json
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import SIZES, make_documents, write_corpus, questions
+from src.utils import settings, log
+
+# Overrides passed to get_context / generate_answer rather than set on settings
+CALL_KEYS = ("top_k", "min_similarity", "diversity", "hybrid", "compress", "fast_path")
+# Settings that change what gets indexed
+INDEX_KEYS = ("max_chunk_size", "chunk_overlap", "precision", "space_type", "embedding_model", "embedding_dimension")
+
+DEFAULT_CONFIGS = {
+    "baseline": {"diversity": "none", "hybrid": False},
+    "mmr": {"diversity": "mmr", "hybrid": False},
+    "doc_cap": {"diversity": "doc_cap", "hybrid": False},
+    "hybrid": {"diversity": "none", "hybrid": True}
+}
+
+
+def load_dataset(path):
+    """Read labeled questions from JSONL."""
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                items.append({
+                    "query": record.get("query") or record["question"],
+                    "relevant": [Path(r).name for r in record.get("relevant", [])],
+                    "answer": record.get("answer")
+                })
+    return items
+
+
+def setting_name(key):
+    """Resolve an env name or field name to a settings field."""
+    fields = type(settings).model_fields
+    if key in fields:
+        return key
+    for name, field in fields.items():
+        if field.alias == key:
+            return name
+    raise SystemExit(f"Unknown setting in configuration: {key}")
+
+
+def split_overrides(overrides):
+    """Split a configuration into call kwargs and settings overrides."""
+    calls = {k: v for k, v in overrides.items() if k in CALL_KEYS}
+    setting_overrides = {setting_name(k): v for k, v in overrides.items() if k not in CALL_KEYS}
+    return calls, setting_overrides
+
+
+def apply_settings(overrides):
+    """Set overrides on settings; return the previous values."""
+    previous = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    return previous
+
+
+def result_file(result):
+    meta = result.get("meta", {})
+    return meta.get("filename") or Path(meta.get("source", "")).name
+
+
+def score(results, item, k):
+    """Recall@k, reciprocal rank and answer hit for one question."""
+    files = [result_file(r) for r in results[:k]]
+    relevant = set(item["relevant"])
+    found = relevant & set(files)
+    rank = next((i for i, f in enumerate(files, 1) if f in relevant), None)
+    metrics = {
+        "recall": len(found) / len(relevant) if relevant else None,
+        "rr": 1.0 / rank if rank else 0.0 if relevant else None,
+        "answer_hit": None
+    }
+    if item.get("answer"):
+        answer = item["answer"].lower()
+        metrics["answer_hit"] = float(any(answer in r.get("meta", {}).get("text", "").lower() for r in results[:k]))
+    return metrics
+
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return round(float(np.mean(values)), 4) if values else None
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 2) if samples else None
+
+
+class Backend:
+    """Builds (and re-indexes) components for each configuration."""
+
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.endee = self.llm = None
+        self.embedding_models = {}
+        self.indexed_with = None
+        self.initial_fingerprint = tuple(getattr(settings, name) for name in INDEX_KEYS)
+        self.corpus_paths = None
+
+        if args.backend == "stub":
+            from src.stubs import FakeEndeeServer, FakeLLMServer
+
+            settings.processed_data_dir = workdir / "processed"
+            settings.processed_data_dir.mkdir()
+            settings.index_name = "rag_eval"
+            self.endee = FakeEndeeServer().start()
+            if args.generate:
+                self.llm = FakeLLMServer(latency_ms=args.llm_latency_ms, token_delay_ms=0, seed=args.seed).start()
+        elif args.corpus:
+            settings.index_name = args.index_name
+
+        if args.corpus:
+            from src.ingestion import DocumentLoader
+
+            self.corpus_paths = sorted(
+                p for p in Path(args.corpus).rglob("*")
+                if p.is_file() and p.suffix.lower() in DocumentLoader.SUPPORTED_FORMATS
+            )
+        elif args.backend == "stub":
+            documents = make_documents(SIZES[args.size], seed=args.seed)
+            self.corpus_paths = write_corpus(documents, workdir / "corpus")
+            self.synthetic_questions = [
+                {"query": q["query"], "relevant": q["relevant"], "answer": q["answer"]}
+                for q in questions(documents)
+            ]
+
+    def embedding_model(self):
+        from src.embeddings import EmbeddingModel
+        from src.stubs import HashingEmbeddingModel
+
+        key = (settings.embedding_model, settings.embedding_dimension)
+        if key not in self.embedding_models:
+            if self.args.backend == "stub" and not self.args.real_embeddings:
+                self.embedding_models[key] = HashingEmbeddingModel()
+            else:
+                self.embedding_models[key] = EmbeddingModel()
+        return self.embedding_models[key]
+
+    def client(self):
+        from src.vector_store import EndeeClient
+
+        return EndeeClient(base_url=self.endee.base_url) if self.endee else EndeeClient()
+
+    def ensure_index(self):
+        """Index the corpus if indexing settings changed since the last configuration."""
+        fingerprint = tuple(getattr(settings, name) for name in INDEX_KEYS)
+        if fingerprint == self.indexed_with:
+            return
+        if self.corpus_paths is None:
+            if self.indexed_with is None and fingerprint == self.initial_fingerprint:
+                return
+            raise SystemExit("Indexing settings changed but no --corpus was given to re-index")
+
+        from src.ingestion import IngestionPipeline
+        from src.vector_store import VectorIndexer
+
+        print(f"  indexing {len(self.corpus_paths)} files...", file=sys.stderr)
+        result = IngestionPipeline(
+            embedding_model=self.embedding_model(), indexer=VectorIndexer(self.client())
+        ).run(self.corpus_paths, force_recreate=True)
+        if not result["indexed"]:
+            raise SystemExit("Indexing the evaluation corpus failed")
+        self.indexed_with = fingerprint
+
+    def components(self):
+        from src.vector_store import VectorRetriever
+        from src.generation import LLMClient, PromptBuilder, RAGGenerator
+
+        retriever = VectorRetriever(self.client())
+        builder = PromptBuilder()
+        generator = None
+        if self.args.generate:
+            llm = (
+                LLMClient(api_key="eval", provider="openai", model="fake-model", base_url=self.llm.base_url)
+                if self.llm else LLMClient()
+            )
+            generator = RAGGenerator(
+                embedding_model=self.embedding_model(), retriever=retriever, llm_client=llm,
+                prompt_builder=builder, answer_cache=False
+            )
+        return retriever, builder, generator
+
+    def close(self):
+        for server in (self.endee, self.llm):
+            if server:
+                server.stop()
+
+
+def evaluate(name, overrides, dataset, backend, args):
+    """Evaluate one configuration."""
+    calls, setting_overrides = split_overrides(overrides)
+    previous = apply_settings(setting_overrides)
+    try:
+        backend.ensure_index()
+        embedding_model = backend.embedding_model()
+        retriever, builder, generator = backend.components()
+        top_k = calls.get("top_k", args.k)
+
+        rows, retrieval_times, prompt_tokens = [], [], []
+        generated = {"latency": [], "prompt_tokens": [], "answer_match": [], "errors": 0, "fast_path": 0}
+        for item in dataset:
+            start = time.perf_counter()
+            vector = embedding_model.encode_single(item["query"])
+            results = retriever.get_context(
+                vector, top_k=top_k, min_similarity=calls.get("min_similarity", 0.0),
+                diversity=calls.get("diversity"), query_text=item["query"], hybrid=calls.get("hybrid")
+            )
+            retrieval_times.append(time.perf_counter() - start)
+            rows.append(score(results, item, top_k))
+
+            stats = {}
+            builder.build_prompt_with_results(item["query"], results, stats=stats)
+            prompt_tokens.append(stats["prompt_tokens"])
+
+            if generator:
+                start = time.perf_counter()
+                response = generator.generate_answer(
+                    item["query"], top_k=top_k, min_similarity=calls.get("min_similarity", 0.0),
+                    diversity=calls.get("diversity"), hybrid=calls.get("hybrid"),
+                    compress=calls.get("compress"), fast_path=calls.get("fast_path"), use_cache=False
+                )
+                generated["latency"].append(time.perf_counter() - start)
+                if response.get("error"):
+                    generated["errors"] += 1
+                    continue
+                generated["prompt_tokens"].append(response.get("prompt_tokens", 0))
+                generated["fast_path"] += bool(response.get("fast_path"))
+                if item.get("answer"):
+                    generated["answer_match"].append(float(item["answer"].lower() in response["answer"].lower()))
+    finally:
+        apply_settings(previous)
+
+    report = {
+        "overrides": overrides,
+        "questions": len(dataset),
+        "k": top_k,
+        f"recall@{top_k}": mean(r["recall"] for r in rows),
+        "mrr": mean(r["rr"] for r in rows),
+        "answer_hit": mean(r["answer_hit"] for r in rows),
+        "prompt_tokens": mean(prompt_tokens),
+        "retrieval_p50_ms": percentile_ms(retrieval_times, 50),
+        "retrieval_p95_ms": percentile_ms(retrieval_times, 95)
+    }
+    if generator:
+        report["generation"] = {
+            "prompt_tokens": mean(generated["prompt_tokens"]),
+            "answer_match": mean(generated["answer_match"]),
+            "latency_p50_ms": percentile_ms(generated["latency"], 50),
+            "latency_p95_ms": percentile_ms(generated["latency"], 95),
+            "error_rate": round(generated["errors"] / len(dataset), 4),
+            "fast_path_rate": round(generated["fast_path"] / len(dataset), 4)
+        }
+    return report
+
+
+def print_table(configs):
+    """Side-by-side summary with deltas against the first configuration."""
+    columns = [("recall", "recall@k"), ("mrr", "mrr"), ("answer_hit", "answer_hit"),
+               ("prompt_tokens", "prompt_tokens"), ("p50 ms", "retrieval_p50_ms"), ("p95 ms", "retrieval_p95_ms")]
+    names = list(configs)
+    if any("generation" in c for c in configs.values()):
+        columns += [("gen p50 ms", ("generation", "latency_p50_ms")), ("gen tokens", ("generation", "prompt_tokens")),
+                    ("gen match", ("generation", "answer_match"))]
+
+    def value(config, key):
+        if isinstance(key, tuple):
+            return config.get(key[0], {}).get(key[1])
+        if key == "recall@k":
+            return config[f"recall@{config['k']}"]
+        return config.get(key)
+
+    width = max(len(n) for n in names) + 2
+    print("".ljust(width) + "".join(label.rjust(16) for label, _ in columns), file=sys.stderr)
+    baseline = configs[names[0]]
+    for name in names:
+        cells = []
+        for _, key in columns:
+            current, reference = value(configs[name], key), value(baseline, key)
+            cell = "-" if current is None else f"{current:g}"
+            if name != names[0] and current is not None and reference:
+                cell += f" ({(current - reference) / reference:+.0%})"
+            cells.append(cell.rjust(16))
+        print(name.ljust(width) + "".join(cells), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["stub", "real"], default="stub")
+    parser.add_argument("--dataset", type=Path, help="Labeled JSONL (default: synthetic questions)")
+    parser.add_argument("--configs", type=Path, help="JSON object of named configurations")
+    parser.add_argument("--corpus", type=Path, help="Directory of documents to index for the evaluation")
+    parser.add_argument("--index-name", default="rag_eval", help="Index used with --backend real --corpus")
+    parser.add_argument("--size", choices=sorted(SIZES), default="medium", help="Synthetic corpus size")
+    parser.add_argument("--k", type=int, default=5, help="Default top_k")
+    parser.add_argument("--limit", type=int, help="Evaluate only the first N questions")
+    parser.add_argument("--generate", action="store_true", help="Also run RAGGenerator.generate_answer")
+    parser.add_argument("--real-embeddings", action="store_true", help="Stub backend: use the sentence-transformers model")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Stub backend: fake LLM latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.backend == "real" and not args.dataset:
+        parser.error("--backend real needs --dataset")
+    configs = json.loads(args.configs.read_text(encoding="utf-8")) if args.configs else DEFAULT_CONFIGS
+
+    log.remove()
+    log.add(sys.stderr, level="WARNING")
+
+    # Measure retrieval itself, not the query-result cache
+    settings.retrieval_cache_size = 0
+
+    report = {"backend": args.backend, "configs": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = Backend(args, Path(tmp))
+        try:
+            dataset = load_dataset(args.dataset) if args.dataset else backend.synthetic_questions
+            dataset = dataset[:args.limit] if args.limit else dataset
+            report["dataset"] = str(args.dataset) if args.dataset else f"synthetic:{args.size}"
+            for name, overrides in configs.items():
+                print(f"Evaluating '{name}' on {len(dataset)} questions...", file=sys.stderr)
+                report["configs"][name] = evaluate(name, overrides, dataset, backend, args)
+        finally:
+            backend.close()
+
+    print_table(report["configs"])
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Concurrent load test for the RAGGenerator query path.
+
+Replays a question set against RAGGenerator.generate_answer at an open-loop
+arrival rate. Requests arrive on schedule whether or not earlier ones have
+finished. Latency is measured from the scheduled arrival, so time spent
+queued behind busy users counts. The load ramps through increasing numbers
+of concurrent users. Each user contributes --rate-per-user requests per
+second and at most that many requests are in flight. Each step reports:
+
+- offered and achieved throughput
+- p50/p95/p99 end-to-end latency and queue wait
+- p50/p95/p99 per stage, from the response's `timings`
+- error rate
+
+The saturation point is the first step where achieved throughput falls
+below --min-throughput-ratio of the offered rate, p95 latency exceeds
+--slo-ms, or the error rate exceeds --max-error-rate.
+
+Backends:
+    stub  In-memory Endee, fake LLM provider and hashing embeddings, indexed
+          with a synthetic corpus (default; no network needed)
+    real  The configured Endee index, embedding model and LLM provider (.env);
+          the index must already be populated and --questions given
+
+Usage:
+    python benchmarks/load_test.py --users 1 2 4 8 16 32
+    python benchmarks/load_test.py --llm-latency-ms 800 --rate-per-user 0.5 --duration 30
+    python benchmarks/load_test.py --backend real --questions questions.jsonl --users 1 2 4
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import SIZES, make_documents, write_corpus, questions
+from src.utils import settings, log
+
+
+def percentiles_ms(samples):
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    values = np.asarray(samples) * 1000
+    return {f"p{q}": round(float(np.percentile(values, q)), 2) for q in (50, 95, 99)}
+
+
+def load_questions(path):
+    """Read questions from a JSONL file ('query' or 'question' per line)."""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                queries.append(record.get("query") or record["question"])
+    return queries
+
+
+def build_stub_generator(args, workdir, endee_url, llm_url):
+    """Index a synthetic corpus into the fake Endee and wire a generator to the stand-ins."""
+    from src.ingestion import IngestionPipeline
+    from src.stubs import HashingEmbeddingModel
+    from src.vector_store import EndeeClient, VectorIndexer, VectorRetriever
+    from src.generation import LLMClient, RAGGenerator
+
+    documents = make_documents(SIZES[args.corpus], seed=args.seed)
+    paths = write_corpus(documents, workdir / "corpus")
+
+    client = EndeeClient(base_url=endee_url)
+    embedding_model = HashingEmbeddingModel()
+    IngestionPipeline(embedding_model=embedding_model, indexer=VectorIndexer(client)).run(paths)
+
+    generator = RAGGenerator(
+        embedding_model=embedding_model,
+        retriever=VectorRetriever(client),
+        llm_client=LLMClient(api_key="load-test", provider="openai", model="fake-model", base_url=llm_url),
+        answer_cache=False
+    )
+    return generator, [q["query"] for q in questions(documents)]
+
+
+def build_real_generator(args):
+    """Generator over the configured backends."""
+    from src.generation import RAGGenerator
+
+    return RAGGenerator(answer_cache=args.use_cache), load_questions(args.questions)
+
+
+def arrival_times(rate, duration, process, rng):
+    """Scheduled arrival offsets (seconds) for one step."""
+    times, t = [], 0.0
+    while True:
+        t += rng.expovariate(rate) if process == "poisson" else 1.0 / rate
+        if t >= duration:
+            return times
+        times.append(t)
+
+
+def run_step(generator, queries, users, args, rng):
+    """Drive one open-loop step and summarize it."""
+    rate = users * args.rate_per_user
+    schedule = arrival_times(rate, args.duration, args.arrivals, rng)
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+    records = []
+
+    def call(query, scheduled):
+        started = time.perf_counter()
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        record = {"queue": started - scheduled, "timings": {}, "error": None}
+        try:
+            response = generator.generate_answer(query, top_k=args.top_k, use_cache=args.use_cache)
+            record["timings"] = response.get("timings", {})
+            record["error"] = response.get("error")
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        finished = time.perf_counter()
+        record["latency"] = finished - scheduled
+        record["finished"] = finished
+        with lock:
+            in_flight["now"] -= 1
+            records.append(record)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        for i, offset in enumerate(schedule):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(call, queries[i % len(queries)], scheduled)
+
+    # Throughput over the arrival window, stretched by any backlog drained after it
+    elapsed = max(max((r["finished"] for r in records), default=start) - start, args.duration)
+    errors = [r["error"] for r in records if r["error"]]
+    stage_samples = {}
+    for r in records:
+        if not r["error"]:
+            for stage, ms in r["timings"].items():
+                stage_samples.setdefault(stage, []).append(ms / 1000)
+
+    return {
+        "users": users,
+        "target_rps": round(rate, 2),
+        "offered_rps": round(len(schedule) / args.duration, 2),
+        "requests": len(records),
+        "achieved_rps": round(len(records) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles_ms([r["latency"] for r in records]),
+        "queue_wait_ms": percentiles_ms([r["queue"] for r in records]),
+        "stages_ms": {stage: percentiles_ms(samples) for stage, samples in stage_samples.items()},
+        "error_rate": round(len(errors) / len(records), 4) if records else 0.0,
+        "errors": sorted(set(e[:200] for e in errors))[:5],
+        "peak_in_flight": in_flight["peak"]
+    }
+
+
+def saturation_reason(step, args):
+    """Why a step counts as saturated, or None."""
+    if step["achieved_rps"] < args.min_throughput_ratio * step["offered_rps"]:
+        return f"throughput {step['achieved_rps']}/{step['offered_rps']} rps"
+    if step["latency_ms"]["p95"] is not None and step["latency_ms"]["p95"] > args.slo_ms:
+        return f"p95 {step['latency_ms']['p95']} ms > {args.slo_ms} ms"
+    if step["error_rate"] > args.max_error_rate:
+        return f"error rate {step['error_rate']:.1%}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["stub", "real"], default="stub")
+    parser.add_argument("--questions", type=Path, help="JSONL question set (required for --backend real)")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="Concurrent users per step")
+    parser.add_argument("--rate-per-user", type=float, default=2.0, help="Requests per second per user")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of arrivals per step")
+    parser.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--use-cache", action="store_true", help="Let the answer cache serve repeats")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p95 latency limit for saturation")
+    parser.add_argument("--min-throughput-ratio", type=float, default=0.9)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--full-ramp", action="store_true", help="Keep ramping after saturation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    stub = parser.add_argument_group("stub backend")
+    stub.add_argument("--corpus", choices=sorted(SIZES), default="medium")
+    stub.add_argument("--llm-latency-ms", type=float, default=200.0)
+    stub.add_argument("--llm-error-rate", type=float, default=0.0)
+    stub.add_argument("--endee-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.backend == "real" and not args.questions:
+        parser.error("--backend real needs --questions")
+
+    from src.stubs import FakeEndeeServer, FakeLLMServer
+
+    log.remove()
+    log.add(sys.stderr, level="WARNING")
+
+    rng = random.Random(args.seed)
+    report = {"config": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()}, "steps": []}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == "stub":
+            workdir = Path(tmp)
+            settings.processed_data_dir = workdir / "processed"
+            settings.processed_data_dir.mkdir()
+            settings.index_name = "load_test"
+            endee = FakeEndeeServer(latency_ms=args.endee_latency_ms).start()
+            llm = FakeLLMServer(
+                latency_ms=args.llm_latency_ms, error_rate=args.llm_error_rate,
+                error_status=503, token_delay_ms=0, seed=args.seed
+            ).start()
+            generator, queries = build_stub_generator(args, workdir, endee.base_url, llm.base_url)
+        else:
+            endee = llm = None
+            generator, queries = build_real_generator(args)
+
+        try:
+            for users in args.users:
+                print(f"{users} users at {users * args.rate_per_user:g} req/s target...", file=sys.stderr)
+                step = run_step(generator, queries, users, args, rng)
+                step["saturated"] = saturation_reason(step, args)
+                report["steps"].append(step)
+                print(
+                    f"  {step['achieved_rps']} req/s, p50 {step['latency_ms']['p50']} ms, "
+                    f"p95 {step['latency_ms']['p95']} ms, errors {step['error_rate']:.1%}"
+                    + (f"  SATURATED ({step['saturated']})" if step["saturated"] else ""),
+                    file=sys.stderr
+                )
+                if step["saturated"] and not args.full_ramp:
+                    break
+        finally:
+            for server in (endee, llm):
+                if server:
+                    server.stop()
+
+    saturated = next((s for s in report["steps"] if s["saturated"]), None)
+    healthy = report["steps"][:report["steps"].index(saturated)] if saturated else report["steps"]
+    report["saturation"] = {
+        "users": saturated["users"] if saturated else None,
+        "reason": saturated["saturated"] if saturated else None,
+        "max_sustained_users": max((s["users"] for s in healthy), default=None),
+        "max_sustained_rps": max((s["achieved_rps"] for s in healthy), default=None)
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
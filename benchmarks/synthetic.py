@@ -0,0 +1,102 @@
+"""Deterministic synthetic documentation corpora for benchmarks.
+
+Documents look like product docs: markdown headings, paragraphs of
+Zipf-distributed filler words and, in each document, a few unique facts
+(a setting, its value and an error code). Each fact yields a question whose
+relevant source is known, so corpora double as labeled QA sets.
+"""
+
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+
+# Number of documents per named corpus size
+SIZES = {"small": 20, "medium": 200, "large": 1000}
+
+TOPICS = [
+    "authentication", "rate limiting", "deployment", "caching", "logging", "billing",
+    "webhooks", "pagination", "search", "backups", "monitoring", "permissions"
+]
+
+
+def _vocabulary(size: int = 5000) -> List[str]:
+    syllables = ["ka", "lo", "mi", "nu", "pe", "ra", "si", "to", "ve", "zu", "da", "gi"]
+    rng = np.random.default_rng(1234)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables, size=rng.integers(2, 5))))
+    return sorted(words)
+
+
+def make_documents(num_docs: int, words_per_doc: int = 900, facts_per_doc: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Build a deterministic synthetic corpus.
+
+    Args:
+        num_docs: Number of documents
+        words_per_doc: Approximate filler words per document
+        facts_per_doc: Unique facts (and questions) per document
+        seed: Random seed
+
+    Returns:
+        List of dicts with 'filename', 'text' and 'questions' (each a dict
+        with 'query', 'answer' and 'relevant' filenames)
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = _vocabulary()
+    ranks = np.arange(1, len(vocabulary) + 1)
+    probs = 1.0 / ranks
+    probs /= probs.sum()
+
+    documents = []
+    for d in range(num_docs):
+        topic = TOPICS[d % len(TOPICS)]
+        filename = f"{topic.replace(' ', '_')}_{d:04d}.md"
+        sections = [f"# {topic.title()} guide {d}"]
+        questions = []
+        num_sections = max(facts_per_doc, 3)
+        words_per_section = words_per_doc // num_sections
+
+        for s in range(num_sections):
+            sections.append(f"## Section {s + 1}")
+            words = rng.choice(len(vocabulary), size=words_per_section, p=probs)
+            sentences = []
+            for start in range(0, len(words), 15):
+                sentence = " ".join(vocabulary[w] for w in words[start:start + 15])
+                sentences.append(sentence.capitalize() + ".")
+            if s < facts_per_doc:
+                setting = f"{topic.replace(' ', '_')}.option_{d}_{s}"
+                value = int(rng.integers(1, 10000))
+                code = f"E{d:04d}{s}"
+                fact = (
+                    f"The {setting} setting defaults to {value} and errors with code {code} "
+                    f"when it is exceeded."
+                )
+                sentences.insert(len(sentences) // 2, fact)
+                questions.append({
+                    "query": f"What is the default value of {setting}?",
+                    "answer": str(value),
+                    "relevant": [filename]
+                })
+            sections.append(" ".join(sentences))
+
+        documents.append({"filename": filename, "text": "\n\n".join(sections), "questions": questions})
+    return documents
+
+
+def write_corpus(documents: List[Dict[str, Any]], directory: Path) -> List[Path]:
+    """Write documents as markdown files and return their paths."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for doc in documents:
+        path = directory / doc["filename"]
+        path.write_text(doc["text"], encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def questions(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """All labeled questions of a corpus."""
+    return [q for doc in documents for q in doc["questions"]]
@@ -0,0 +1,5 @@
+"""HTTP query API for programmatic clients."""
+
+from .server import RAGServer, APIError
+
+__all__ = ["RAGServer", "APIError"]
@@ -0,0 +1,470 @@
+"""HTTP query API over the shared RAG components.
+
+A small stdlib HTTP service for programmatic clients, run next to (or
+instead of) the Streamlit app. Components are built and warmed once at
+start-up and shared by a fixed pool of worker threads. When more than
+API_MAX_PENDING requests are waiting, new ones get 503 with Retry-After
+instead of queueing without bound.
+
+Endpoints:
+    GET  /health    Status and index state
+    GET  /metrics   Prometheus metrics
+    POST /ask       {"query": "...", ...options}  (add "stream": true for NDJSON events)
+    POST /batch     {"queries": ["...", ...], ...options}
+    POST /search    {"query": "...", "top_k": 5, "filters": {...}, ...}
+
+Usage:
+    python -m src.api.server
+    python -m src.api.server --stub --index README.md   # local stand-ins, no services needed
+
+    curl -s localhost:8000/ask -d '{"query": "How do I start Endee?"}'
+"""
+
+import argparse
+import hmac
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..generation import RAGComponents
+from ..utils import settings, log
+from ..utils.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+
+
+# Request options accepted by each endpoint (anything else is rejected)
+SEARCH_OPTIONS = ("top_k", "min_similarity", "filters", "diversity", "hybrid")
+ASK_OPTIONS = SEARCH_OPTIONS + ("temperature", "max_tokens", "compress", "fast_path", "use_cache")
+
+MAX_BODY_BYTES = 1 << 20
+MAX_BATCH_QUERIES = 256
+MAX_TOP_K = 100
+
+# Sent instead of exception text, which is only logged
+INTERNAL_ERROR = "Internal server error"
+
+
+class APIError(Exception):
+    """Error returned to the client as JSON with an HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _dumps(payload: Any) -> bytes:
+    return json.dumps(payload, default=_json_default).encode("utf-8")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_filters(value: Any) -> bool:
+    return isinstance(value, dict) and all(
+        isinstance(v, str) or (isinstance(v, list) and all(isinstance(item, str) for item in v))
+        for v in value.values()
+    )
+
+
+# Check and description of the accepted values of each option
+OPTION_CHECKS: Dict[str, Tuple[Callable[[Any], bool], str]] = {
+    "top_k": (lambda v: _is_int(v) and 1 <= v <= MAX_TOP_K, f"an integer from 1 to {MAX_TOP_K}"),
+    "min_similarity": (lambda v: _is_number(v) and -1 <= v <= 1, "a number from -1 to 1"),
+    "temperature": (lambda v: _is_number(v) and 0 <= v <= 2, "a number from 0 to 2"),
+    "max_tokens": (lambda v: _is_int(v) and v >= 1, "a positive integer"),
+    "filters": (lambda v: v is None or _is_filters(v), "an object of strings or lists of strings"),
+    "diversity": (lambda v: v is None or v in ("none", "mmr", "doc_cap"), "one of 'none', 'mmr', 'doc_cap'"),
+    "hybrid": (lambda v: v is None or isinstance(v, bool), "a boolean"),
+    "compress": (lambda v: v is None or isinstance(v, bool), "a boolean"),
+    "fast_path": (lambda v: v is None or isinstance(v, bool), "a boolean"),
+    "use_cache": (lambda v: isinstance(v, bool), "a boolean")
+}
+
+
+def _options(body: Dict[str, Any], allowed: Tuple[str, ...], ignore: Tuple[str, ...]) -> Dict[str, Any]:
+    unknown = sorted(set(body) - set(allowed) - set(ignore))
+    if unknown:
+        raise APIError(400, f"Unknown option(s): {', '.join(unknown)}")
+    options = {k: body[k] for k in allowed if k in body}
+    for name, value in options.items():
+        check, expected = OPTION_CHECKS[name]
+        if not check(value):
+            raise APIError(400, f"'{name}' must be {expected}")
+    return options
+
+
+def _public(result: Dict[str, Any]) -> Dict[str, Any]:
+    """A generated answer without the exception text of a failed one."""
+    if "error" not in result:
+        return result
+    return {**result, "answer": "Error generating answer", "error": INTERNAL_ERROR}
+
+
+def _public_events(events: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    try:
+        for event in events:
+            if event.get("type") == "done":
+                event = {**event, "result": _public(event["result"])}
+            yield event
+    finally:
+        events.close()
+
+
+def _query(body: Dict[str, Any]) -> str:
+    query = body.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise APIError(400, "'query' must be a non-empty string")
+    return query
+
+
+class _PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles connections on a fixed thread pool, shedding load past max_pending."""
+
+    def __init__(self, address, handler, workers: int, max_pending: int):
+        super().__init__(address, handler)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-api")
+        self._max_pending = max_pending
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._rejected = metrics.counter("api_rejected_total", "Requests refused with 503 because the queue was full")
+
+    def process_request(self, request, client_address):
+        with self._pending_lock:
+            if self._pending >= self._max_pending:
+                overloaded = True
+            else:
+                overloaded = False
+                self._pending += 1
+        if overloaded:
+            self._rejected.inc()
+            body = _dumps({"error": "Server busy, retry shortly"})
+            try:
+                request.sendall(
+                    b"HTTP/1.0 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+                    b"Retry-After: 1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._pool.submit(self._work, request, client_address)
+
+    def _work(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._pending_lock:
+                self._pending -= 1
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class RAGServer:
+    """HTTP query API serving ask, batch-ask and search over shared components."""
+
+    def __init__(
+        self,
+        components: RAGComponents,
+        host: str = None,
+        port: int = None,
+        workers: int = None,
+        max_pending: int = None,
+        api_key: Optional[str] = None
+    ):
+        """
+        Initialize the API server.
+
+        Args:
+            components: Shared RAG components
+            host: Bind address (defaults to API_HOST)
+            port: Bind port, 0 picks a free one (defaults to API_PORT)
+            workers: Worker threads handling requests (defaults to API_WORKERS)
+            max_pending: Requests queued or running before new ones get 503
+                (defaults to API_MAX_PENDING)
+            api_key: Required bearer token / X-API-Key (defaults to API_KEY;
+                empty disables authentication)
+        """
+        self.components = components
+        self.api_key = api_key if api_key is not None else settings.api_key
+        self._requests = metrics.counter("api_requests_total", "HTTP API requests by endpoint and status")
+        self._latency = metrics.histogram("api_request_seconds", "HTTP API request latency by endpoint")
+
+        self._routes: Dict[Tuple[str, str], Callable] = {
+            ("GET", "/health"): self.health,
+            ("POST", "/ask"): self.ask,
+            ("POST", "/batch"): self.batch,
+            ("POST", "/search"): self.search
+        }
+        self._server = _PooledHTTPServer(
+            (host or settings.api_host, settings.api_port if port is None else port),
+            self._make_handler(),
+            workers=workers or settings.api_workers,
+            max_pending=max_pending or settings.api_max_pending
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warm_up(self):
+        """Run the embedding model once so the first request does not pay for it."""
+        self.components.embedding_model.encode_single("warm up")
+
+    def start(self) -> "RAGServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "RAGServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Endpoints: each returns a JSON-serializable payload, or an iterator of events to stream
+
+    def health(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "index": self.components.generator.retriever.index_name,
+            "indexed": self.components.indexed,
+            "indexed_files": len(self.components.indexed_files),
+            "indexing": self.components.indexing
+        }
+
+    def ask(self, body: Dict[str, Any]):
+        query = _query(body)
+        options = _options(body, ASK_OPTIONS, ignore=("query", "stream"))
+        if body.get("stream"):
+            return _public_events(self.components.generator.generate_answer_stream(query, **options))
+        return _public(self.components.generator.generate_answer(query, **options))
+
+    def batch(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        queries = body.get("queries")
+        if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+            raise APIError(400, "'queries' must be a non-empty list of strings")
+        if len(queries) > MAX_BATCH_QUERIES:
+            raise APIError(413, f"At most {MAX_BATCH_QUERIES} queries per batch")
+        options = _options(body, ASK_OPTIONS, ignore=("queries",))
+        return {"results": [_public(r) for r in self.components.generator.batch_generate(queries, **options)]}
+
+    def search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        query = _query(body)
+        options = _options(body, SEARCH_OPTIONS, ignore=("query",))
+        vector = self.components.embedding_model.encode_single(query)
+        stats: Dict[str, Any] = {}
+        results = self.components.generator.retriever.get_context(
+            vector, query_text=query, stats=stats, **options
+        )
+        return {
+            "query": query,
+            "results": [{k: v for k, v in r.items() if k != "vector"} for r in results],
+            "stats": stats
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            server_version = "RAGServer/1.0"
+
+            def log_message(self, format, *args):
+                log.debug(f"{self.address_string()} {format % args}")
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, events: Iterable[Dict[str, Any]]) -> bool:
+                """
+                Send events as newline-delimited JSON, flushed as they arrive.
+
+                The 200 status is already sent when an event fails, so the
+                failure is reported as a final {"type": "error"} event.
+                Returns False in that case.
+                """
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                try:
+                    for event in events:
+                        self.wfile.write(_dumps(event) + b"\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    log.info("API client disconnected mid-stream")
+                except Exception as e:
+                    log.error(f"API error while streaming: {e}")
+                    try:
+                        self.wfile.write(_dumps({"type": "error", "error": INTERNAL_ERROR}) + b"\n")
+                        self.wfile.flush()
+                    except OSError:
+                        pass
+                    return False
+                finally:
+                    close = getattr(events, "close", None)
+                    if close:
+                        close()
+                return True
+
+            def _authorized(self) -> bool:
+                if not server.api_key:
+                    return True
+                supplied = self.headers.get("X-API-Key") or ""
+                authorization = self.headers.get("Authorization") or ""
+                if authorization.startswith("Bearer "):
+                    supplied = authorization[len("Bearer "):]
+                return hmac.compare_digest(supplied.encode(), server.api_key.encode())
+
+            def _body(self) -> Dict[str, Any]:
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    raise APIError(400, "Invalid Content-Length header")
+                if length < 0:
+                    raise APIError(400, "Invalid Content-Length header")
+                if length > MAX_BODY_BYTES:
+                    raise APIError(413, "Request body too large")
+                if not length:
+                    return {}
+                try:
+                    body = json.loads(self.rfile.read(length))
+                except ValueError as e:
+                    raise APIError(400, f"Invalid JSON: {e}")
+                if not isinstance(body, dict):
+                    raise APIError(400, "Request body must be a JSON object")
+                return body
+
+            def _handle(self, method: str):
+                path = self.path.split("?")[0].rstrip("/") or "/"
+                known = {p for _, p in server._routes} | {"/metrics"}
+                endpoint = path if path in known else "other"  # bounded label values
+                status, start = 200, time.perf_counter()
+                try:
+                    if path == "/metrics" and method == "GET":
+                        self._send(200, metrics.to_prometheus().encode("utf-8"), PROMETHEUS_CONTENT_TYPE)
+                        return
+                    route = server._routes.get((method, path))
+                    if route is None:
+                        raise APIError(405 if path in known else 404, f"No route for {method} {path}")
+                    if not self._authorized():
+                        raise APIError(401, "Missing or invalid API key")
+                    payload = route(self._body())
+                    if isinstance(payload, dict):
+                        self._send(200, _dumps(payload))
+                    elif not self._stream(payload):
+                        status = 500
+                except APIError as e:
+                    status = e.status
+                    self._send(status, _dumps({"error": str(e)}))
+                except Exception as e:
+                    # Details go to the log only, not to the client
+                    status = 500
+                    log.error(f"API error on {method} {path}: {e}")
+                    self._send(status, _dumps({"error": INTERNAL_ERROR}))
+                finally:
+                    server._requests.inc(labels={"endpoint": endpoint, "status": str(status)})
+                    server._latency.observe(time.perf_counter() - start, {"endpoint": endpoint})
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        return Handler
+
+
+def _stub_components() -> Tuple[RAGComponents, list]:
+    """Components over the local stand-ins (fake Endee, fake LLM, hashing embeddings)."""
+    from ..stubs import FakeEndeeServer, FakeLLMServer, HashingEmbeddingModel
+    from ..vector_store import EndeeClient
+    from ..generation import LLMClient
+
+    endee = FakeEndeeServer().start()
+    llm = FakeLLMServer(latency_ms=50, token_delay_ms=2).start()
+    components = RAGComponents(
+        client=EndeeClient(base_url=endee.base_url),
+        embedding_model=HashingEmbeddingModel(),
+        llm_client=LLMClient(api_key="stub", provider="openai", model="fake-model", base_url=llm.base_url)
+    )
+    return components, [endee, llm]
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="HTTP query API for the RAG system")
+    parser.add_argument("--host", default=settings.api_host)
+    parser.add_argument("--port", type=int, default=settings.api_port)
+    parser.add_argument("--workers", type=int, default=settings.api_workers)
+    parser.add_argument("--max-pending", type=int, default=settings.api_max_pending)
+    parser.add_argument("--stub", action="store_true", help="Use in-process Endee/LLM stand-ins and hashing embeddings")
+    parser.add_argument("--index", nargs="+", help="Index these files/directories/globs at start-up")
+    args = parser.parse_args(argv)
+
+    stand_ins = []
+    if args.stub:
+        components, stand_ins = _stub_components()
+    else:
+        components = RAGComponents()
+
+    if args.index:
+        from ..ingestion.cli import collect_paths
+
+        paths = collect_paths(args.index)
+        result = components.index_documents(paths)
+        log.info(f"Indexed {result['indexed']} chunks from {result['documents']} files")
+
+    server = RAGServer(components, args.host, args.port, args.workers, args.max_pending)
+    server.warm_up()
+    log.info(f"RAG API listening on {server.url} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for stand_in in stand_ins:
+            stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 """Embedding model wrapper for generating vector representations."""
 
+import threading
+import time
+from contextlib import contextmanager
 from typing import List, Union
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from tqdm import tqdm
 
 from ..utils import settings, log
 
@@ -19,6 +23,12 @@ class EmbeddingModel:
         """
         self.model_name = model_name or settings.embedding_model
         self.dimension = settings.embedding_dimension
+        # Fast tokenizers are not safe to call from several threads at once.
+        # The lock is held per batch, and callers waiting for it go before a
+        # long encode's next batch, so queries are not stuck behind indexing.
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
         
         log.info(f"Loading embedding model: {self.model_name}")
         try:
@@ -49,12 +59,18 @@ class EmbeddingModel:
             texts = [texts]
         
         try:
-            embeddings = self.model.encode(
-                texts,
-                batch_size=batch_size,
-                show_progress_bar=show_progress,
-                convert_to_numpy=True
-            )
+            parts = []
+            for start in tqdm(range(0, len(texts), batch_size), desc="Embedding", disable=not show_progress):
+                while self._waiting:
+                    time.sleep(0.001)
+                with self._model_lock():
+                    parts.append(self.model.encode(
+                        texts[start:start + batch_size],
+                        batch_size=batch_size,
+                        show_progress_bar=False,
+                        convert_to_numpy=True
+                    ))
+            embeddings = np.concatenate(parts) if parts else np.zeros((0, self.dimension), dtype=np.float32)
             
             log.debug(f"Generated embeddings for {len(texts)} texts")
             return embeddings
@@ -63,6 +79,21 @@ class EmbeddingModel:
             log.error(f"Error generating embeddings: {e}")
             raise
     
+    @contextmanager
+    def _model_lock(self):
+        """Hold the model lock, counted as waiting until it is acquired."""
+        with self._waiting_lock:
+            self._waiting += 1
+        try:
+            self._lock.acquire()
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+        try:
+            yield
+        finally:
+            self._lock.release()
+    
     def encode_single(self, text: str) -> List[float]:
         """
         Encode a single text and return as list.
@@ -1,7 +1,9 @@
 """Generation module for LLM-based answer generation."""
 
 from .llm_client import LLMClient
+from .resilience import LLMError
 from .prompt_builder import PromptBuilder
 from .generator import RAGGenerator
+from .components import RAGComponents, IndexingInProgress
 
-__all__ = ["LLMClient", "PromptBuilder", "RAGGenerator"]
+__all__ = ["LLMClient", "LLMError", "PromptBuilder", "RAGGenerator", "RAGComponents", "IndexingInProgress"]
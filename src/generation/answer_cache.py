@@ -0,0 +1,236 @@
+"""Two-tier (exact + semantic) answer cache backed by SQLite."""
+
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Any, Optional, Sequence
+import numpy as np
+
+from ..utils import settings, log
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for exact matching (case, whitespace, trailing punctuation)."""
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip(" ?!.")
+
+
+def params_key(**params) -> str:
+    """Stable hash of the generation parameters an answer depends on."""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class AnswerCache:
+    """
+    Cache RAG answers in a local SQLite database.
+
+    The exact tier matches the normalized query; the semantic tier, if
+    enabled, reuses an answer whose query embedding is within
+    `semantic_threshold` cosine similarity of the new query. Entries are
+    scoped to an index version and parameter set, so re-indexing
+    invalidates them. SQLite (WAL mode) lets several worker processes
+    share one cache file.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        semantic_threshold: Optional[float] = None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Initialize answer cache.
+
+        Args:
+            path: SQLite database path
+            semantic_threshold: Minimum cosine similarity for semantic hits
+                (values above 1.0 disable the semantic tier; defaults to
+                settings.semantic_cache_threshold if SEMANTIC_CACHE_ENABLED,
+                else disabled)
+            ttl_seconds: Entry lifetime in seconds (0 = no expiry)
+            max_entries: Maximum number of cached answers
+        """
+        self.path = Path(path or settings.answer_cache_path)
+        if semantic_threshold is None:
+            semantic_threshold = settings.semantic_cache_threshold if settings.semantic_cache_enabled else float("inf")
+        self.semantic_threshold = semantic_threshold
+        self.ttl_seconds = settings.answer_cache_ttl if ttl_seconds is None else ttl_seconds
+        self.max_entries = max_entries or settings.answer_cache_max_entries
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS answers (
+                    key TEXT PRIMARY KEY,
+                    index_version TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    embedding BLOB,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_answers_scope "
+                "ON answers (index_version, params, created_at)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_created ON answers (created_at)")
+
+        semantic = f"semantic threshold {self.semantic_threshold}" if self.semantic_threshold <= 1.0 else "semantic tier off"
+        log.info(f"Answer cache at {self.path} ({semantic})")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    @staticmethod
+    def make_key(query: str, params: str, index_version: str) -> str:
+        """Exact-tier key for a query, parameter hash and index version."""
+        raw = f"{index_version}\x00{params}\x00{normalize_query(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _expiry_cutoff(self) -> float:
+        return time.time() - self.ttl_seconds if self.ttl_seconds else 0.0
+
+    def get_exact(self, query: str, params: str, index_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an answer for the same normalized query.
+
+        Args:
+            query: User question
+            params: Parameter hash from params_key()
+            index_version: Current index version
+
+        Returns:
+            Cached response dictionary, or None
+        """
+        key = self.make_key(query, params, index_version)
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT response FROM answers WHERE key = ? AND created_at >= ?",
+                    (key, self._expiry_cutoff())
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning(f"Answer cache lookup failed: {e}")
+            return None
+
+        return json.loads(row[0]) if row else None
+
+    def get_semantic(
+        self,
+        query_embedding: Sequence[float],
+        params: str,
+        index_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up an answer for a paraphrased query.
+
+        Args:
+            query_embedding: Embedding of the new query
+            params: Parameter hash from params_key()
+            index_version: Current index version
+
+        Returns:
+            Cached response dictionary with 'cache_similarity', or None
+        """
+        if self.semantic_threshold > 1.0:
+            return None
+
+        try:
+            with closing(self._connect()) as conn:
+                rows = conn.execute(
+                    "SELECT embedding, response FROM answers "
+                    "WHERE index_version = ? AND params = ? AND created_at >= ? "
+                    "AND embedding IS NOT NULL ORDER BY created_at DESC LIMIT ?",
+                    (index_version, params, self._expiry_cutoff(), settings.semantic_cache_scan)
+                ).fetchall()
+        except sqlite3.Error as e:
+            log.warning(f"Answer cache lookup failed: {e}")
+            return None
+
+        if not rows:
+            return None
+
+        # One vectorized cosine similarity over all candidate embeddings
+        matrix = np.stack([np.frombuffer(row[0], dtype=np.float32) for row in rows])
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * max(float(np.linalg.norm(query)), 1e-12)
+        similarities = (matrix @ query) / np.maximum(norms, 1e-12)
+
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.semantic_threshold:
+            return None
+
+        response = json.loads(rows[best][1])
+        response["cache_similarity"] = float(similarities[best])
+        return response
+
+    def put(
+        self,
+        query: str,
+        params: str,
+        index_version: str,
+        response: Dict[str, Any],
+        query_embedding: Optional[Sequence[float]] = None
+    ):
+        """
+        Store an answer.
+
+        Args:
+            query: User question
+            params: Parameter hash from params_key()
+            index_version: Index version the answer was generated against
+            response: Response dictionary to cache
+            query_embedding: Query embedding for the semantic tier
+        """
+        embedding = (
+            np.asarray(query_embedding, dtype=np.float32).tobytes()
+            if query_embedding is not None else None
+        )
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        self.make_key(query, params, index_version),
+                        index_version,
+                        params,
+                        query,
+                        embedding,
+                        json.dumps(response),
+                        time.time()
+                    )
+                )
+                # Answers from older index versions can never be served again
+                conn.execute("DELETE FROM answers WHERE index_version != ?", (index_version,))
+                # Evict the oldest answers only once the cache is over its size
+                count = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM answers WHERE key IN "
+                        "(SELECT key FROM answers ORDER BY created_at LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            log.warning(f"Answer cache write failed: {e}")
+
+    def clear(self) -> int:
+        """Remove all cached answers and return how many were removed."""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM answers").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size information."""
+        with closing(self._connect()) as conn:
+            count, versions = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT index_version) FROM answers"
+            ).fetchone()
+        return {"entries": count, "index_versions": versions, "path": str(self.path)}
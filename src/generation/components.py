@@ -0,0 +1,122 @@
+"""Process-wide RAG components shared by every app session."""
+
+from typing import List, Dict, Any, Optional, Sequence
+
+from .llm_client import LLMClient
+from .generator import RAGGenerator
+from ..embeddings import EmbeddingModel
+from ..ingestion import IngestionProfiler, IndexingJob, IndexingJobManager, IndexingInProgress
+from ..ingestion.loader import Source
+from ..vector_store import EndeeClient, VectorRetriever
+from ..utils import log
+
+
+class RAGComponents:
+    """
+    The heavy part of the app, built once per process.
+
+    This holds one embedding model, Endee client, LLM client and generator.
+    All of them are safe to call from several threads. Browser sessions keep
+    only their own chat history and query settings and call into the shared
+    generator, so each extra session adds almost no memory and no cold start.
+    Index state (whether documents are indexed, and which files) belongs to
+    the index, so it lives here too and every session sees the same view.
+    Re-indexing runs as a background job (see IndexingJobManager) that
+    builds a new index while queries keep using the current one.
+    """
+
+    def __init__(
+        self,
+        client: EndeeClient = None,
+        embedding_model: EmbeddingModel = None,
+        llm_client: LLMClient = None
+    ):
+        """
+        Build shared components.
+
+        Args:
+            client: Endee client
+            embedding_model: Embedding model for queries and ingestion
+            llm_client: LLM client
+        """
+        self.client = client or EndeeClient()
+        self.embedding_model = embedding_model or EmbeddingModel()
+        self.llm_client = llm_client or LLMClient()
+        self.generator = RAGGenerator(
+            embedding_model=self.embedding_model,
+            retriever=VectorRetriever(self.client),
+            llm_client=self.llm_client
+        )
+        self.jobs = IndexingJobManager(self.client, self.embedding_model, on_commit=self._on_commit)
+        self.indexed_files: List[str] = self._stored_files()
+        log.info(f"Shared RAG components ready ({len(self.indexed_files)} indexed files)")
+
+    def _stored_files(self) -> List[str]:
+        """Files already in the index, recovered from its lexical mirror."""
+        if self.generator.retriever.index is None:
+            return []
+        lexical = self.generator.retriever.get_lexical_index()
+        if lexical is None:
+            return []
+        return sorted({meta.get("filename") for meta in lexical.doc_meta if meta.get("filename")})
+
+    @property
+    def indexed(self) -> bool:
+        """Whether the index holds documents."""
+        return self.generator.retriever.index is not None and bool(self.indexed_files)
+
+    @property
+    def indexing(self) -> bool:
+        """Whether an indexing job is running right now."""
+        return self.jobs.running
+
+    def _on_commit(self, job: IndexingJob):
+        """Switch queries to the index a job just finished building."""
+        self.generator.retriever.refresh()
+        self.indexed_files = sorted(job.result["files"])
+
+    def start_indexing(
+        self,
+        paths: Sequence[Source],
+        profiler: Optional[IngestionProfiler] = None
+    ) -> IndexingJob:
+        """
+        Rebuild the index from files in the background.
+
+        Args:
+            paths: Files (paths or seekable streams such as uploads) the
+                new index should contain
+            profiler: Optional ingestion profiler
+
+        Returns:
+            The running job; poll its status and progress
+
+        Raises:
+            IndexingInProgress: If another indexing job is running
+        """
+        return self.jobs.submit(paths, profiler=profiler)
+
+    def index_documents(
+        self,
+        paths: Sequence[Source],
+        profiler: Optional[IngestionProfiler] = None
+    ) -> Dict[str, Any]:
+        """
+        Rebuild the index from files and wait for the job to finish.
+
+        Args:
+            paths: Files to index
+            profiler: Optional ingestion profiler
+
+        Returns:
+            IngestionPipeline.run_resumable result, plus 'files'
+
+        Raises:
+            IndexingInProgress: If another indexing job is running
+            RuntimeError: If the job failed or was cancelled
+        """
+        job = self.start_indexing(paths, profiler=profiler)
+        job.wait()
+        if job.status != "done":
+            raise RuntimeError(f"Indexing job {job.id} {job.status}: {job.error or 'no changes made'}")
+        return job.result
@@ -0,0 +1,157 @@
+"""Query-aware extractive compression of retrieved context."""
+
+import re
+import time
+from typing import List, Dict, Any, Optional, Sequence
+import numpy as np
+
+from ..utils import settings, log
+from ..utils.tokens import count_tokens
+
+
+# Sentence ends, plus line breaks (headings, list items and table rows carry no punctuation)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+# Chunk position fields; compressed text no longer matches the stored span
+SPAN_FIELDS = ("start_token", "end_token", "start_char", "end_char")
+
+
+def split_sentences(text: str, min_chars: int = 3) -> List[str]:
+    """
+    Split text into sentences and standalone lines.
+
+    Args:
+        text: Chunk text
+        min_chars: Shorter fragments (stray bullets, separators) are dropped
+
+    Returns:
+        List of sentences in document order
+    """
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if len(s.strip()) >= min_chars]
+
+
+def cosine_scores(query_embedding: Sequence[float], matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of `matrix` to the query, in one vectorized pass."""
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * max(float(np.linalg.norm(query)), 1e-12)
+    return (matrix @ query) / np.maximum(norms, 1e-12)
+
+
+class ContextCompressor:
+    """
+    Keep only the sentences of retrieved chunks that matter for the query.
+
+    All sentences of all retrieved chunks are embedded in one batch with
+    the already-loaded embedding model and ranked by cosine similarity to
+    the query embedding; the best ones are kept, in document order, until
+    the token budget is spent. Sentences repeated across chunks (chunk
+    overlap) are only considered once.
+    """
+
+    def __init__(self, embedding_model, token_budget: Optional[int] = None, batch_size: int = 64):
+        """
+        Initialize context compressor.
+
+        Args:
+            embedding_model: EmbeddingModel used for queries
+            token_budget: Maximum tokens of kept sentences
+            batch_size: Sentence embedding batch size
+        """
+        self.embedding_model = embedding_model
+        self.token_budget = token_budget or settings.compression_token_budget
+        self.batch_size = batch_size
+
+    def compress(
+        self,
+        query_embedding: Sequence[float],
+        results: List[Dict[str, Any]],
+        token_budget: Optional[int] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Compress search results to the sentences most similar to the query.
+
+        Args:
+            query_embedding: Query embedding
+            results: Search results (ordered by relevance)
+            token_budget: Override for the token budget
+            stats: Optional dict filled with input/output tokens, ratio,
+                sentence counts and milliseconds spent
+
+        Returns:
+            Copies of the results whose meta 'text' holds only the kept
+            sentences; results with no kept sentence are left out
+        """
+        start = time.perf_counter()
+        budget = token_budget or self.token_budget
+
+        # Collect unique sentences; the first (most relevant) chunk owns a duplicate
+        sentences, owners = [], []
+        seen = set()
+        input_tokens = 0
+        for r, result in enumerate(results):
+            text = result.get('meta', {}).get('text', '')
+            input_tokens += count_tokens(text)
+            for position, sentence in enumerate(split_sentences(text)):
+                if sentence in seen:
+                    continue
+                seen.add(sentence)
+                sentences.append(sentence)
+                owners.append((r, position))
+
+        if not sentences:
+            if stats is not None:
+                stats.update({"input_tokens": input_tokens, "output_tokens": input_tokens, "ratio": 1.0})
+            return results
+
+        embeddings = self.embedding_model.encode(sentences, batch_size=self.batch_size)
+        scores = cosine_scores(query_embedding, np.asarray(embeddings, dtype=np.float32))
+
+        kept = set()
+        output_tokens = 0
+        for i in np.argsort(-scores):
+            tokens = count_tokens(sentences[i])
+            # Always keep the best sentence; after that, skip what does not fit
+            if kept and output_tokens + tokens > budget:
+                continue
+            kept.add(int(i))
+            output_tokens += tokens
+            if output_tokens >= budget:
+                break
+
+        # Rebuild each chunk from its kept sentences in document order
+        selected: Dict[int, List[tuple]] = {}
+        for i in sorted(kept):
+            r, position = owners[i]
+            selected.setdefault(r, []).append((position, sentences[i]))
+
+        compressed = []
+        for r, result in enumerate(results):
+            if r not in selected:
+                continue
+            parts = []
+            previous = None
+            for position, sentence in selected[r]:
+                if previous is not None and position != previous + 1:
+                    parts.append("...")
+                parts.append(sentence)
+                previous = position
+            meta = {k: v for k, v in result.get('meta', {}).items() if k not in SPAN_FIELDS}
+            meta['text'] = " ".join(parts)
+            compressed.append({**result, "meta": meta})
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log.debug(
+            f"Compressed context {input_tokens} -> {output_tokens} tokens "
+            f"({len(kept)}/{len(sentences)} sentences) in {elapsed_ms:.1f} ms"
+        )
+        if stats is not None:
+            stats.update({
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "ratio": round(output_tokens / input_tokens, 3) if input_tokens else 1.0,
+                "sentences": len(sentences),
+                "kept_sentences": len(kept),
+                "ms": round(elapsed_ms, 1)
+            })
+        return compressed
@@ -0,0 +1,130 @@
+"""Extractive answers for high-confidence retrievals (no LLM call)."""
+
+import time
+from typing import List, Dict, Any, Optional, Sequence
+import numpy as np
+
+from ..utils import settings, log
+from ..vector_store import top_similarity
+from .compression import split_sentences, cosine_scores
+
+
+class ExtractiveAnswerer:
+    """
+    Answer directly from the retrieved text when retrieval is confident.
+
+    When the top chunk's similarity clears `threshold`, the sentences of the
+    top chunks are embedded in one batch and scored against the query; the
+    best sentence, extended by neighbouring sentences that score almost as
+    well, is returned verbatim with a citation to its source.
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        threshold: Optional[float] = None,
+        sentence_threshold: Optional[float] = None,
+        max_chunks: int = 3,
+        max_sentences: int = 3,
+        neighbour_margin: float = 0.1
+    ):
+        """
+        Initialize extractive answerer.
+
+        Args:
+            embedding_model: EmbeddingModel used for queries
+            threshold: Minimum top chunk similarity to try the fast path
+            sentence_threshold: Minimum similarity of the best sentence
+            max_chunks: Number of top chunks to extract from
+            max_sentences: Maximum sentences in the answer span
+            neighbour_margin: Neighbours join the span when they score within
+                this margin of the best sentence
+        """
+        self.embedding_model = embedding_model
+        self.threshold = settings.fast_path_threshold if threshold is None else threshold
+        self.sentence_threshold = (
+            settings.fast_path_sentence_threshold if sentence_threshold is None else sentence_threshold
+        )
+        self.max_chunks = max_chunks
+        self.max_sentences = max_sentences
+        self.neighbour_margin = neighbour_margin
+
+    def is_eligible(self, results: List[Dict[str, Any]]) -> bool:
+        """Whether retrieval is confident enough to try an extractive answer."""
+        return bool(results) and top_similarity(results) >= self.threshold
+
+    def answer(
+        self,
+        query_embedding: Sequence[float],
+        results: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Extract an answer span from the top results.
+
+        Args:
+            query_embedding: Query embedding
+            results: Search results (ordered by relevance)
+
+        Returns:
+            Dictionary with 'answer' (span plus citation), 'span',
+            'citations', 'score' and 'ms', or None when no sentence is a
+            confident match
+        """
+        start = time.perf_counter()
+        if not self.is_eligible(results):
+            return None
+
+        sentences, owners = [], []
+        per_chunk: List[List[str]] = []
+        for r, result in enumerate(results[:self.max_chunks]):
+            chunk_sentences = split_sentences(result.get('meta', {}).get('text', ''))
+            per_chunk.append(chunk_sentences)
+            for position, sentence in enumerate(chunk_sentences):
+                sentences.append(sentence)
+                owners.append((r, position))
+
+        if not sentences:
+            return None
+
+        embeddings = self.embedding_model.encode(sentences, batch_size=64)
+        scores = cosine_scores(query_embedding, np.asarray(embeddings, dtype=np.float32))
+
+        best = int(np.argmax(scores))
+        best_score = float(scores[best])
+        if best_score < self.sentence_threshold:
+            log.debug(f"Fast path declined: best sentence score {best_score:.3f}")
+            return None
+
+        # Grow the span with adjacent sentences of the same chunk that score nearly as well
+        r, position = owners[best]
+        offset = best - position  # index of the chunk's first sentence in `sentences`
+        lo = hi = position
+        while hi - lo + 1 < self.max_sentences:
+            candidates = []
+            if lo > 0:
+                candidates.append((scores[offset + lo - 1], lo - 1))
+            if hi + 1 < len(per_chunk[r]):
+                candidates.append((scores[offset + hi + 1], hi + 1))
+            if not candidates:
+                break
+            score, neighbour = max(candidates)
+            if score < best_score - self.neighbour_margin:
+                break
+            lo, hi = min(lo, neighbour), max(hi, neighbour)
+
+        span = " ".join(per_chunk[r][lo:hi + 1])
+        meta = results[r].get('meta', {})
+        citation = {
+            "source": meta.get('source', 'Unknown'),
+            "filename": meta.get('filename', ''),
+            "chunk_id": meta.get('chunk_id'),
+            "similarity": results[r].get('similarity', 0)
+        }
+
+        return {
+            "answer": f"{span}\n\n[Source: {citation['filename'] or citation['source']}]",
+            "span": span,
+            "citations": [citation],
+            "score": round(best_score, 4),
+            "ms": round((time.perf_counter() - start) * 1000, 1)
+        }
@@ -1,12 +1,35 @@
 """RAG answer generator combining retrieval and generation."""
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import functools
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 
 from .llm_client import LLMClient
 from .prompt_builder import PromptBuilder
+from .answer_cache import AnswerCache, params_key
+from .compression import ContextCompressor
+from .extractive import ExtractiveAnswerer
+from .router import ModelRouter
 from ..embeddings import EmbeddingModel
-from ..vector_store import VectorRetriever
-from ..utils import log
+from ..vector_store import VectorRetriever, get_index_version, top_similarity
+from ..utils import settings, log, metrics
+
+
+# Finer than the default buckets so stage percentiles are meaningful
+STAGE_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5,
+    0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 20.0, 30.0
+)
+
+# Query path stages, in order ('total' is end to end)
+STAGES = ("cache", "embed", "retrieve", "extract", "compress", "pack", "generate", "total")
 
 
 class RAGGenerator:
@@ -17,7 +40,9 @@ class RAGGenerator:
         embedding_model: EmbeddingModel = None,
         retriever: VectorRetriever = None,
         llm_client: LLMClient = None,
-        prompt_builder: PromptBuilder = None
+        prompt_builder: PromptBuilder = None,
+        answer_cache: AnswerCache = None,
+        router: ModelRouter = None
     ):
         """
         Initialize RAG generator.
@@ -27,12 +52,47 @@ class RAGGenerator:
             retriever: Vector retriever
             llm_client: LLM client
             prompt_builder: Prompt builder
+            answer_cache: Answer cache (created from settings if enabled)
+            router: Fast/large model router (created from settings if enabled)
         """
         self.embedding_model = embedding_model or EmbeddingModel()
         self.retriever = retriever or VectorRetriever()
         self.llm_client = llm_client or LLMClient()
         self.prompt_builder = prompt_builder or PromptBuilder()
         
+        if answer_cache is None and settings.answer_cache_enabled:
+            answer_cache = AnswerCache()
+        self.answer_cache = answer_cache
+        
+        if router is None and settings.llm_routing:
+            router = ModelRouter(large_model=self.llm_client.model)
+        self.router = router
+        
+        self.compressor = ContextCompressor(self.embedding_model)
+        self.extractor = ExtractiveAnswerer(self.embedding_model)
+        
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+        self._ttft_histogram = metrics.histogram(
+            "rag_time_to_first_token_seconds",
+            "Time from request start to the first streamed answer token"
+        )
+        
+        self._fast_path_counter = metrics.counter(
+            "rag_fast_path_total",
+            "Extractive fast-path attempts by outcome (hit, declined, ineligible)"
+        )
+        self._answer_histogram = metrics.histogram(
+            "rag_answer_seconds",
+            "End-to-end latency of generated answers by path (extractive or llm)"
+        )
+        self._stage_histogram = metrics.histogram(
+            "rag_stage_seconds",
+            "Query path latency by stage (embed, retrieve, pack, generate, ...)",
+            buckets=STAGE_BUCKETS
+        )
+        
         log.info("RAG Generator initialized")
     
     def generate_answer(
@@ -41,7 +101,13 @@ class RAGGenerator:
         top_k: int = 5,
         min_similarity: float = 0.0,
         temperature: float = 0.3,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        filters: Optional[Dict[str, Any]] = None,
+        diversity: Optional[str] = None,
+        hybrid: Optional[bool] = None,
+        compress: Optional[bool] = None,
+        fast_path: Optional[bool] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Generate answer for a query using RAG.
@@ -52,63 +118,430 @@ class RAGGenerator:
             min_similarity: Minimum similarity threshold
             temperature: LLM temperature
             max_tokens: Maximum tokens to generate
+            filters: Optional scoping filters on 'filename' and/or 'format'
+            diversity: Retrieval diversification ('none', 'mmr' or 'doc_cap')
+            hybrid: Fuse BM25 lexical results with vector results
+            compress: Keep only query-relevant sentences of the context
+            fast_path: Answer extractively without the LLM when retrieval is
+                confident (False forces an LLM answer, e.g. "expand with LLM")
+            use_cache: Whether to serve and store answers in the answer cache
             
         Returns:
             Dictionary with answer, sources, and metadata
         """
         log.info(f"Generating answer for query: {query[:100]}...")
         
+        early_response, state = self._prepare(
+            query, top_k, min_similarity, temperature, max_tokens,
+            filters, diversity, hybrid, use_cache,
+            compress=compress, fast_path=fast_path
+        )
+        if early_response is not None:
+            return early_response
+        
+        # Step 4: Generate answer
+        try:
+            answer = self._generate(state, temperature, max_tokens)
+        except Exception as e:
+            log.error(f"Error generating answer: {e}")
+            return self._error_response(query, e, state)
+        
+        return self._finish(query, answer, state)
+    
+    async def agenerate_answer(
+        self,
+        query: str,
+        top_k: int = 5,
+        min_similarity: float = 0.0,
+        temperature: float = 0.3,
+        max_tokens: int = 500,
+        filters: Optional[Dict[str, Any]] = None,
+        diversity: Optional[str] = None,
+        hybrid: Optional[bool] = None,
+        compress: Optional[bool] = None,
+        fast_path: Optional[bool] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Generate answer for a query using RAG, as a coroutine.
+        
+        Takes the same arguments as generate_answer. CPU-bound embedding and
+        the blocking Endee and cache calls run in a bounded thread pool
+        (ASYNC_WORKER_THREADS); the LLM call uses the provider's async client,
+        so many questions can be in flight on one event loop.
+        
+        Returns:
+            Dictionary with answer, sources, and metadata
+        """
+        log.info(f"Generating answer (async) for query: {query[:100]}...")
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        
+        early_response, state = await loop.run_in_executor(
+            executor,
+            functools.partial(
+                self._prepare,
+                query, top_k, min_similarity, temperature, max_tokens,
+                filters, diversity, hybrid, use_cache,
+                compress=compress, fast_path=fast_path
+            )
+        )
+        if early_response is not None:
+            return early_response
+        
+        # Step 4: Generate answer
+        try:
+            answer = await self._agenerate(state, temperature, max_tokens)
+        except Exception as e:
+            log.error(f"Error generating answer: {e}")
+            return self._error_response(query, e, state)
+        
+        return await loop.run_in_executor(executor, self._finish, query, answer, state)
+    
+    def _generate(self, state: Dict[str, Any], temperature: float, max_tokens: int) -> str:
+        """Call the routed model, retrying a low-confidence fast answer on the large model."""
+        with self._stage(state, "generate"):
+            answer = self._call_llm(state, temperature, max_tokens)
+            if state["route"] and self.router.should_escalate(state["route"], answer):
+                state["route"] = self.router.escalate(state["route"])
+                answer = self._call_llm(state, temperature, max_tokens)
+        return answer
+    
+    def _call_llm(self, state: Dict[str, Any], temperature: float, max_tokens: int) -> str:
+        """Call the routed model (or the client's default) and record tier latency."""
+        start = time.perf_counter()
+        answer = self.llm_client.generate(
+            prompt=state["prompt"],
+            system_prompt=state["system_prompt"],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            model=state["route"]["model"] if state["route"] else None
+        )
+        if state["route"]:
+            self.router.observe(state["route"]["tier"], time.perf_counter() - start)
+        return answer
+    
+    async def _agenerate(self, state: Dict[str, Any], temperature: float, max_tokens: int) -> str:
+        """Async counterpart of _generate."""
+        with self._stage(state, "generate"):
+            answer = await self._acall_llm(state, temperature, max_tokens)
+            if state["route"] and self.router.should_escalate(state["route"], answer):
+                state["route"] = self.router.escalate(state["route"])
+                answer = await self._acall_llm(state, temperature, max_tokens)
+        return answer
+    
+    async def _acall_llm(self, state: Dict[str, Any], temperature: float, max_tokens: int) -> str:
+        """Async counterpart of _call_llm."""
+        start = time.perf_counter()
+        answer = await self.llm_client.agenerate(
+            prompt=state["prompt"],
+            system_prompt=state["system_prompt"],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            model=state["route"]["model"] if state["route"] else None
+        )
+        if state["route"]:
+            self.router.observe(state["route"]["tier"], time.perf_counter() - start)
+        return answer
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for blocking work on the async path."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.async_worker_threads,
+                    thread_name_prefix="rag-async"
+                )
+            return self._executor
+    
+    def generate_answer_stream(
+        self,
+        query: str,
+        top_k: int = 5,
+        min_similarity: float = 0.0,
+        temperature: float = 0.3,
+        max_tokens: int = 500,
+        filters: Optional[Dict[str, Any]] = None,
+        diversity: Optional[str] = None,
+        hybrid: Optional[bool] = None,
+        compress: Optional[bool] = None,
+        fast_path: Optional[bool] = None,
+        use_cache: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate an answer, streaming sources first and then answer tokens.
+        
+        Takes the same arguments as generate_answer. Yields events:
+        
+        - {"type": "sources", "sources": [...], "num_sources", "top_similarity"}
+        - {"type": "token", "text": "..."} for each piece of the answer
+        - {"type": "reset"} when a low-confidence fast-model answer is
+          discarded and the large model's answer follows as new tokens
+        - {"type": "done", "result": {...}} with the full response, including
+          'time_to_first_token_ms' (the 'generate' timing includes time the
+          consumer spends between tokens)
+        
+        Yields:
+            Event dictionaries
+        """
+        start = time.perf_counter()
+        log.info(f"Streaming answer for query: {query[:100]}...")
+        
+        early_response, state = self._prepare(
+            query, top_k, min_similarity, temperature, max_tokens,
+            filters, diversity, hybrid, use_cache,
+            compress=compress, fast_path=fast_path
+        )
+        if early_response is not None:
+            yield {
+                "type": "sources",
+                "sources": early_response.get("sources", []),
+                "num_sources": early_response.get("num_sources", 0),
+                "top_similarity": early_response.get("top_similarity", 0)
+            }
+            yield {"type": "token", "text": early_response["answer"]}
+            early_response["time_to_first_token_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            yield {"type": "done", "result": early_response}
+            return
+        
+        sources = self._format_sources(state["results"])
+        yield {
+            "type": "sources",
+            "sources": sources,
+            "num_sources": len(sources),
+            "top_similarity": top_similarity(state["results"])
+        }
+        
+        # Step 4: Stream answer tokens
+        parts = []
+        ttft = None
+        generate_start = time.perf_counter()
+        try:
+            while True:
+                call_start = time.perf_counter()
+                for token in self.llm_client.generate_stream(
+                    prompt=state["prompt"],
+                    system_prompt=state["system_prompt"],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    model=state["route"]["model"] if state["route"] else None
+                ):
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                        self._ttft_histogram.observe(ttft)
+                    parts.append(token)
+                    yield {"type": "token", "text": token}
+                
+                route = state["route"]
+                if not route:
+                    break
+                self.router.observe(route["tier"], time.perf_counter() - call_start)
+                if not self.router.should_escalate(route, "".join(parts)):
+                    break
+                state["route"] = self.router.escalate(route)
+                parts = []
+                yield {"type": "reset"}
+        except Exception as e:
+            # A partial answer is never cached or returned as if complete
+            log.error(f"Error generating answer: {e}")
+            yield {"type": "done", "result": self._error_response(query, e, state)}
+            return
+        self._record_stage(state, "generate", time.perf_counter() - generate_start)
+        
+        response = self._finish(query, "".join(parts), state)
+        response["time_to_first_token_ms"] = round(ttft * 1000, 1) if ttft is not None else None
+        yield {"type": "done", "result": response}
+    
+    @staticmethod
+    def _new_state(filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Per-request state, starting the request's clock."""
+        return {
+            "filters": filters,
+            "cache_params": None,
+            "index_version": None,
+            "start": time.perf_counter(),
+            "extractive": None,
+            "route": None,
+            "request_id": uuid.uuid4().hex[:12],
+            "timings": {},
+            "results": []
+        }
+    
+    def _prepare(
+        self,
+        query: str,
+        top_k: int,
+        min_similarity: float,
+        temperature: float,
+        max_tokens: int,
+        filters: Optional[Dict[str, Any]],
+        diversity: Optional[str],
+        hybrid: Optional[bool],
+        use_cache: bool,
+        query_embedding: Optional[List[float]] = None,
+        compress: Optional[bool] = None,
+        fast_path: Optional[bool] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Run cache lookups, query embedding, retrieval, the extractive fast
+        path, optional context compression and prompt building.
+        
+        A precomputed query_embedding (e.g. from a batched forward pass)
+        skips the embedding step. Each stage is timed into state["timings"].
+        
+        Returns:
+            Tuple of (early response for cache hits and errors, or None;
+            state needed to generate and finish the answer)
+        """
+        state = self._new_state(filters)
+        compress = settings.context_compression if compress is None else compress
+        fast_path = settings.fast_path if fast_path is None else fast_path
+        
+        # Step 0: Exact-match answer cache
+        if use_cache and self.answer_cache:
+            state["index_version"] = get_index_version(self.retriever.index_name)
+            state["cache_params"] = params_key(
+                top_k=top_k,
+                min_similarity=min_similarity,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                filters=filters,
+                diversity=diversity,
+                hybrid=hybrid,
+                compress=compress,
+                fast_path=fast_path,
+                model=self.llm_client.model,
+                routed_models=self.router.models if self.router else None,
+                system_prompt=self.prompt_builder.get_system_prompt(),
+                context_packing=self.prompt_builder.packing,
+                context_token_budget=self.prompt_builder.context_token_budget
+            )
+            with self._stage(state, "cache"):
+                cached = self.answer_cache.get_exact(query, state["cache_params"], state["index_version"])
+            if cached:
+                return self._annotate(self._from_cache(query, cached, "exact"), state), state
+        
         # Step 1: Embed query
         try:
-            query_embedding = self.embedding_model.encode_single(query)
+            if query_embedding is None:
+                with self._stage(state, "embed"):
+                    query_embedding = self.embedding_model.encode_single(query)
         except Exception as e:
             log.error(f"Error embedding query: {e}")
-            return {
+            return self._annotate({
                 "query": query,
                 "answer": f"Error processing query: {str(e)}",
                 "sources": [],
                 "error": str(e)
-            }
+            }, state), state
+        state["query_embedding"] = query_embedding
+        
+        # Step 1b: Semantic answer cache (paraphrased questions)
+        if state["cache_params"]:
+            with self._stage(state, "cache"):
+                cached = self.answer_cache.get_semantic(
+                    query_embedding, state["cache_params"], state["index_version"]
+                )
+            if cached:
+                return self._annotate(self._from_cache(query, cached, "semantic"), state), state
         
         # Step 2: Retrieve context
+        retrieval_stats = {}
         try:
-            results = self.retriever.get_context(
-                query_vector=query_embedding,
-                top_k=top_k,
-                min_similarity=min_similarity
-            )
+            with self._stage(state, "retrieve"):
+                results = self.retriever.get_context(
+                    query_vector=query_embedding,
+                    top_k=top_k,
+                    min_similarity=min_similarity,
+                    filters=filters,
+                    diversity=diversity,
+                    query_text=query,
+                    hybrid=hybrid,
+                    stats=retrieval_stats
+                )
         except Exception as e:
             log.error(f"Error retrieving context: {e}")
-            return {
+            return self._annotate({
                 "query": query,
                 "answer": f"Error retrieving context: {str(e)}",
                 "sources": [],
                 "error": str(e)
-            }
+            }, state), state
+        state["results"] = results
+        state["retrieval_stats"] = retrieval_stats
+        
+        state["compression_stats"] = None
+        state["prompt_stats"] = {}
+        
+        # Step 2b: Extractive fast path for confident retrievals (skips the LLM)
+        if fast_path and self.extractor.is_eligible(results):
+            try:
+                with self._stage(state, "extract"):
+                    state["extractive"] = self.extractor.answer(query_embedding, results)
+            except Exception as e:
+                log.warning(f"Extractive fast path failed, using the LLM: {e}")
+            outcome = "hit" if state["extractive"] else "declined"
+            self._fast_path_counter.inc(labels={"outcome": outcome})
+            if state["extractive"]:
+                log.info(f"Answered extractively (score {state['extractive']['score']:.3f})")
+                return self._finish(query, state["extractive"]["answer"], state), state
+        elif fast_path:
+            self._fast_path_counter.inc(labels={"outcome": "ineligible"})
+        
+        # Step 2c: Keep only the sentences relevant to the query (sources keep full chunks)
+        context_results = results
+        if compress and results:
+            state["compression_stats"] = {}
+            try:
+                with self._stage(state, "compress"):
+                    context_results = self.compressor.compress(
+                        query_embedding, results, stats=state["compression_stats"]
+                    )
+            except Exception as e:
+                log.warning(f"Context compression failed, using full chunks: {e}")
+                state["compression_stats"] = None
         
         # Step 3: Build prompt
-        prompt = self.prompt_builder.build_prompt_with_results(query, results)
-        system_prompt = self.prompt_builder.get_system_prompt()
+        with self._stage(state, "pack"):
+            state["prompt"] = self.prompt_builder.build_prompt_with_results(
+                query, context_results, stats=state["prompt_stats"]
+            )
+        state["system_prompt"] = self.prompt_builder.get_system_prompt()
         
-        # Step 4: Generate answer
-        try:
-            answer = self.llm_client.generate(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                temperature=temperature,
-                max_tokens=max_tokens
+        # Step 3b: Pick the model tier for this question
+        if self.router:
+            state["route"] = self.router.route(
+                query, results, state["prompt_stats"].get("prompt_tokens", 0)
             )
-        except Exception as e:
-            log.error(f"Error generating answer: {e}")
-            return {
-                "query": query,
-                "answer": f"Error generating answer: {str(e)}",
-                "sources": results,
-                "error": str(e)
-            }
         
-        # Step 5: Format response
-        sources = [
+        return None, state
+    
+    @contextmanager
+    def _stage(self, state: Dict[str, Any], stage: str):
+        """Time a block of the query path as `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record_stage(state, stage, time.perf_counter() - start)
+    
+    def _record_stage(self, state: Dict[str, Any], stage: str, seconds: float):
+        """Add a stage duration to the request timings and the stage histogram."""
+        timings = state["timings"]
+        timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 2)
+        self._stage_histogram.observe(seconds, {"stage": stage})
+    
+    def _annotate(self, response: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach the request id and per-stage timings (ms), closing the 'total' stage."""
+        self._record_stage(state, "total", time.perf_counter() - state["start"])
+        response["request_id"] = state["request_id"]
+        response["timings"] = dict(state["timings"])
+        return response
+    
+    @staticmethod
+    def _format_sources(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format retrieval results as response sources."""
+        return [
             {
                 "text": r.get('meta', {}).get('text', '')[:200] + "...",
                 "source": r.get('meta', {}).get('source', 'Unknown'),
@@ -117,16 +550,143 @@ class RAGGenerator:
             }
             for r in results
         ]
+    
+    def _finish(self, query: str, answer: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the response for a generated answer and store it in the cache."""
+        # Step 5: Format response
+        sources = self._format_sources(state["results"])
+        retrieval_stats = state["retrieval_stats"]
         
-        log.info("Answer generated successfully")
-        
-        return {
+        response = {
             "query": query,
             "answer": answer,
             "sources": sources,
             "num_sources": len(sources),
-            "top_similarity": sources[0]['similarity'] if sources else 0
+            "top_similarity": top_similarity(state["results"])
         }
+        
+        if state["filters"]:
+            # How each scoping filter was applied: 'pushdown' or 'post_filter'
+            response["filters"] = retrieval_stats.get("filters", {})
+        
+        for key in ("diversity", "hybrid"):
+            if key in retrieval_stats:
+                response[key] = retrieval_stats[key]
+        
+        if "cache" in retrieval_stats:
+            response["retrieval_cache"] = retrieval_stats["cache"]
+        
+        if state["extractive"]:
+            response["fast_path"] = True
+            response["citations"] = state["extractive"]["citations"]
+            response["fast_path_score"] = state["extractive"]["score"]
+        
+        if state["compression_stats"]:
+            response["compression"] = state["compression_stats"]
+        
+        if state["route"]:
+            response["model"] = state["route"]["model"]
+            response["route"] = {
+                k: state["route"][k] for k in ("tier", "reason", "escalated")
+            }
+        
+        # Prompt size after packing ('context' also holds the unpacked token count)
+        response["prompt_tokens"] = state["prompt_stats"].get("prompt_tokens", 0)
+        response["context"] = {
+            k: v for k, v in state["prompt_stats"].items() if k != "prompt_tokens"
+        }
+        
+        self._answer_histogram.observe(
+            time.perf_counter() - state["start"],
+            {"path": "extractive" if state["extractive"] else "llm"}
+        )
+        self._annotate(response, state)
+        log.info(
+            f"Answer generated [{state['request_id']}] in {response['timings']['total']:.0f} ms: "
+            + ", ".join(f"{k} {v:.0f}" for k, v in response['timings'].items() if k != "total")
+        )
+        
+        if state["cache_params"]:
+            self.answer_cache.put(
+                query, state["cache_params"], state["index_version"],
+                response, state["query_embedding"]
+            )
+        
+        return response
+    
+    def fast_path_stats(self) -> Dict[str, Any]:
+        """
+        Get extractive fast-path usage and mean latency per answer path.
+        
+        Returns:
+            Dictionary with attempt counts by outcome, the hit rate among
+            questions asked with the fast path on, and mean answer latency
+            (ms) for the 'extractive' and 'llm' paths
+        """
+        counts = {
+            outcome: int(self._fast_path_counter.value({"outcome": outcome}))
+            for outcome in ("hit", "declined", "ineligible")
+        }
+        attempts = sum(counts.values())
+        
+        mean_ms = {}
+        for key, series in self._answer_histogram.snapshot().items():
+            path = dict(key).get("path")
+            if series["count"]:
+                mean_ms[path] = round(series["sum"] / series["count"] * 1000, 1)
+        
+        return {
+            **counts,
+            "rate": counts["hit"] / attempts if attempts else 0.0,
+            "mean_ms": mean_ms
+        }
+    
+    def stage_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get latency percentiles per query path stage.
+        
+        Returns:
+            Mapping of stage to {'count', 'p50', 'p95', 'p99'} (ms, estimated
+            from the rag_stage_seconds histogram buckets) for stages that ran
+        """
+        counts = {
+            dict(key).get("stage"): series["count"]
+            for key, series in self._stage_histogram.snapshot().items()
+        }
+        stats = {}
+        for stage in STAGES:
+            labels = {"stage": stage}
+            p50 = self._stage_histogram.percentile(50, labels)
+            if p50 is None:
+                continue
+            stats[stage] = {
+                "count": counts.get(stage, 0),
+                "p50": round(p50 * 1000, 1),
+                "p95": round(self._stage_histogram.percentile(95, labels) * 1000, 1),
+                "p99": round(self._stage_histogram.percentile(99, labels) * 1000, 1)
+            }
+        return stats
+    
+    def _error_response(self, query: str, error: Exception, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a response for a failed LLM call (never cached)."""
+        sources = self._format_sources(state["results"])
+        return self._annotate({
+            "query": query,
+            "answer": f"Error generating answer: {str(error)}",
+            "sources": sources,
+            "num_sources": len(sources),
+            "top_similarity": top_similarity(state["results"]),
+            "error": str(error)
+        }, state)
+    
+    def _from_cache(self, query: str, cached: Dict[str, Any], tier: str) -> Dict[str, Any]:
+        """Build a response from a cached answer."""
+        log.info(f"Answer served from {tier} cache")
+        response = dict(cached)
+        response["cached_query"] = cached.get("query", query)
+        response["query"] = query
+        response["cache"] = tier
+        return response
     
     def batch_generate(
         self,
@@ -138,14 +698,157 @@ class RAGGenerator:
         
         Args:
             queries: List of questions
-            **kwargs: Arguments for generate_answer
+            **kwargs: Arguments for iter_batch_generate and generate_answer
             
         Returns:
             List of answer dictionaries
         """
-        results = []
-        for query in queries:
-            result = self.generate_answer(query, **kwargs)
-            results.append(result)
+        return list(self.iter_batch_generate(queries, **kwargs))
+    
+    def iter_batch_generate(
+        self,
+        queries: List[str],
+        llm_concurrency: Optional[int] = None,
+        retrieval_concurrency: Optional[int] = None,
+        checkpoint_path: Optional[Path] = None,
+        embed_batch_size: int = 64,
+        top_k: int = 5,
+        min_similarity: float = 0.0,
+        temperature: float = 0.3,
+        max_tokens: int = 500,
+        filters: Optional[Dict[str, Any]] = None,
+        diversity: Optional[str] = None,
+        hybrid: Optional[bool] = None,
+        compress: Optional[bool] = None,
+        fast_path: Optional[bool] = None,
+        use_cache: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate answers for many queries concurrently, yielding in order.
+        
+        All queries are embedded in one batched forward pass; retrieval and
+        LLM calls then run under separate concurrency limits. Results are
+        yielded in input order as soon as each is ready. With a checkpoint
+        file, every result is appended as JSON lines and a rerun resumes
+        after the last completed query (results recorded for other
+        questions, e.g. after the list was edited, and failed answers are
+        answered again, along with every question after them).
+        
+        Args:
+            queries: List of questions
+            llm_concurrency: Maximum concurrent LLM calls
+            retrieval_concurrency: Maximum concurrent retrievals
+            checkpoint_path: Optional JSONL file recording completed results
+            embed_batch_size: Batch size for query embedding
+            top_k: Number of context chunks to retrieve
+            min_similarity: Minimum similarity threshold
+            temperature: LLM temperature
+            max_tokens: Maximum tokens to generate
+            filters: Optional scoping filters on 'filename' and/or 'format'
+            diversity: Retrieval diversification ('none', 'mmr' or 'doc_cap')
+            hybrid: Fuse BM25 lexical results with vector results
+            compress: Keep only query-relevant sentences of the context
+            fast_path: Answer extractively without the LLM when retrieval is
+                confident (False forces an LLM answer, e.g. "expand with LLM")
+            use_cache: Whether to serve and store answers in the answer cache
+            
+        Yields:
+            Answer dictionaries in the order of `queries`
+        """
+        llm_concurrency = llm_concurrency or settings.batch_llm_concurrency
+        retrieval_concurrency = retrieval_concurrency or settings.batch_retrieval_concurrency
+        
+        # Resume: replay results already recorded in the checkpoint, up to
+        # the first one that is unreadable, for a different question, or an
+        # error (errors may be transient, so those questions are retried)
+        completed = []
+        if checkpoint_path:
+            checkpoint_path = Path(checkpoint_path)
+            if checkpoint_path.exists():
+                valid_bytes = 0
+                with open(checkpoint_path, "rb") as f:
+                    for line in f:
+                        if len(completed) == len(queries) or not line.endswith(b"\n"):
+                            break  # all done, or a partial last line from an interrupted run
+                        try:
+                            result = json.loads(line)
+                        except ValueError:
+                            break
+                        if result.get("query") != queries[len(completed)]:
+                            log.warning(
+                                f"Checkpoint result {len(completed) + 1} is for a different question; "
+                                f"answering again from there"
+                            )
+                            break
+                        if "error" in result:
+                            break
+                        completed.append(result)
+                        valid_bytes += len(line)
+                
+                # New results are appended after the last usable line
+                if len(completed) < len(queries) and checkpoint_path.stat().st_size > valid_bytes:
+                    with open(checkpoint_path, "r+b") as f:
+                        f.truncate(valid_bytes)
+                log.info(f"Resuming batch from checkpoint: {len(completed)}/{len(queries)} done")
+        
+        for result in completed:
+            yield result
+        
+        pending = queries[len(completed):]
+        if not pending:
+            return
+        
+        # Step 1: Embed all remaining queries in one batched forward pass
+        start = time.perf_counter()
+        try:
+            embeddings = self.embedding_model.encode(pending, batch_size=embed_batch_size).tolist()
+        except Exception as e:
+            log.error(f"Error embedding batch, falling back to per-query embedding: {e}")
+            embeddings = [None] * len(pending)
+        log.info(f"Embedded {len(pending)} queries in {time.perf_counter() - start:.2f}s")
+        
+        retrieval_slots = threading.BoundedSemaphore(retrieval_concurrency)
+        llm_slots = threading.BoundedSemaphore(llm_concurrency)
         
-        return results
+        def answer_one(query: str, embedding: Optional[List[float]]) -> Dict[str, Any]:
+            state = self._new_state(filters)
+            try:
+                with retrieval_slots:
+                    early_response, state = self._prepare(
+                        query, top_k, min_similarity, temperature, max_tokens,
+                        filters, diversity, hybrid, use_cache,
+                        query_embedding=embedding, compress=compress, fast_path=fast_path
+                    )
+                if early_response is not None:
+                    return early_response
+                
+                with llm_slots:
+                    answer = self._generate(state, temperature, max_tokens)
+                return self._finish(query, answer, state)
+            except Exception as e:
+                log.error(f"Error answering batch query: {e}")
+                return self._error_response(query, e, state)
+        
+        checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+        executor = ThreadPoolExecutor(
+            max_workers=retrieval_concurrency + llm_concurrency,
+            thread_name_prefix="rag-batch"
+        )
+        try:
+            futures = [
+                executor.submit(answer_one, query, embedding)
+                for query, embedding in zip(pending, embeddings)
+            ]
+            for i, future in enumerate(futures, len(completed) + 1):
+                result = future.result()
+                if checkpoint:
+                    checkpoint.write(json.dumps(result, default=str) + "\n")
+                    checkpoint.flush()
+                if i % 50 == 0 or i == len(queries):
+                    log.info(f"Batch progress: {i}/{len(queries)}")
+                yield result
+        finally:
+            # Stop queued work if the consumer stops early
+            executor.shutdown(wait=False, cancel_futures=True)
+            if checkpoint:
+                checkpoint.close()
@@ -1,16 +1,31 @@
 """LLM client wrapper for answer generation (OpenAI and Groq)."""
 
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, Any
 import openai
-from groq import Groq
+from groq import Groq, AsyncGroq
 
 from ..utils import settings, log
+from .resilience import LLMError, ResilientCaller, classify_error, estimate_tokens
 
 
 class LLMClient:
-    """Wrapper for LLM API (OpenAI or Groq)."""
+    """
+    Wrapper for LLM API (OpenAI or Groq).
     
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None, provider: Optional[str] = None):
+    Calls are paced by a client-side rate limiter, retried with jittered
+    backoff on rate limits and transient errors, and optionally hedged (see
+    ResilientCaller). The SDKs' own retries are disabled so that policy is
+    applied once. Failures raise LLMError.
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+        base_url: Optional[str] = None,
+        resilience: Optional[ResilientCaller] = None
+    ):
         """
         Initialize LLM client.
         
@@ -18,6 +33,8 @@ class LLMClient:
             api_key: API key for LLM provider
             model: Model name
             provider: Provider name ('openai' or 'groq')
+            base_url: Provider endpoint override (e.g. a local fake provider)
+            resilience: Rate limiting / retry / hedging policy
         """
         self.provider = provider or settings.llm_provider
         self.model = model or settings.llm_model
@@ -28,24 +45,64 @@ class LLMClient:
         else:
             self.api_key = api_key or settings.openai_api_key
         
+        self.base_url = base_url or settings.llm_base_url
+        self.resilience = resilience or ResilientCaller(self.provider)
+        
         if not self.api_key:
             log.warning(f"No API key provided for {self.provider}. LLM generation will not work.")
             self.client = None
         else:
             if self.provider == "groq":
-                self.client = Groq(api_key=self.api_key)
+                self.client = Groq(**self._client_kwargs())
                 log.info(f"Groq client initialized with model: {self.model}")
             else:
-                openai.api_key = self.api_key
-                self.client = openai
+                self.client = openai.OpenAI(**self._client_kwargs())
                 log.info(f"OpenAI client initialized with model: {self.model}")
+        
+        # Async client is created on first use by agenerate()
+        self._async_client = None
+    
+    def _client_kwargs(self) -> Dict[str, Any]:
+        """Constructor arguments shared by the sync and async SDK clients."""
+        return {
+            "api_key": self.api_key,
+            "base_url": self.base_url,
+            "timeout": settings.llm_timeout,
+            "max_retries": 0  # retries are handled by self.resilience
+        }
+    
+    @property
+    def async_client(self):
+        """Async provider client (AsyncGroq or AsyncOpenAI), created lazily."""
+        if self._async_client is None and self.api_key:
+            if self.provider == "groq":
+                self._async_client = AsyncGroq(**self._client_kwargs())
+            else:
+                self._async_client = openai.AsyncOpenAI(**self._client_kwargs())
+        return self._async_client
+    
+    def _not_initialized(self) -> LLMError:
+        return LLMError(
+            f"LLM client not initialized. Please provide a {self.provider.upper()} API key."
+        )
+    
+    @staticmethod
+    def _messages(prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
+        messages.append({"role": "user", "content": prompt})
+        return messages
     
     def generate(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: float = 0.3,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        model: Optional[str] = None
     ) -> str:
         """
         Generate text using LLM.
@@ -55,52 +112,136 @@ class LLMClient:
             system_prompt: System prompt
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            model: Model override for this call (defaults to self.model)
             
         Returns:
             Generated text
+            
+        Raises:
+            LLMError: If the provider call fails after retries
         """
-        if not self.client:
-            return f"Error: LLM client not initialized. Please provide a {self.provider.upper()} API key."
+        return self.chat(
+            self._messages(prompt, system_prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            model=model
+        )
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 500,
+        model: Optional[str] = None
+    ) -> str:
+        """
+        Generate text using LLM without blocking the event loop.
         
-        try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            model: Model override for this call (defaults to self.model)
             
-            messages.append({"role": "user", "content": prompt})
+        Returns:
+            Generated text
             
-            if self.provider == "groq":
-                # Groq API
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-            else:
-                # OpenAI API
-                response = self.client.chat.completions.create(
-                    model=self.model,
+        Raises:
+            LLMError: If the provider call fails after retries
+        """
+        client = self.async_client
+        if not client:
+            raise self._not_initialized()
+        
+        messages = self._messages(prompt, system_prompt)
+        
+        try:
+            response = await self.resilience.acall(
+                lambda: client.chat.completions.create(
+                    model=model or self.model,
                     messages=messages,
                     temperature=temperature,
                     max_tokens=max_tokens
-                )
-            
-            answer = response.choices[0].message.content
-            log.debug(f"Generated {len(answer)} characters using {self.provider}")
+                ),
+                tokens=estimate_tokens(messages, max_tokens)
+            )
+        except LLMError as e:
+            log.error(f"Error generating response with {self.provider}: {e}")
+            raise
+        
+        answer = response.choices[0].message.content
+        log.debug(f"Generated {len(answer)} characters using {self.provider} (async)")
+        
+        return answer
+    
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 500,
+        model: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Generate text using LLM, yielding pieces as they are produced.
+        
+        Opening the stream is rate limited and retried like generate();
+        once text has been yielded a failure can no longer be retried.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            model: Model override for this call (defaults to self.model)
             
-            return answer
+        Yields:
+            Generated text pieces
             
+        Raises:
+            LLMError: If the provider call fails
+        """
+        if not self.client:
+            raise self._not_initialized()
+        
+        messages = self._messages(prompt, system_prompt)
+        
+        # Groq and OpenAI share the streaming chat completions API
+        stream = self.resilience.call(
+            lambda: self.client.chat.completions.create(
+                model=model or self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            ),
+            tokens=estimate_tokens(messages, max_tokens),
+            hedge=False
+        )
+        
+        num_chars = 0
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    num_chars += len(delta)
+                    yield delta
         except Exception as e:
-            log.error(f"Error generating response with {self.provider}: {e}")
-            return f"Error generating response: {str(e)}"
+            log.error(f"Error streaming response with {self.provider}: {e}")
+            raise classify_error(e) from e
+        
+        log.debug(f"Streamed {num_chars} characters using {self.provider}")
     
     def chat(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.3,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        model: Optional[str] = None
     ) -> str:
         """
         Chat with LLM using message history.
@@ -109,31 +250,32 @@ class LLMClient:
             messages: List of message dictionaries
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            model: Model override for this call (defaults to self.model)
             
         Returns:
             Generated response
+            
+        Raises:
+            LLMError: If the provider call fails after retries
         """
         if not self.client:
-            return f"Error: LLM client not initialized. Please provide a {self.provider.upper()} API key."
+            raise self._not_initialized()
         
         try:
-            if self.provider == "groq":
-                response = self.client.chat.completions.create(
-                    model=self.model,
+            response = self.resilience.call(
+                lambda: self.client.chat.completions.create(
+                    model=model or self.model,
                     messages=messages,
                     temperature=temperature,
                     max_tokens=max_tokens
-                )
-            else:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            log.error(f"Error in chat with {self.provider}: {e}")
-            return f"Error: {str(e)}"
+                ),
+                tokens=estimate_tokens(messages, max_tokens)
+            )
+        except LLMError as e:
+            log.error(f"Error generating response with {self.provider}: {e}")
+            raise
+        
+        answer = response.choices[0].message.content
+        log.debug(f"Generated {len(answer)} characters using {self.provider} ({model or self.model})")
+        
+        return answer
@@ -1,14 +1,46 @@
 """Prompt builder for RAG system."""
 
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..utils import settings
+from ..utils.tokens import DEFAULT_ENCODING, get_encoding, count_tokens
+
+
+# Sections that would be cut below this many tokens are dropped instead
+MIN_SECTION_TOKENS = 64
 
 
 class PromptBuilder:
-    """Build prompts for RAG question answering."""
+    """
+    Build prompts for RAG question answering.
     
-    def __init__(self):
-        """Initialize prompt builder."""
+    Retrieved chunks are packed before they go into the prompt: adjacent
+    chunks of the same document are merged with their token overlap
+    removed, and sections are added by relevance until the context token
+    budget is spent.
+    """
+    
+    def __init__(
+        self,
+        context_token_budget: Optional[int] = None,
+        packing: Optional[bool] = None,
+        encoding_name: str = DEFAULT_ENCODING
+    ):
+        """
+        Initialize prompt builder.
+        
+        Args:
+            context_token_budget: Maximum tokens of retrieved text per prompt (0 = no limit)
+            packing: Merge overlapping chunks and enforce the budget
+            encoding_name: Tokenizer encoding used for counting
+        """
         self.system_prompt = self._get_default_system_prompt()
+        self.context_token_budget = (
+            settings.context_token_budget if context_token_budget is None else context_token_budget
+        )
+        self.packing = settings.context_packing if packing is None else packing
+        self.encoding_name = encoding_name
     
     def _get_default_system_prompt(self) -> str:
         """Get default system prompt for RAG."""
@@ -52,10 +84,157 @@ Remember: Accuracy is more important than completeness. It's better to say you d
         
         return "\n".join(prompt_parts)
     
+    @staticmethod
+    def _span(meta: Dict[str, Any]) -> Optional[Tuple[str, int, int]]:
+        """Position of a chunk in its document: ('token'|'char', start, end), or None."""
+        for unit in ("token", "char"):
+            start, end = meta.get(f"start_{unit}"), meta.get(f"end_{unit}")
+            if isinstance(start, int) and isinstance(end, int):
+                return unit, start, end
+        return None
+    
+    def _overlap_length(self, current: Dict[str, Any], chunk: Dict[str, Any], overlap: int) -> Optional[int]:
+        """Characters at the start of `chunk` already present in `current`, or None if unsure."""
+        if chunk["unit"] == "char":
+            overlap_text = chunk["text"][:overlap]
+        else:
+            encoding = get_encoding(self.encoding_name)
+            if encoding is None:
+                return None
+            overlap_text = encoding.decode(
+                encoding.encode(chunk["text"], disallowed_special=())[:overlap]
+            )
+        # Only trust the span when the overlapping text really matches
+        if current["text"].endswith(overlap_text):
+            return len(overlap_text)
+        return None
+    
+    def _merge_adjacent(self, results: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Merge overlapping or touching chunks of the same document.
+        
+        Chunks carry their span in the source document ('start_token'/
+        'end_token', or character offsets when chunked without tiktoken);
+        the part of a chunk already covered by its predecessor is dropped.
+        
+        Returns:
+            Tuple of (sections, number of chunks merged into another)
+        """
+        sections = []
+        by_document: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        
+        for result in results:
+            meta = result.get('meta', {})
+            span = self._span(meta)
+            section = {
+                "source": meta.get('source', 'Unknown'),
+                "text": meta.get('text', ''),
+                "similarity": result.get('similarity', 0),
+                "num_chunks": 1
+            }
+            if span is None:
+                sections.append(section)  # no span recorded (older index)
+                continue
+            section["unit"], section["start"], section["end"] = span
+            by_document.setdefault((section["source"], section["unit"]), []).append(section)
+        
+        merged_chunks = 0
+        for chunks in by_document.values():
+            chunks.sort(key=lambda c: c["start"])
+            current = chunks[0]
+            
+            for chunk in chunks[1:]:
+                overlap = current["end"] - chunk["start"]
+                skip = None
+                if chunk["end"] <= current["end"]:
+                    skip = len(chunk["text"])  # fully covered already
+                elif overlap >= 0:
+                    skip = self._overlap_length(current, chunk, overlap)
+                
+                if skip is None:
+                    # Gap between the chunks (or unverifiable overlap): keep separate
+                    sections.append(current)
+                    current = chunk
+                    continue
+                
+                current["text"] += chunk["text"][skip:]
+                current["end"] = max(current["end"], chunk["end"])
+                current["similarity"] = max(current["similarity"], chunk["similarity"])
+                current["num_chunks"] += chunk["num_chunks"]
+                merged_chunks += 1
+            
+            sections.append(current)
+        
+        return sections, merged_chunks
+    
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens tokens."""
+        encoding = get_encoding(self.encoding_name)
+        if encoding is None:
+            return text[:max_tokens * 4] + " ..."
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]) + " ..."
+    
+    def pack_results(
+        self,
+        results: List[Dict[str, Any]],
+        token_budget: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Pack search results into prompt sections within a token budget.
+        
+        Args:
+            results: Search results from vector store
+            token_budget: Maximum tokens of section text (0 = no limit)
+            
+        Returns:
+            Tuple of (sections with source, text, similarity and tokens,
+            ordered by relevance; packing statistics)
+        """
+        start = time.perf_counter()
+        budget = self.context_token_budget if token_budget is None else token_budget
+        
+        raw_tokens = sum(
+            count_tokens(r.get('meta', {}).get('text', ''), self.encoding_name) for r in results
+        )
+        sections, merged_chunks = self._merge_adjacent(results)
+        sections.sort(key=lambda section: section["similarity"], reverse=True)
+        
+        packed = []
+        used = 0
+        dropped_chunks = 0
+        truncated = 0
+        for section in sections:
+            tokens = count_tokens(section["text"], self.encoding_name)
+            if budget and used + tokens > budget:
+                remaining = budget - used
+                if remaining < MIN_SECTION_TOKENS:
+                    dropped_chunks += section["num_chunks"]
+                    continue
+                section["text"] = self._truncate(section["text"], remaining)
+                tokens = remaining
+                truncated += 1
+            section["tokens"] = tokens
+            packed.append(section)
+            used += tokens
+        
+        stats = {
+            "raw_context_tokens": raw_tokens,
+            "context_tokens": used,
+            "chunks": len(results),
+            "sections": len(packed),
+            "merged_chunks": merged_chunks,
+            "dropped_chunks": dropped_chunks,
+            "truncated_sections": truncated,
+            "token_budget": budget,
+            "pack_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+        return packed, stats
+    
     def build_prompt_with_results(
         self,
         query: str,
-        results: List[Dict[str, Any]]
+        results: List[Dict[str, Any]],
+        stats: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Build prompt from search results.
@@ -63,27 +242,50 @@ Remember: Accuracy is more important than completeness. It's better to say you d
         Args:
             query: User question
             results: Search results from vector store
+            stats: Optional dict filled with packing statistics and the
+                prompt's token count ('prompt_tokens')
             
         Returns:
             Formatted prompt
         """
         if not results:
             context = "No relevant documentation found."
+            pack_stats = {"raw_context_tokens": 0, "context_tokens": 0, "chunks": 0, "sections": 0}
         else:
+            if self.packing:
+                sections, pack_stats = self.pack_results(results)
+            else:
+                sections = [
+                    {
+                        "source": r.get('meta', {}).get('source', 'Unknown'),
+                        "text": r.get('meta', {}).get('text', ''),
+                        "similarity": r.get('similarity', 0)
+                    }
+                    for r in results
+                ]
+                tokens = sum(count_tokens(s["text"], self.encoding_name) for s in sections)
+                pack_stats = {
+                    "raw_context_tokens": tokens,
+                    "context_tokens": tokens,
+                    "chunks": len(results),
+                    "sections": len(sections)
+                }
+            
             context_parts = []
-            for i, result in enumerate(results, 1):
-                meta = result.get('meta', {})
-                text = meta.get('text', '')
-                source = meta.get('source', 'Unknown')
-                similarity = result.get('similarity', 0)
-                
+            for i, section in enumerate(sections, 1):
                 context_parts.append(
-                    f"[Source {i}] {source} (Relevance: {similarity:.2%})\n{text}"
+                    f"[Source {i}] {section['source']} (Relevance: {section['similarity']:.2%})\n{section['text']}"
                 )
             
             context = "\n\n---\n\n".join(context_parts)
         
-        return self.build_rag_prompt(query, context)
+        prompt = self.build_rag_prompt(query, context)
+        
+        if stats is not None:
+            stats.update(pack_stats)
+            stats["prompt_tokens"] = count_tokens(prompt, self.encoding_name)
+        
+        return prompt
     
     def set_system_prompt(self, prompt: str):
         """Set custom system prompt."""
@@ -0,0 +1,438 @@
+"""Rate limiting, retries and hedged requests for LLM provider calls."""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import numpy as np
+import openai
+import groq
+
+from ..utils import settings, log, metrics
+
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Errors raised when the provider could not be reached or did not answer in time
+CONNECTION_ERRORS = (
+    openai.APIConnectionError,
+    groq.APIConnectionError,
+    ConnectionError,
+    TimeoutError
+)
+
+
+class LLMError(Exception):
+    """An LLM call failed (after any retries)."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def classify_error(exc: Exception) -> LLMError:
+    """
+    Convert a provider SDK exception into an LLMError.
+
+    Args:
+        exc: Exception raised by the Groq or OpenAI client
+
+    Returns:
+        LLMError flagged as retryable for rate limits, server errors and
+        connection failures, with the server's Retry-After hint if present
+    """
+    if isinstance(exc, LLMError):
+        return exc
+
+    status_code = getattr(exc, "status_code", None)
+    retry_after = None
+    response = getattr(exc, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+
+    retryable = isinstance(exc, CONNECTION_ERRORS) or status_code in RETRYABLE_STATUS_CODES
+    return LLMError(str(exc), status_code=status_code, retryable=retryable, retry_after=retry_after)
+
+
+def backoff_delay(
+    attempt: int,
+    base_delay: float,
+    max_delay: float,
+    retry_after: Optional[float] = None
+) -> float:
+    """
+    Delay before the next retry: exponential backoff with full jitter.
+
+    Args:
+        attempt: Zero-based retry number
+        base_delay: Delay scale for the first retry (seconds)
+        max_delay: Upper bound of the jittered delay (seconds)
+        retry_after: Server-provided minimum wait, honored if larger
+
+    Returns:
+        Seconds to wait
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Rough token cost of a request (prompt at ~4 chars/token plus the completion budget)."""
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers reserve capacity and sleep for their turn."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Initialize token bucket.
+
+        Args:
+            rate_per_second: Refill rate
+            capacity: Maximum burst size
+        """
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        Take `amount` tokens, going into debt if needed.
+
+        Returns:
+            Seconds the caller must wait before using the reservation
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        """Take `amount` tokens only if they are available now."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return True
+            return False
+
+    def refund(self, amount: float = 1.0):
+        """Return tokens taken by a reservation that was not used."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class RateLimiter:
+    """
+    Client-side pacing for provider quotas (requests and tokens per minute).
+
+    A limit of 0 disables that bucket. Buckets start full so a burst up to
+    one minute's quota goes through immediately.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.requests = (
+            TokenBucket(requests_per_minute / 60.0, requests_per_minute)
+            if requests_per_minute > 0 else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+            if tokens_per_minute > 0 else None
+        )
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve one request and `tokens` tokens; returns the wait in seconds."""
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """Take capacity for one request only if it is available without waiting."""
+        if self.requests and not self.requests.try_acquire(1):
+            return False
+        if self.tokens and tokens and not self.tokens.try_acquire(tokens):
+            if self.requests:
+                self.requests.refund(1)
+            return False
+        return True
+
+
+_rate_limiters: Dict[tuple, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None
+) -> RateLimiter:
+    """
+    Get the process-wide rate limiter for a provider.
+
+    Every LLMClient for the same provider and limits shares one limiter, so
+    concurrent sessions are paced against a single quota.
+    """
+    rpm = settings.llm_requests_per_minute if requests_per_minute is None else requests_per_minute
+    tpm = settings.llm_tokens_per_minute if tokens_per_minute is None else tokens_per_minute
+    key = (provider, rpm, tpm)
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = _rate_limiters[key] = RateLimiter(rpm, tpm)
+        return limiter
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Latency percentile in seconds, or None with fewer than `min_samples` samples."""
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            samples = np.fromiter(self._samples, dtype=np.float64)
+        return float(np.percentile(samples, q))
+
+
+class ResilientCaller:
+    """
+    Run provider calls with rate limiting, retries and optional hedging.
+
+    Retryable failures (429, 5xx, timeouts, connection errors) are retried
+    with jittered exponential backoff. With hedging enabled, a second
+    identical request is sent when the first is slower than the given
+    percentile of recent latencies, and the first response to arrive wins.
+    Hedges only fire when the rate limiter has spare capacity.
+    """
+
+    _hedge_executor: Optional[ThreadPoolExecutor] = None
+    _hedge_executor_lock = threading.Lock()
+
+    def __init__(
+        self,
+        provider: str,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: Optional[int] = None
+    ):
+        """
+        Initialize resilient caller.
+
+        Args:
+            provider: Provider name (used for metrics labels)
+            rate_limiter: Limiter to pace calls (defaults to the shared one)
+            max_retries: Retries after the first attempt
+            base_delay: Backoff scale in seconds
+            max_delay: Backoff cap in seconds
+            hedge_percentile: Latency percentile that triggers a hedge (0 disables)
+            hedge_min_samples: Latency samples needed before hedging starts
+        """
+        self.provider = provider
+        self.rate_limiter = rate_limiter or get_rate_limiter(provider)
+        self.max_retries = settings.llm_max_retries if max_retries is None else max_retries
+        self.base_delay = settings.llm_retry_base_delay if base_delay is None else base_delay
+        self.max_delay = settings.llm_retry_max_delay if max_delay is None else max_delay
+        self.hedge_percentile = (
+            settings.llm_hedge_percentile if hedge_percentile is None else hedge_percentile
+        )
+        self.hedge_min_samples = (
+            settings.llm_hedge_min_samples if hedge_min_samples is None else hedge_min_samples
+        )
+        self.latency = LatencyTracker()
+
+        self._labels = {"provider": provider}
+        self._requests = metrics.counter("llm_requests_total", "LLM calls by outcome")
+        self._retries = metrics.counter("llm_retries_total", "LLM call retries")
+        self._hedges = metrics.counter("llm_hedged_requests_total", "Hedged LLM requests sent")
+        self._hedge_wins = metrics.counter("llm_hedge_wins_total", "Hedged requests that answered first")
+        self._wait_histogram = metrics.histogram(
+            "llm_rate_limit_wait_seconds", "Time spent waiting for client-side rate limits"
+        )
+        self._latency_histogram = metrics.histogram("llm_request_seconds", "LLM call latency")
+
+    @classmethod
+    def _get_hedge_executor(cls) -> ThreadPoolExecutor:
+        with cls._hedge_executor_lock:
+            if cls._hedge_executor is None:
+                cls._hedge_executor = ThreadPoolExecutor(
+                    max_workers=settings.async_worker_threads,
+                    thread_name_prefix="llm-hedge"
+                )
+            return cls._hedge_executor
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a hedge is sent, or None when hedging is off."""
+        if not self.hedge_percentile:
+            return None
+        return self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    def _retry_or_raise(self, exc: Exception, attempt: int) -> float:
+        """Classify a failure; return the backoff delay or raise LLMError."""
+        error = classify_error(exc)
+        if not error.retryable or attempt >= self.max_retries:
+            self._requests.inc(labels={**self._labels, "outcome": "error"})
+            raise error from exc
+
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay, error.retry_after)
+        self._retries.inc(labels={**self._labels, "reason": str(error.status_code or "connection")})
+        log.warning(
+            f"{self.provider} call failed ({error.status_code or type(exc).__name__}), "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+        return delay
+
+    def _record_success(self, elapsed: float):
+        self.latency.record(elapsed)
+        self._latency_histogram.observe(elapsed, self._labels)
+        self._requests.inc(labels={**self._labels, "outcome": "success"})
+
+    def call(self, fn: Callable[[], Any], tokens: int = 0, hedge: bool = True) -> Any:
+        """
+        Call `fn` with rate limiting, retries and (optionally) hedging.
+
+        Args:
+            fn: Zero-argument function performing one provider request
+            tokens: Estimated token cost for the token-per-minute bucket
+            hedge: Allow a hedged duplicate request (off for streams)
+
+        Returns:
+            Result of `fn`
+
+        Raises:
+            LLMError: If the call fails with a non-retryable error or
+                retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            wait = self.rate_limiter.reserve(tokens)
+            if wait > 0:
+                self._wait_histogram.observe(wait, self._labels)
+                time.sleep(wait)
+
+            start = time.perf_counter()
+            try:
+                result = self._hedged(fn, tokens) if hedge else fn()
+            except Exception as e:
+                time.sleep(self._retry_or_raise(e, attempt))
+                continue
+
+            self._record_success(time.perf_counter() - start)
+            return result
+
+    def _hedged(self, fn: Callable[[], Any], tokens: int) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return fn()
+
+        executor = self._get_hedge_executor()
+        primary = executor.submit(fn)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+
+        if not self.rate_limiter.try_acquire(tokens):
+            return primary.result()
+
+        self._hedges.inc(labels=self._labels)
+        hedge = executor.submit(fn)
+        error = None
+        # The slower request cannot be cancelled mid-flight; its result is discarded
+        for future in as_completed([primary, hedge]):
+            if future.exception() is None:
+                if future is hedge:
+                    self._hedge_wins.inc(labels=self._labels)
+                return future.result()
+            error = future.exception()
+        raise error
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """
+        Coroutine version of call(); `fn` returns a new awaitable per attempt.
+
+        Raises:
+            LLMError: If the call fails with a non-retryable error or
+                retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            wait = self.rate_limiter.reserve(tokens)
+            if wait > 0:
+                self._wait_histogram.observe(wait, self._labels)
+                await asyncio.sleep(wait)
+
+            start = time.perf_counter()
+            try:
+                result = await self._ahedged(fn, tokens)
+            except Exception as e:
+                await asyncio.sleep(self._retry_or_raise(e, attempt))
+                continue
+
+            self._record_success(time.perf_counter() - start)
+            return result
+
+    async def _ahedged(self, fn: Callable[[], Awaitable[Any]], tokens: int) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await fn()
+
+        primary = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self.rate_limiter.try_acquire(tokens):
+            return await primary
+
+        self._hedges.inc(labels=self._labels)
+        hedge = asyncio.ensure_future(fn())
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._hedge_wins.inc(labels=self._labels)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
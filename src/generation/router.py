@@ -0,0 +1,163 @@
+"""Per-query routing between a fast and a large LLM."""
+
+import re
+from typing import List, Dict, Any, Optional
+
+from ..utils import settings, log, metrics
+from ..vector_store import top_similarity
+
+
+TIER_FAST = "fast"
+TIER_LARGE = "large"
+
+# Questions asking for reasoning or synthesis go to the large model
+REASONING_CUES = re.compile(
+    r"\b(why|compare|comparison|difference|differences|versus|vs|trade-?offs?|explain|"
+    r"analy[sz]e|pros|cons|recommend|should i|step[- ]by[- ]step|design)\b",
+    re.IGNORECASE
+)
+
+# Several near-equal sources suggest an answer spread across documents
+MIN_SCORE_SPREAD = 0.03
+
+# Answers that signal the fast model could not answer from the context
+LOW_CONFIDENCE_ANSWER = re.compile(
+    r"(don't|do not) have enough information|not (mentioned|covered|specified) in the (provided )?"
+    r"(context|documentation)|cannot (answer|determine)|unable to (answer|determine)",
+    re.IGNORECASE
+)
+
+
+class ModelRouter:
+    """
+    Pick a model tier per question from cheap signals.
+
+    A question goes to the large model when it is long, asks for
+    reasoning or comparison, comes with a large context, or retrieval is
+    weak or ambiguous (low top similarity, flat score spread). Everything
+    else goes to the fast model. A fast answer that admits it could not
+    answer is escalated to the large model once.
+    """
+
+    def __init__(
+        self,
+        fast_model: Optional[str] = None,
+        large_model: Optional[str] = None,
+        max_query_words: Optional[int] = None,
+        max_fast_context_tokens: Optional[int] = None,
+        min_top_similarity: Optional[float] = None,
+        escalation: Optional[bool] = None
+    ):
+        """
+        Initialize model router.
+
+        Args:
+            fast_model: Low-latency model for simple lookups
+            large_model: Model for everything else (defaults to LLM_MODEL)
+            max_query_words: Longer questions go to the large model
+            max_fast_context_tokens: Larger prompts go to the large model
+            min_top_similarity: Weaker retrievals go to the large model
+            escalation: Retry low-confidence fast answers on the large model
+        """
+        self.models = {
+            TIER_FAST: fast_model or settings.llm_fast_model,
+            TIER_LARGE: large_model or settings.llm_model
+        }
+        self.max_query_words = max_query_words or settings.router_max_query_words
+        self.max_fast_context_tokens = max_fast_context_tokens or settings.router_max_fast_context_tokens
+        self.min_top_similarity = (
+            settings.router_min_top_similarity if min_top_similarity is None else min_top_similarity
+        )
+        self.escalation = settings.router_escalation if escalation is None else escalation
+
+        self._decisions = metrics.counter("llm_route_total", "Model routing decisions by tier and reason")
+        self._escalations = metrics.counter("llm_escalations_total", "Fast answers retried on the large model")
+        self._latency = metrics.histogram("llm_tier_seconds", "LLM call latency by model tier")
+
+    def route(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        prompt_tokens: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Choose a model tier for a question.
+
+        Args:
+            query: User question
+            results: Retrieved context (ordered by relevance)
+            prompt_tokens: Size of the built prompt
+
+        Returns:
+            Decision dictionary with 'tier', 'model', 'reason' and the
+            'signals' it was based on
+        """
+        similarities = [r.get('similarity', 0) for r in results]
+        top = top_similarity(results)
+        spread = top - sum(similarities) / len(similarities) if similarities else 0.0
+        signals = {
+            "query_words": len(query.split()),
+            "top_similarity": round(top, 4),
+            "score_spread": round(spread, 4),
+            "prompt_tokens": prompt_tokens
+        }
+
+        if signals["query_words"] > self.max_query_words:
+            reason = "long_query"
+        elif REASONING_CUES.search(query):
+            reason = "reasoning"
+        elif prompt_tokens > self.max_fast_context_tokens:
+            reason = "large_context"
+        elif top < self.min_top_similarity:
+            reason = "weak_retrieval"
+        elif len(similarities) >= 3 and spread < MIN_SCORE_SPREAD:
+            reason = "flat_scores"
+        else:
+            reason = "simple"
+
+        tier = TIER_FAST if reason == "simple" else TIER_LARGE
+        self._decisions.inc(labels={"tier": tier, "reason": reason})
+        log.debug(f"Routed query to {tier} model ({reason}): {signals}")
+
+        return {
+            "tier": tier,
+            "model": self.models[tier],
+            "reason": reason,
+            "signals": signals,
+            "escalated": False
+        }
+
+    def should_escalate(self, decision: Dict[str, Any], answer: str) -> bool:
+        """Whether a fast-tier answer should be regenerated by the large model."""
+        if not self.escalation or decision["tier"] != TIER_FAST:
+            return False
+        return bool(LOW_CONFIDENCE_ANSWER.search(answer)) or len(answer.strip()) < 20
+
+    def escalate(self, decision: Dict[str, Any]) -> Dict[str, Any]:
+        """Decision for retrying on the large model."""
+        self._escalations.inc()
+        log.info("Escalating low-confidence fast answer to the large model")
+        return {**decision, "tier": TIER_LARGE, "model": self.models[TIER_LARGE], "escalated": True}
+
+    def observe(self, tier: str, seconds: float):
+        """Record the latency of one LLM call for a tier."""
+        self._latency.observe(seconds, {"tier": tier})
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing decision counts and mean latency per tier."""
+        decisions = {}
+        for key, value in self._decisions.snapshot().items():
+            labels = dict(key)
+            decisions.setdefault(labels["tier"], {})[labels["reason"]] = int(value)
+
+        mean_ms = {}
+        for key, series in self._latency.snapshot().items():
+            if series["count"]:
+                mean_ms[dict(key)["tier"]] = round(series["sum"] / series["count"] * 1000, 1)
+
+        return {
+            "models": dict(self.models),
+            "decisions": decisions,
+            "escalations": int(self._escalations.value()),
+            "mean_ms": mean_ms
+        }
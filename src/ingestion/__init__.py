@@ -3,5 +3,12 @@
 from .loader import DocumentLoader
 from .cleaner import TextCleaner
 from .chunker import TextChunker
+from .profiler import IngestionProfiler
+from .checkpoint import IngestionCheckpoint
+from .pipeline import IngestionPipeline, IngestionCancelled
+from .jobs import IndexingJob, IndexingJobManager, IndexingInProgress
 
-__all__ = ["DocumentLoader", "TextCleaner", "TextChunker"]
+__all__ = [
+    "DocumentLoader", "TextCleaner", "TextChunker", "IngestionProfiler", "IngestionCheckpoint", "IngestionPipeline",
+    "IngestionCancelled", "IndexingJob", "IndexingJobManager", "IndexingInProgress"
+]
@@ -0,0 +1,174 @@
+"""Checkpoints that let an interrupted ingestion run resume where it stopped."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+from .loader import Source, source_name, source_size
+from ..utils import settings, log
+
+
+def default_checkpoint_path(index_name: str = None) -> Path:
+    """Checkpoint file for ingesting into an index."""
+    return settings.processed_data_dir / "checkpoints" / f"{index_name or settings.index_name}.json"
+
+
+def ingestion_fingerprint(strategy: str = "tokens", model_name: str = None) -> Dict[str, Any]:
+    """
+    Settings that shape the indexed vectors.
+
+    A checkpoint written under a different fingerprint cannot be resumed:
+    its chunks would not match the ones produced now.
+    """
+    return {
+        "index_name": settings.index_name,
+        "embedding_model": model_name or settings.embedding_model,
+        "embedding_dimension": settings.embedding_dimension,
+        "max_chunk_size": settings.max_chunk_size,
+        "chunk_overlap": settings.chunk_overlap,
+        "strategy": strategy,
+        "space_type": settings.space_type,
+        "precision": settings.precision
+    }
+
+
+class IngestionCheckpoint:
+    """
+    Completed files and batches of one ingestion run, persisted as JSON.
+
+    Files are keyed by resolved path and remembered with their size and
+    modification time, so a file edited after it was indexed is picked up
+    again. Streams (uploads) are keyed by name and size. The content hash
+    of every indexed file is kept too, so identical content under another
+    name is recognised as a duplicate on later runs. Vector IDs are derived
+    from the source path and chunk number, so re-upserting a batch that was
+    cut off halfway overwrites its vectors.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]], fingerprint: Dict[str, Any]):
+        """
+        Initialize a new checkpoint.
+
+        Args:
+            path: Checkpoint file, or None to keep progress in memory only
+            fingerprint: Settings the run was started with
+        """
+        self.path = Path(path) if path is not None else None
+        self.fingerprint = fingerprint
+        self.created_at = time.time()
+        self.index_ready = False
+        self.completed = False
+        self.batches = 0
+        self.chunks_indexed = 0
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional["IngestionCheckpoint"]:
+        """Load a checkpoint, or None if there is none (or it is unreadable)."""
+        path = Path(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            log.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+        checkpoint = cls(path, data.get("fingerprint", {}))
+        checkpoint.created_at = data.get("created_at", checkpoint.created_at)
+        checkpoint.index_ready = data.get("index_ready", False)
+        checkpoint.completed = data.get("completed", False)
+        checkpoint.batches = data.get("batches", 0)
+        checkpoint.chunks_indexed = data.get("chunks_indexed", 0)
+        checkpoint.files = data.get("files", {})
+        return checkpoint
+
+    def save(self):
+        """Write the checkpoint atomically (no-op for in-memory checkpoints)."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "fingerprint": self.fingerprint,
+                "created_at": self.created_at,
+                "updated_at": time.time(),
+                "index_ready": self.index_ready,
+                "completed": self.completed,
+                "batches": self.batches,
+                "chunks_indexed": self.chunks_indexed,
+                "files": self.files
+            }, f, indent=1)
+        tmp_path.replace(self.path)
+
+    def delete(self):
+        """Remove the checkpoint file."""
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _key(source: Source) -> str:
+        if isinstance(source, (str, Path)):
+            return str(Path(source).resolve())
+        return f"upload:{source_name(source)}"
+
+    @staticmethod
+    def _identity(source: Source) -> Dict[str, Any]:
+        if isinstance(source, (str, Path)):
+            stat = Path(source).stat()
+            return {"size": stat.st_size, "mtime": stat.st_mtime}
+        return {"size": source_size(source)}
+
+    def is_done(self, source: Source) -> bool:
+        """Whether a file was indexed (or failed, or was a duplicate) in its current version."""
+        entry = self.files.get(self._key(source))
+        if not entry:
+            return False
+        try:
+            identity = self._identity(source)
+        except OSError:
+            return False
+        return all(entry.get(field) == value for field, value in identity.items())
+
+    def mark_done(self, source: Source, chunks: int, sha256: str = None):
+        """Record a file whose chunks are all indexed."""
+        self.files[self._key(source)] = {
+            **self._identity(source), "status": "done", "name": source_name(source), "chunks": chunks, "sha256": sha256
+        }
+
+    def mark_duplicate(self, source: Source, original: str):
+        """Record a file skipped because its content was already indexed as `original`."""
+        self.files[self._key(source)] = {
+            **self._identity(source), "status": "duplicate", "name": source_name(source), "duplicate_of": original
+        }
+
+    def mark_failed(self, source: Source, error: str):
+        """Record a file that could not be loaded (skipped when resuming)."""
+        try:
+            identity = self._identity(source)
+        except OSError:
+            identity = {"size": None, "mtime": None}
+        self.files[self._key(source)] = {**identity, "status": "failed", "name": source_name(source), "error": error}
+
+    def forget(self, source: Source):
+        """Drop a file from the checkpoint, e.g. after deleting it from the index."""
+        self.files.pop(self._key(source), None)
+
+    def hashes(self) -> Dict[str, str]:
+        """Content hash to file name of every indexed file."""
+        return {
+            entry["sha256"]: entry.get("name") or Path(key).name
+            for key, entry in self.files.items()
+            if entry["status"] == "done" and entry.get("sha256")
+        }
+
+    def counts(self) -> Dict[str, int]:
+        """Number of files per status."""
+        counts = {"done": 0, "failed": 0, "duplicate": 0}
+        for entry in self.files.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
@@ -1,9 +1,14 @@
 """Text chunking strategies for document processing."""
 
-from typing import List, Dict
-import tiktoken
+from typing import List, Dict, Iterable, Iterator
 
 from ..utils import settings, log
+from ..utils.tokens import get_encoding, count_tokens
+
+
+# Longest run without whitespace held back to find a word boundary; longer
+# runs (base64, minified JSON) are cut where a segment ends
+MAX_WORD_CHARS = 1 << 16
 
 
 class TextChunker:
@@ -26,19 +31,14 @@ class TextChunker:
         self.chunk_size = chunk_size or settings.max_chunk_size
         self.chunk_overlap = chunk_overlap or settings.chunk_overlap
         
-        try:
-            self.encoding = tiktoken.get_encoding(encoding_name)
-        except Exception as e:
-            log.warning(f"Could not load tiktoken encoding: {e}. Using character-based chunking.")
-            self.encoding = None
+        self.encoding_name = encoding_name
+        self.encoding = get_encoding(encoding_name)
+        if self.encoding is None:
+            log.warning("Using character-based chunking.")
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in text."""
-        if self.encoding:
-            return len(self.encoding.encode(text))
-        else:
-            # Rough approximation: 1 token ≈ 4 characters
-            return len(text) // 4
+        return count_tokens(text, self.encoding_name)
     
     def chunk_by_tokens(self, text: str, metadata: Dict = None) -> List[Dict]:
         """
@@ -54,57 +54,129 @@ class TextChunker:
         if not text:
             return []
         
+        chunks = list(self.iter_chunks_by_tokens([text], metadata))
+        tokens = sum(c.get("token_count") or c.get("char_count", 0) // 4 for c in chunks)
+        log.info(f"Created {len(chunks)} chunks from text ({tokens} tokens)")
+        return chunks
+    
+    @staticmethod
+    def _split_segments(segments: Iterable[str]) -> Iterator[str]:
+        """
+        Move segment boundaries to the whitespace before the last word.
+        
+        A boundary can fall inside a word; moving it keeps the word in one
+        piece when tokenized. Text without whitespace is held back only up
+        to MAX_WORD_CHARS, so memory stays bounded. A single segment is
+        passed through unchanged.
+        """
+        pending = None
+        for segment in segments:
+            if not segment:
+                continue
+            if pending is None:
+                pending = segment
+                continue
+            cut = max(pending.rfind(" "), pending.rfind("\n"))
+            if cut <= 0:
+                if len(pending) < MAX_WORD_CHARS:
+                    pending += segment
+                    continue
+                cut = len(pending)
+            yield pending[:cut]
+            pending = pending[cut:] + segment
+        if pending:
+            yield pending
+    
+    def iter_chunks_by_tokens(self, segments: Iterable[str], metadata: Dict = None) -> Iterator[Dict]:
+        """
+        Chunk a stream of text segments by token count with overlap.
+        
+        Each chunk is yielded as soon as its window is full, and the overlap
+        is carried across segment boundaries, so a document of any size is
+        chunked while holding about one window of tokens plus one segment.
+        Chunks match chunk_by_tokens on the joined text, except that BPE
+        merges cannot span a segment boundary (boundaries are moved to
+        whitespace to keep words whole).
+        
+        Args:
+            segments: Text pieces in document order (e.g. blocks of a file)
+            metadata: Metadata to attach to each chunk
+            
+        Yields:
+            Chunk dictionaries with spans relative to the whole document
+        """
         metadata = metadata or {}
-        chunks = []
+        chunk_id = 0
         
         if self.encoding:
-            tokens = self.encoding.encode(text)
-            
+            size, step = self.chunk_size, self.chunk_size - self.chunk_overlap
+            buffer: List[int] = []  # tokens from `start` on
             start = 0
-            chunk_id = 0
+            emitted = False
             
-            while start < len(tokens):
-                end = start + self.chunk_size
-                chunk_tokens = tokens[start:end]
-                chunk_text = self.encoding.decode(chunk_tokens)
-                
-                chunks.append({
-                    "text": chunk_text,
+            for segment in self._split_segments(segments):
+                buffer.extend(self.encoding.encode(segment, disallowed_special=()))
+                offset = 0
+                while len(buffer) - offset >= size:
+                    window = buffer[offset:offset + size]
+                    yield {
+                        "text": self.encoding.decode(window),
+                        "chunk_id": chunk_id,
+                        "start_token": start,
+                        "end_token": start + size,
+                        "token_count": size,
+                        **metadata
+                    }
+                    emitted = True
+                    chunk_id += 1
+                    start += step
+                    offset += step
+                del buffer[:offset]
+            
+            # The last window, unless it would only repeat the previous chunk's tail
+            if buffer and (not emitted or len(buffer) > size - step):
+                yield {
+                    "text": self.encoding.decode(buffer),
                     "chunk_id": chunk_id,
                     "start_token": start,
-                    "end_token": end,
-                    "token_count": len(chunk_tokens),
+                    "end_token": start + len(buffer),
+                    "token_count": len(buffer),
                     **metadata
-                })
-                
-                start += self.chunk_size - self.chunk_overlap
-                chunk_id += 1
+                }
         else:
             # Fallback: character-based chunking
-            char_chunk_size = self.chunk_size * 4
-            char_overlap = self.chunk_overlap * 4
-            
+            size, step = self.chunk_size * 4, (self.chunk_size - self.chunk_overlap) * 4
+            buffer = ""
             start = 0
-            chunk_id = 0
+            emitted = False
             
-            while start < len(text):
-                end = start + char_chunk_size
-                chunk_text = text[start:end]
-                
-                chunks.append({
-                    "text": chunk_text,
+            for segment in segments:
+                buffer += segment
+                offset = 0
+                while len(buffer) - offset >= size:
+                    yield {
+                        "text": buffer[offset:offset + size],
+                        "chunk_id": chunk_id,
+                        "start_char": start,
+                        "end_char": start + size,
+                        "char_count": size,
+                        **metadata
+                    }
+                    emitted = True
+                    chunk_id += 1
+                    start += step
+                    offset += step
+                buffer = buffer[offset:]
+            
+            if buffer and (not emitted or len(buffer) > size - step):
+                yield {
+                    "text": buffer,
                     "chunk_id": chunk_id,
                     "start_char": start,
-                    "end_char": end,
-                    "char_count": len(chunk_text),
+                    "end_char": start + len(buffer),
+                    "char_count": len(buffer),
                     **metadata
-                })
-                
-                start += char_chunk_size - char_overlap
-                chunk_id += 1
-        
-        log.info(f"Created {len(chunks)} chunks from text ({self.count_tokens(text)} tokens)")
-        return chunks
+                }
     
     def chunk_by_sentences(self, text: str, metadata: Dict = None) -> List[Dict]:
         """
@@ -1,7 +1,13 @@
 """Text cleaning and preprocessing utilities."""
 
 import re
-from typing import List
+from typing import List, Iterable, Iterator
+
+
+# Patterns applied by clean() and iter_preprocess()
+WHITESPACE = re.compile(r'\s+')
+SPECIAL_CHARS = re.compile(r'[^\w\s.,!?;:()\-\'"\/]')
+REPEATED_PUNCTUATION = re.compile(r'([.,!?;:])\1+')
 
 
 class TextCleaner:
@@ -24,19 +30,19 @@ class TextCleaner:
         if not text:
             return ""
         
+        return self._strip_noise(text).strip()
+    
+    @staticmethod
+    def _strip_noise(text: str) -> str:
+        """Collapse whitespace and drop special characters and repeated punctuation."""
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = WHITESPACE.sub(' ', text)
         
         # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,!?;:()\-\'"\/]', '', text)
+        text = SPECIAL_CHARS.sub('', text)
         
         # Remove multiple consecutive punctuation
-        text = re.sub(r'([.,!?;:])\1+', r'\1', text)
-        
-        # Strip leading/trailing whitespace
-        text = text.strip()
-        
-        return text
+        return REPEATED_PUNCTUATION.sub(r'\1', text)
     
     def remove_urls(self, text: str) -> str:
         """Remove URLs from text."""
@@ -72,3 +78,47 @@ class TextCleaner:
         text = self.normalize_whitespace(text)
         
         return text
+    
+    def iter_preprocess(
+        self,
+        segments: Iterable[str],
+        remove_urls: bool = False,
+        remove_emails: bool = False
+    ) -> Iterator[str]:
+        """
+        Preprocess a stream of text segments, one segment at a time.
+        
+        The joined output equals preprocess() on the joined input, except
+        where a URL, e-mail address or run of repeated punctuation is split
+        across two segments. Whitespace is collapsed across boundaries.
+        
+        Args:
+            segments: Raw text pieces in document order
+            remove_urls: Whether to remove URLs
+            remove_emails: Whether to remove emails
+            
+        Yields:
+            Preprocessed text pieces
+        """
+        started = False
+        pending_space = False
+        
+        for text in segments:
+            if remove_urls:
+                text = self.remove_urls(text)
+            if remove_emails:
+                text = self.remove_emails(text)
+            
+            text = self._strip_noise(text)
+            
+            words = text.split()
+            if not words:
+                pending_space = pending_space or bool(text)
+                continue
+            
+            out = " ".join(words)
+            if started and (pending_space or text[0].isspace()):
+                out = " " + out
+            yield out
+            started = True
+            pending_space = text[-1].isspace()
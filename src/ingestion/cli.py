@@ -0,0 +1,210 @@
+"""Headless, resumable document ingestion.
+
+Indexes a directory, file or glob into Endee without the Streamlit app.
+Completed files are checkpointed after each batch, so a run killed halfway
+continues where it stopped when the same command is run again.
+
+Usage:
+    python -m src.ingestion.cli data/raw --recreate
+    python -m src.ingestion.cli "docs/**/*.pdf" --batch-files 32 --profile
+    python -m src.ingestion.cli data/raw --restart   # ignore the checkpoint
+    python -m src.ingestion.cli data/raw --update    # re-index edited files in place
+    python -m src.ingestion.cli data/raw/old.md --delete
+"""
+
+import argparse
+import glob
+import sys
+from pathlib import Path
+from typing import List
+
+from .loader import DocumentLoader, content_hash
+from .chunker import TextChunker
+from .pipeline import IngestionPipeline
+from .profiler import IngestionProfiler
+from .checkpoint import IngestionCheckpoint, default_checkpoint_path, ingestion_fingerprint
+from ..vector_store import VectorIndexer
+from ..utils import settings, log
+
+
+def collect_paths(inputs: List[str]) -> List[Path]:
+    """Expand directories (recursively) and globs into supported files."""
+    paths = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = path.rglob("*")
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = map(Path, glob.glob(item, recursive=True))
+        paths.update(
+            p for p in candidates
+            if p.is_file() and p.suffix.lower() in DocumentLoader.SUPPORTED_FORMATS
+        )
+    return sorted(paths)
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def print_progress(status: dict):
+    """One progress line per batch: files, chunks, throughput and ETA."""
+    eta = _duration(status["eta"]) if status["eta"] is not None else "?"
+    print(
+        f"[{status['files_done']}/{status['files_total']} files] {status['chunks']} chunks, "
+        f"{status['chunks_per_second']:.1f} chunks/s, {status['bytes_per_second'] / 2 ** 20:.2f} MB/s, "
+        f"elapsed {_duration(status['elapsed'])}, ETA {eta}",
+        file=sys.stderr,
+        flush=True
+    )
+
+
+def update_documents(pipeline, paths, checkpoint, profiler, write_profile: bool) -> int:
+    """Update new and edited files in place (--update)."""
+    pending = [p for p in paths if not checkpoint.is_done(p)]
+    log.info(f"Updating {len(pending)} new or edited files in '{settings.index_name}'")
+    with profiler:
+        result = pipeline.update_documents(pending, profiler=profiler)
+    for path in pending:
+        if str(path) in result["files"]:
+            checkpoint.mark_done(path, result["files"][str(path)], sha256=content_hash(path))
+    checkpoint.save()
+
+    if write_profile:
+        json_path, html_path = profiler.write(settings.ingestion_profile_dir)
+        log.info(f"Profile written to {html_path}")
+
+    print(
+        f"Updated {result['documents']} files: {result['upserted']} chunks upserted, "
+        f"{result['unchanged']} unchanged, {result['deleted']} deleted, {len(result['failed'])} failed",
+        file=sys.stderr
+    )
+    return 0
+
+
+def delete_documents(sources: List[str], checkpoint_path: Path = None) -> int:
+    """Delete documents' vectors and forget them in the checkpoint (--delete)."""
+    indexer = VectorIndexer()
+    if not indexer.client.index_exists(indexer.index_name):
+        log.error(f"Index '{indexer.index_name}' does not exist")
+        return 1
+    indexer.setup_index()
+    deleted = sum(indexer.delete_document(source) for source in sources)
+    indexer.flush()
+    checkpoint_path = checkpoint_path or default_checkpoint_path()
+    checkpoint = IngestionCheckpoint.load(checkpoint_path)
+    if checkpoint:
+        for source in sources:
+            checkpoint.forget(Path(source))
+        checkpoint.save()
+    print(f"Deleted {deleted} vectors of {len(sources)} documents", file=sys.stderr)
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Index documents into Endee with checkpointing")
+    parser.add_argument("inputs", nargs="+", help="Directories, files or glob patterns")
+    parser.add_argument("--recreate", action="store_true", help="Delete and recreate the index on a fresh run")
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and start over")
+    parser.add_argument("--checkpoint", type=Path, help="Checkpoint file (default: data/processed/checkpoints/<index>.json)")
+    parser.add_argument("--checkpoint-every", type=int, default=1, help="Save the checkpoint every N batches")
+    parser.add_argument("--batch-files", type=int, default=16, help="Files embedded and upserted per batch")
+    parser.add_argument("--embed-batch-size", type=int, default=32)
+    parser.add_argument("--strategy", choices=["tokens", "sentences"], default="tokens")
+    parser.add_argument("--profile", action="store_true", help="Write an ingestion profile report")
+    parser.add_argument(
+        "--update", action="store_true",
+        help="Update new and edited files in place: embed only changed chunks and delete stale ones"
+    )
+    parser.add_argument(
+        "--delete", action="store_true",
+        help="Delete the given files' vectors (paths as they were indexed; the files need not exist)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.delete:
+        return delete_documents(args.inputs, args.checkpoint)
+
+    paths = collect_paths(args.inputs)
+    if not paths:
+        log.error(f"No supported documents found in {args.inputs}")
+        return 1
+
+    from ..embeddings import EmbeddingModel
+
+    embedding_model = EmbeddingModel()
+    fingerprint = ingestion_fingerprint(args.strategy, embedding_model.model_name)
+    checkpoint_path = args.checkpoint or default_checkpoint_path()
+    checkpoint = None if args.restart else IngestionCheckpoint.load(checkpoint_path)
+
+    if checkpoint and checkpoint.fingerprint != fingerprint:
+        changed = sorted(k for k in fingerprint if checkpoint.fingerprint.get(k) != fingerprint[k])
+        log.error(
+            f"Checkpoint {checkpoint_path} was written with different settings ({', '.join(changed)}); "
+            f"use --restart to start over"
+        )
+        return 1
+    if checkpoint:
+        counts = checkpoint.counts()
+        log.info(
+            f"Resuming from {checkpoint_path}: {counts['done']} files done, "
+            f"{checkpoint.chunks_indexed} chunks indexed in {checkpoint.batches} batches"
+        )
+    else:
+        checkpoint = IngestionCheckpoint(checkpoint_path, fingerprint)
+
+    pipeline = IngestionPipeline(
+        embedding_model=embedding_model,
+        chunker=TextChunker(),
+        strategy=args.strategy,
+        embed_batch_size=args.embed_batch_size
+    )
+    sample_ms = settings.ingestion_profile_sample_ms if args.profile else 0
+    profiler = IngestionProfiler(trace_memory=args.profile, sample_interval=sample_ms / 1000.0 if sample_ms else None)
+
+    if args.update:
+        return update_documents(pipeline, paths, checkpoint, profiler, args.profile)
+
+    log.info(f"Indexing {len(paths)} files into '{settings.index_name}'")
+    try:
+        with profiler:
+            result = pipeline.run_resumable(
+                paths,
+                checkpoint,
+                force_recreate=args.recreate,
+                batch_files=args.batch_files,
+                checkpoint_every=args.checkpoint_every,
+                profiler=profiler,
+                progress=print_progress
+            )
+    except KeyboardInterrupt:
+        pipeline.save_checkpoint(checkpoint)
+        log.warning(f"Interrupted; checkpoint saved to {checkpoint_path}. Run the same command to resume.")
+        return 130
+    except Exception as e:
+        pipeline.save_checkpoint(checkpoint)
+        log.error(f"Ingestion stopped: {e}. Run the same command to resume.")
+        return 1
+
+    if args.profile:
+        json_path, html_path = profiler.write(settings.ingestion_profile_dir)
+        log.info(f"Profile written to {html_path}")
+
+    print(
+        f"Indexed {result['indexed']} chunks from {result['documents']} files "
+        f"({result['skipped']} already indexed, {len(result['duplicates'])} duplicates, "
+        f"{len(result['failed'])} failed)",
+        file=sys.stderr
+    )
+    for name in result["failed"]:
+        print(f"  failed: {name}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""Background indexing jobs that rebuild the index without blocking queries."""
+
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, Callable, Optional, Sequence
+
+from .loader import Source, source_name
+from .pipeline import IngestionPipeline, IngestionCancelled
+from .profiler import IngestionProfiler
+from .checkpoint import IngestionCheckpoint, ingestion_fingerprint
+from ..embeddings import EmbeddingModel
+from ..vector_store import EndeeClient, VectorIndexer, get_active_index, set_active_index
+from ..vector_store.lexical import default_lexical_path, delete_lexical_index
+from ..vector_store.manifest import default_manifest_path
+from ..utils import settings, log
+
+
+# Job states; the last three are final
+QUEUED = "queued"
+RUNNING = "running"
+COMMITTING = "committing"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+# Seconds the replaced index is kept after a swap, so queries already
+# running against it (here or in another process) can finish
+RETIRE_GRACE_SECONDS = 2.0
+
+
+class IndexingInProgress(RuntimeError):
+    """Raised when indexing is started while another job is running."""
+
+
+class IndexingJob:
+    """
+    State of one background indexing job, safe to poll from any thread.
+
+    Attributes:
+        id: Short job identifier
+        status: One of queued, running, committing, done, failed, cancelled
+        progress: Latest progress counters (files, chunks, vectors, rates, ETA)
+        result: run_resumable result once the job is done
+        error: Error message if the job failed
+        profile: (json_path, html_path) of the ingestion profile, if recorded
+    """
+
+    def __init__(self, paths: Sequence[Source], index_name: str):
+        self.id = uuid.uuid4().hex[:8]
+        self.paths = [Path(p) if isinstance(p, str) else p for p in paths]
+        self.staging_index = f"{index_name}__{self.id}"
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress: Dict[str, Any] = {"files_done": 0, "files_total": len(self.paths), "chunks": 0, "vectors": 0}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.profile = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the job finishes; returns False on timeout."""
+        return self._finished.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly snapshot for status displays and APIs."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "files": [source_name(p) for p in self.paths],
+            "staging_index": self.staging_index,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": dict(self.progress),
+            "error": self.error
+        }
+
+
+class IndexingJobManager:
+    """
+    Run index rebuilds on a background thread, one at a time.
+
+    A job builds a complete new Endee index under a staging name while the
+    current index keeps serving queries. Only when every file is indexed is
+    the logical index pointed at the new one (see set_active_index) and the
+    old one deleted. A failed or cancelled job deletes its staging index
+    and leaves the live index untouched.
+    """
+
+    def __init__(
+        self,
+        client: EndeeClient,
+        embedding_model: EmbeddingModel,
+        on_commit: Optional[Callable[[IndexingJob], None]] = None,
+        batch_files: int = 8
+    ):
+        """
+        Initialize job manager.
+
+        Args:
+            client: Endee client
+            embedding_model: Embedding model for chunks
+            on_commit: Called with the job right after its index goes live
+            batch_files: Files embedded and upserted per batch (progress and
+                cancellation are checked between batches)
+        """
+        self.client = client
+        self.embedding_model = embedding_model
+        self.on_commit = on_commit
+        self.batch_files = batch_files
+        self._jobs: Dict[str, IndexingJob] = {}
+        self._latest: Optional[IndexingJob] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether a job is queued or in progress."""
+        job = self._latest
+        return job is not None and not job.finished
+
+    def get(self, job_id: str) -> Optional[IndexingJob]:
+        return self._jobs.get(job_id)
+
+    def latest(self) -> Optional[IndexingJob]:
+        """The most recently submitted job."""
+        return self._latest
+
+    def submit(
+        self,
+        paths: Sequence[Source],
+        profiler: Optional[IngestionProfiler] = None
+    ) -> IndexingJob:
+        """
+        Start rebuilding the index from files in the background.
+
+        Args:
+            paths: Files (paths or seekable streams such as uploads) the new
+                index should contain
+            profiler: Optional ingestion profiler (written when the job ends)
+
+        Returns:
+            The started job
+
+        Raises:
+            IndexingInProgress: If another job has not finished yet
+        """
+        with self._lock:
+            if self.running:
+                raise IndexingInProgress(
+                    f"Indexing job {self._latest.id} is still running; wait for it or cancel it"
+                )
+            job = IndexingJob(paths, settings.index_name)
+            self._jobs[job.id] = job
+            self._latest = job
+
+        threading.Thread(
+            target=self._run, args=(job, profiler), name=f"indexing-{job.id}", daemon=True
+        ).start()
+        log.info(f"Indexing job {job.id} started for {len(job.paths)} files")
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Ask a job to stop after its current batch.
+
+        Returns:
+            False if there is no such job or it already finished
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished or job.status == COMMITTING:
+            return False
+        job._cancel.set()
+        log.info(f"Cancelling indexing job {job_id}")
+        return True
+
+    def _on_progress(self, job: IndexingJob, status: Dict[str, Any]):
+        elapsed = status["elapsed"]
+        job.progress = {
+            **status,
+            "docs_per_second": status["files_done"] / elapsed if elapsed else 0.0
+        }
+
+    def _run(self, job: IndexingJob, profiler: Optional[IngestionProfiler]):
+        job.status = RUNNING
+        job.started_at = time.time()
+        indexer = VectorIndexer(self.client, index_name=job.staging_index)
+        pipeline = IngestionPipeline(embedding_model=self.embedding_model, indexer=indexer)
+        checkpoint = IngestionCheckpoint(None, ingestion_fingerprint(model_name=self.embedding_model.model_name))
+        try:
+            if profiler:
+                with profiler:
+                    job.result = self._build(job, pipeline, checkpoint, profiler)
+                job.profile = profiler.write(settings.ingestion_profile_dir)
+            else:
+                job.result = self._build(job, pipeline, checkpoint, None)
+
+            job.status = COMMITTING
+            previous = self._commit(job)
+            job.status = DONE
+        except IngestionCancelled:
+            job.status = CANCELLED
+            log.info(f"Indexing job {job.id} cancelled; the current index is unchanged")
+            self._discard(job.staging_index)
+            previous = None
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            log.error(f"Indexing job {job.id} failed: {e}")
+            self._discard(job.staging_index)
+            previous = None
+        finally:
+            job.finished_at = time.time()
+            job._finished.set()
+
+        if previous:
+            time.sleep(RETIRE_GRACE_SECONDS)
+            self._discard(previous)
+
+    def _build(
+        self,
+        job: IndexingJob,
+        pipeline: IngestionPipeline,
+        checkpoint: IngestionCheckpoint,
+        profiler: Optional[IngestionProfiler]
+    ) -> Dict[str, Any]:
+        return pipeline.run_resumable(
+            job.paths,
+            checkpoint,
+            force_recreate=True,
+            batch_files=self.batch_files,
+            profiler=profiler,
+            progress=lambda status: self._on_progress(job, status),
+            should_stop=lambda: job.cancel_requested
+        )
+
+    def _commit(self, job: IndexingJob) -> Optional[str]:
+        """Swap the staging index in; returns the index it replaced, if any."""
+        previous = get_active_index(settings.index_name)
+        set_active_index(job.staging_index, settings.index_name)
+        if self.on_commit:
+            self.on_commit(job)
+        log.info(f"Indexing job {job.id} committed: '{settings.index_name}' now served by '{job.staging_index}'")
+        return previous if previous != job.staging_index else None
+
+    def _discard(self, index_name: str):
+        """Delete an index that is not (or no longer) serving queries."""
+        try:
+            if self.client.index_exists(index_name):
+                self.client.delete_index(index_name)
+            delete_lexical_index(default_lexical_path(index_name))
+            default_manifest_path(index_name).unlink(missing_ok=True)
+        except Exception as e:
+            log.warning(f"Could not delete index '{index_name}': {e}")
@@ -1,7 +1,11 @@
 """Document loader for multiple file formats."""
 
+import hashlib
+import io
+from contextlib import contextmanager
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Any, Optional, BinaryIO, Iterator, Union
 import PyPDF2
 import docx
 import markdown
@@ -10,6 +14,88 @@ from bs4 import BeautifulSoup
 from ..utils import log
 
 
+# A document to load: a file path, or an open binary stream (e.g. an upload)
+Source = Union[str, Path, BinaryIO]
+
+# Block size for hashing and copying streams
+READ_BLOCK_SIZE = 1 << 20
+
+# Characters per text segment when streaming a document (working memory
+# while cleaning and chunking is a small multiple of this)
+TEXT_BLOCK_SIZE = 1 << 16
+
+# Markdown is converted in groups of blocks ending at a blank line; a group
+# without one is cut after this many blocks
+MARKDOWN_MAX_BLOCKS = 16
+
+
+def source_name(source: Source) -> str:
+    """File name of a path or stream (streams use their .name, if any)."""
+    if isinstance(source, (str, Path)):
+        return Path(source).name
+    return Path(getattr(source, "name", None) or "upload").name
+
+
+def source_size(source: Source) -> int:
+    """Size in bytes of a path or seekable stream (0 if unknown)."""
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        return path.stat().st_size if path.exists() else 0
+    size = getattr(source, "size", None)
+    if size is None:
+        position = source.tell()
+        size = source.seek(0, io.SEEK_END)
+        source.seek(position)
+    return size
+
+
+def content_hash(source: Source) -> str:
+    """
+    SHA-256 of a file or seekable stream, read in blocks.
+
+    Streams are read from the start and rewound afterwards, so the same
+    object can be parsed next.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            while block := f.read(READ_BLOCK_SIZE):
+                digest.update(block)
+    else:
+        source.seek(0)
+        while block := source.read(READ_BLOCK_SIZE):
+            digest.update(block)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Incremental HTML to text, skipping script and style contents."""
+
+    SKIPPED_TAGS = {"script", "style"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+    def drain(self) -> str:
+        text, self.parts = "".join(self.parts), []
+        return text
+
+
 class DocumentLoader:
     """Load documents from various file formats."""
     
@@ -19,6 +105,12 @@ class DocumentLoader:
         """Initialize the document loader."""
         self.documents = []
     
+    def load(self, source: Source) -> Optional[Dict[str, str]]:
+        """Load a file path or binary stream (see load_file and load_stream)."""
+        if isinstance(source, (str, Path)):
+            return self.load_file(Path(source))
+        return self.load_stream(source)
+    
     def load_file(self, file_path: Path) -> Optional[Dict[str, str]]:
         """
         Load a single file and extract text.
@@ -33,81 +125,126 @@ class DocumentLoader:
             log.error(f"File not found: {file_path}")
             return None
         
-        suffix = file_path.suffix.lower()
+        if file_path.suffix.lower() not in self.SUPPORTED_FORMATS:
+            log.warning(f"Unsupported file format: {file_path.suffix.lower()}")
+            return None
+        
+        try:
+            with open(file_path, 'rb') as file:
+                return self._parse(file, file_path.name, str(file_path))
+        except Exception as e:
+            log.error(f"Error loading {file_path.name}: {e}")
+            return None
+    
+    def load_stream(
+        self,
+        stream: BinaryIO,
+        filename: str = None,
+        source: str = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Load a document from an open binary stream, without touching disk.
+        
+        Parsers read the stream directly, so an upload is never copied to a
+        file and read back.
         
+        Args:
+            stream: Seekable binary stream (read from the start)
+            filename: File name, used for the format (defaults to stream.name)
+            source: Source recorded with the chunks (defaults to the file name)
+            
+        Returns:
+            Dictionary with metadata and text content
+        """
+        filename = filename or source_name(stream)
+        suffix = Path(filename).suffix.lower()
         if suffix not in self.SUPPORTED_FORMATS:
             log.warning(f"Unsupported file format: {suffix}")
             return None
         
         try:
-            if suffix == '.pdf':
-                text = self._load_pdf(file_path)
-            elif suffix == '.txt':
-                text = self._load_txt(file_path)
-            elif suffix == '.md':
-                text = self._load_markdown(file_path)
-            elif suffix == '.docx':
-                text = self._load_docx(file_path)
-            elif suffix == '.html':
-                text = self._load_html(file_path)
-            else:
-                return None
-            
-            if text:
-                log.info(f"Loaded {file_path.name}: {len(text)} characters")
-                return {
-                    "source": str(file_path),
-                    "filename": file_path.name,
-                    "format": suffix,
-                    "text": text
-                }
-            else:
-                log.warning(f"No text extracted from {file_path.name}")
-                return None
-                
+            stream.seek(0)
+            return self._parse(stream, filename, source or filename)
         except Exception as e:
-            log.error(f"Error loading {file_path.name}: {e}")
+            log.error(f"Error loading {filename}: {e}")
             return None
     
-    def _load_pdf(self, file_path: Path) -> str:
+    def load_bytes(self, data: bytes, filename: str, source: str = None) -> Optional[Dict[str, str]]:
+        """Load a document from bytes in memory (see load_stream)."""
+        return self.load_stream(io.BytesIO(data), filename, source)
+    
+    def _parse(self, stream: BinaryIO, filename: str, source: str) -> Optional[Dict[str, str]]:
+        """Extract text from a binary stream by file extension."""
+        suffix = Path(filename).suffix.lower()
+        if suffix == '.pdf':
+            text = self._load_pdf(stream)
+        elif suffix == '.txt':
+            text = self._load_txt(stream)
+        elif suffix == '.md':
+            text = self._load_markdown(stream)
+        elif suffix == '.docx':
+            text = self._load_docx(stream)
+        elif suffix == '.html':
+            text = self._load_html(stream)
+        else:
+            return None
+        
+        if text:
+            log.info(f"Loaded {filename}: {len(text)} characters")
+            return {
+                "source": source,
+                "filename": filename,
+                "format": suffix,
+                "text": text
+            }
+        else:
+            log.warning(f"No text extracted from {filename}")
+            return None
+    
+    @staticmethod
+    def _read_text(stream: BinaryIO) -> str:
+        """Decode a binary stream as UTF-8 without closing it."""
+        wrapper = io.TextIOWrapper(stream, encoding='utf-8', errors='ignore')
+        try:
+            return wrapper.read()
+        finally:
+            wrapper.detach()
+    
+    def _load_pdf(self, stream: BinaryIO) -> str:
         """Load PDF file."""
         text = []
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text.append(page_text)
+        pdf_reader = PyPDF2.PdfReader(stream)
+        for page in pdf_reader.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text.append(page_text)
         return "\n\n".join(text)
     
-    def _load_txt(self, file_path: Path) -> str:
+    def _load_txt(self, stream: BinaryIO) -> str:
         """Load text file."""
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            return file.read()
+        return self._read_text(stream)
     
-    def _load_markdown(self, file_path: Path) -> str:
+    def _load_markdown(self, stream: BinaryIO) -> str:
         """Load Markdown file and convert to plain text."""
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            md_content = file.read()
+        md_content = self._read_text(stream)
         
         # Convert markdown to HTML then to plain text
         html = markdown.markdown(md_content)
         soup = BeautifulSoup(html, 'html.parser')
         return soup.get_text()
     
-    def _load_docx(self, file_path: Path) -> str:
+    def _load_docx(self, stream: BinaryIO) -> str:
         """Load DOCX file."""
-        doc = docx.Document(file_path)
+        doc = docx.Document(stream)
         text = []
         for paragraph in doc.paragraphs:
             if paragraph.text.strip():
                 text.append(paragraph.text)
         return "\n\n".join(text)
     
-    def _load_html(self, file_path: Path) -> str:
+    def _load_html(self, stream: BinaryIO) -> str:
         """Load HTML file."""
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            html_content = file.read()
+        html_content = self._read_text(stream)
         
         soup = BeautifulSoup(html_content, 'html.parser')
         
@@ -117,6 +254,130 @@ class DocumentLoader:
         
         return soup.get_text()
     
+    @contextmanager
+    def _open(self, source: Source) -> Iterator[BinaryIO]:
+        """Open a path, or rewind a stream, for reading."""
+        if isinstance(source, (str, Path)):
+            with open(source, 'rb') as file:
+                yield file
+        else:
+            source.seek(0)
+            yield source
+    
+    def stream_document(self, source: Source, block_size: int = TEXT_BLOCK_SIZE) -> Optional[Dict[str, Any]]:
+        """
+        Open a document for incremental reading.
+        
+        Instead of 'text', the result has 'segments': an iterator of text
+        pieces in document order, read lazily about `block_size` characters
+        at a time. Plain text and HTML are read in blocks, Markdown block by
+        block, PDF page by page and DOCX paragraph by paragraph, so a large
+        file is never held in memory as one string. Pair it with
+        TextCleaner.iter_preprocess and TextChunker.iter_chunks_by_tokens.
+        
+        Args:
+            source: File path or seekable binary stream
+            block_size: Approximate characters per segment
+            
+        Returns:
+            Dictionary with metadata and 'segments', or None if unsupported
+        """
+        filename = source_name(source)
+        suffix = Path(filename).suffix.lower()
+        if suffix not in self.SUPPORTED_FORMATS:
+            log.warning(f"Unsupported file format: {suffix}")
+            return None
+        if isinstance(source, (str, Path)) and not Path(source).exists():
+            log.error(f"File not found: {source}")
+            return None
+        
+        readers = {
+            '.pdf': self._iter_pdf,
+            '.txt': self._iter_txt,
+            '.md': self._iter_markdown,
+            '.docx': self._iter_docx,
+            '.html': self._iter_html
+        }
+        return {
+            "source": str(source) if isinstance(source, (str, Path)) else filename,
+            "filename": filename,
+            "format": suffix,
+            "segments": self._iter_segments(source, readers[suffix], block_size)
+        }
+    
+    def _iter_segments(self, source: Source, reader, block_size: int) -> Iterator[str]:
+        with self._open(source) as stream:
+            yield from reader(stream, block_size)
+    
+    @staticmethod
+    def _iter_blocks(stream: BinaryIO, block_size: int) -> Iterator[str]:
+        """Decode a binary stream as UTF-8 in blocks, without closing it."""
+        wrapper = io.TextIOWrapper(stream, encoding='utf-8', errors='ignore')
+        try:
+            while block := wrapper.read(block_size):
+                yield block
+        finally:
+            wrapper.detach()
+    
+    def _iter_txt(self, stream: BinaryIO, block_size: int) -> Iterator[str]:
+        yield from self._iter_blocks(stream, block_size)
+    
+    def _iter_html(self, stream: BinaryIO, block_size: int) -> Iterator[str]:
+        parser = _HTMLTextExtractor()
+        for block in self._iter_blocks(stream, block_size):
+            parser.feed(block)
+            text = parser.drain()
+            if text:
+                yield text
+        parser.close()
+        text = parser.drain()
+        if text:
+            yield text
+    
+    def _iter_markdown(self, stream: BinaryIO, block_size: int) -> Iterator[str]:
+        """Convert Markdown in groups of blocks, split at blank lines outside code fences."""
+        lines: List[str] = []
+        size = 0
+        fenced = False
+        for block in self._iter_blocks(stream, block_size):
+            for line in block.splitlines(keepends=True):
+                if lines and not lines[-1].endswith("\n"):
+                    lines[-1] += line  # a line cut by the block boundary
+                else:
+                    lines.append(line)
+                size += len(line)
+                if line.lstrip().startswith(("```", "~~~")):
+                    fenced = not fenced
+                if size >= block_size and not fenced and lines[-1].strip() == "" and line.endswith("\n"):
+                    yield self._markdown_text("".join(lines)) + "\n"
+                    lines, size = [], 0
+                elif size >= MARKDOWN_MAX_BLOCKS * block_size:
+                    # No blank line (or an unclosed fence) for too long: cut anyway
+                    yield self._markdown_text("".join(lines))
+                    lines, size = [], 0
+        if lines:
+            yield self._markdown_text("".join(lines))
+    
+    @staticmethod
+    def _markdown_text(md_content: str) -> str:
+        html = markdown.markdown(md_content)
+        return BeautifulSoup(html, 'html.parser').get_text()
+    
+    def _iter_pdf(self, stream: BinaryIO, block_size: int) -> Iterator[str]:
+        first = True
+        for page in PyPDF2.PdfReader(stream).pages:
+            page_text = page.extract_text()
+            if page_text:
+                yield page_text if first else "\n\n" + page_text
+                first = False
+    
+    def _iter_docx(self, stream: BinaryIO, block_size: int) -> Iterator[str]:
+        first = True
+        for paragraph in docx.Document(stream).paragraphs:
+            if paragraph.text.strip():
+                yield paragraph.text if first else "\n\n" + paragraph.text
+                first = False
+    
     def load_directory(self, directory: Path, recursive: bool = True) -> List[Dict[str, str]]:
         """
         Load all supported documents from a directory.
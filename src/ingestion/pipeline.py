@@ -0,0 +1,534 @@
+"""End-to-end ingestion: load, clean, chunk, embed and index documents."""
+
+import itertools
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional, Sequence, Tuple
+
+from .loader import DocumentLoader, Source, source_name, source_size, content_hash
+from .cleaner import TextCleaner
+from .chunker import TextChunker
+from .profiler import IngestionProfiler
+from .checkpoint import IngestionCheckpoint
+from ..embeddings import EmbeddingModel
+from ..vector_store import VectorIndexer
+from ..utils import settings, log
+
+
+# Chunks embedded and upserted together while streaming a large file
+STREAM_CHUNK_BATCH = 256
+
+
+class IngestionCancelled(Exception):
+    """Raised by run_resumable when asked to stop between batches."""
+
+
+class IngestionPipeline:
+    """Index a set of files into Endee, timing every stage."""
+
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel = None,
+        indexer: VectorIndexer = None,
+        loader: DocumentLoader = None,
+        cleaner: TextCleaner = None,
+        chunker: TextChunker = None,
+        strategy: str = "tokens",
+        embed_batch_size: int = 32,
+        stream_min_bytes: int = None
+    ):
+        """
+        Initialize ingestion pipeline.
+
+        Args:
+            embedding_model: Embedding model for chunks
+            indexer: Vector indexer
+            loader: Document loader
+            cleaner: Text cleaner
+            chunker: Text chunker
+            strategy: Chunking strategy ('tokens' or 'sentences')
+            embed_batch_size: Batch size for chunk embedding
+            stream_min_bytes: In run_resumable, files at least this large
+                are streamed (read, chunked and indexed incrementally) so
+                memory stays bounded; 0 disables (defaults to
+                settings.stream_ingest_min_bytes)
+        """
+        self.embedding_model = embedding_model or EmbeddingModel()
+        self.indexer = indexer or VectorIndexer()
+        self.loader = loader or DocumentLoader()
+        self.cleaner = cleaner or TextCleaner()
+        self.chunker = chunker or TextChunker()
+        self.strategy = strategy
+        self.embed_batch_size = embed_batch_size
+        self.stream_min_bytes = (
+            settings.stream_ingest_min_bytes if stream_min_bytes is None else stream_min_bytes
+        )
+
+    def run(
+        self,
+        paths: Sequence[Source],
+        force_recreate: bool = True,
+        profiler: Optional[IngestionProfiler] = None
+    ) -> Dict[str, Any]:
+        """
+        Load, clean, chunk, embed and index files.
+
+        Files with identical content are indexed once; the copies are
+        found by hash before anything is parsed.
+
+        Args:
+            paths: Files (paths or binary streams such as uploads) to index
+            force_recreate: Whether to delete and recreate the index first
+            profiler: Profiler recording per-file and per-stage timings
+                (a lightweight one without memory tracing is used if None)
+
+        Returns:
+            Dictionary with 'documents', 'chunks', 'indexed', 'failed' (file
+            names), 'duplicates' (file name to the name of the file with
+            the same content) and 'stages' (seconds per stage)
+        """
+        profiler = profiler or IngestionProfiler(trace_memory=False)
+        documents: List[Dict[str, Any]] = []
+        all_chunks: List[Dict[str, Any]] = []
+        owners: List[str] = []  # file of each chunk
+        failed: List[str] = []
+
+        with profiler.stage("dedup"):
+            sources, _, duplicates = self.deduplicate(self._sources(paths))
+
+        # Per file: parse, clean and chunk (tokenization happens while chunking)
+        for source in sources:
+            loaded = self._load_file(source, profiler)
+            if not loaded:
+                failed.append(source_name(source))
+                continue
+            doc, chunks = loaded
+            documents.append(doc)
+            all_chunks.extend(chunks)
+            owners.extend([self._owner(source)] * len(chunks))
+
+        result = {
+            "documents": documents, "chunks": len(all_chunks), "indexed": 0, "failed": failed,
+            "duplicates": {source_name(source): original for source, original in duplicates}
+        }
+        if not all_chunks:
+            log.warning("No chunks to index")
+            result["stages"] = {k: round(v["seconds"], 4) for k, v in profiler.stages.items()}
+            return result
+
+        embeddings = self._embed(all_chunks, owners, profiler)
+
+        with profiler.stage("index_setup"):
+            self.indexer.setup_index(force_recreate=force_recreate)
+
+        result["indexed"] = self._upsert(all_chunks, embeddings, owners, profiler)
+        with profiler.stage("flush"):
+            self.indexer.flush()
+
+        result["stages"] = {k: round(v["seconds"], 4) for k, v in profiler.stages.items()}
+        log.info(
+            f"Indexed {result['indexed']} chunks from {len(documents)} documents: "
+            + ", ".join(f"{k} {v:.2f}s" for k, v in result["stages"].items())
+        )
+        return result
+
+    def run_resumable(
+        self,
+        paths: Sequence[Source],
+        checkpoint: IngestionCheckpoint,
+        force_recreate: bool = False,
+        batch_files: int = 16,
+        checkpoint_every: int = 1,
+        profiler: Optional[IngestionProfiler] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Index files in batches, checkpointing completed files so an
+        interrupted run can be resumed by calling this again.
+
+        Files the checkpoint already records (unchanged since) are skipped,
+        and so are files whose content (by hash, before parsing) matches a
+        file already indexed in this run or an earlier one. The index is
+        only recreated when the checkpoint has not set it up yet, so
+        resuming never wipes work already done.
+
+        Args:
+            paths: Files (paths or binary streams such as uploads) to index
+            checkpoint: Checkpoint to resume from and update
+            force_recreate: Whether to delete and recreate the index when
+                starting a fresh run
+            batch_files: Files embedded and upserted together
+            checkpoint_every: Save the checkpoint every N batches
+            profiler: Profiler recording per-file and per-stage timings
+            progress: Called after each batch with progress counters
+                (files, chunks, vectors, bytes, elapsed, rates and ETA)
+            should_stop: Checked before each batch; returning True stops
+                the run after saving the checkpoint
+
+        Returns:
+            Dictionary with 'documents' (files indexed in this call),
+            'files' (their names), 'skipped', 'duplicates', 'chunks',
+            'indexed', 'failed' and 'stages'
+
+        Raises:
+            RuntimeError: If a batch could not be fully upserted (the
+                checkpoint is saved first, so the run can be resumed)
+            IngestionCancelled: If should_stop returned True
+        """
+        profiler = profiler or IngestionProfiler(trace_memory=False)
+        if checkpoint.index_ready and not self.indexer.client.index_exists(self.indexer.index_name):
+            log.warning(f"Index '{self.indexer.index_name}' no longer exists; discarding checkpointed progress")
+            checkpoint.files, checkpoint.batches, checkpoint.chunks_indexed = {}, 0, 0
+            checkpoint.index_ready = False
+
+        sources = self._sources(paths)
+        pending = [source for source in sources if not checkpoint.is_done(source)]
+        with profiler.stage("dedup"):
+            pending, hashes, duplicates = self.deduplicate(pending, known=checkpoint.hashes())
+        for source, original in duplicates:
+            checkpoint.mark_duplicate(source, original)
+        result = {
+            "documents": 0, "files": [], "skipped": len(sources) - len(pending) - len(duplicates),
+            "duplicates": {source_name(source): original for source, original in duplicates},
+            "chunks": 0, "indexed": 0, "failed": []
+        }
+
+        with profiler.stage("index_setup"):
+            self.indexer.setup_index(force_recreate=force_recreate and not checkpoint.index_ready)
+        checkpoint.index_ready = True
+        checkpoint.completed = False
+        checkpoint.save()
+
+        total_bytes = sum(source_size(source) for source in pending)
+        done_bytes, start = 0, time.perf_counter()
+        for batch_number, first in enumerate(range(0, len(pending), batch_files), 1):
+            if should_stop and should_stop():
+                self.save_checkpoint(checkpoint, profiler)
+                raise IngestionCancelled(f"Stopped after {first} of {len(pending)} files")
+            batch = pending[first:first + batch_files]
+            chunks: List[Dict[str, Any]] = []
+            owners: List[str] = []
+            indexed_files: List[Tuple[Source, int, Optional[str]]] = []
+            versions: List[Tuple[str, List[int]]] = []
+            for source, digest in zip(batch, hashes[first:first + batch_files]):
+                if self._should_stream(source):
+                    streamed = self._index_streaming(source, checkpoint, profiler)
+                    if not streamed:
+                        result["failed"].append(source_name(source))
+                        checkpoint.mark_failed(source, "no text extracted")
+                        continue
+                    doc_source, chunk_ids, indexed = streamed
+                    result["chunks"] += len(chunk_ids)
+                    result["indexed"] += indexed
+                    checkpoint.chunks_indexed += indexed
+                    indexed_files.append((source, len(chunk_ids), digest))
+                    versions.append((doc_source, chunk_ids))
+                    continue
+
+                loaded = self._load_file(source, profiler)
+                if not loaded:
+                    result["failed"].append(source_name(source))
+                    checkpoint.mark_failed(source, "no text extracted")
+                    continue
+                doc, file_chunks = loaded
+                chunks.extend(file_chunks)
+                owners.extend([self._owner(source)] * len(file_chunks))
+                indexed_files.append((source, len(file_chunks), digest))
+                versions.append((doc["source"], [chunk["chunk_id"] for chunk in file_chunks]))
+
+            if chunks:
+                embeddings = self._embed(chunks, owners, profiler)
+                indexed = self._upsert(chunks, embeddings, owners, profiler)
+                if indexed < len(chunks):
+                    self.save_checkpoint(checkpoint, profiler)
+                    raise RuntimeError(
+                        f"Upserted {indexed} of {len(chunks)} chunks in batch {checkpoint.batches + 1}; "
+                        f"re-run to resume from the checkpoint"
+                    )
+                result["chunks"] += len(chunks)
+                result["indexed"] += indexed
+                checkpoint.chunks_indexed += indexed
+
+            # Edited files that got shorter leave chunks behind
+            for doc_source, chunk_ids in versions:
+                self.indexer.prune_document(doc_source, chunk_ids)
+
+            for source, count, digest in indexed_files:
+                checkpoint.mark_done(source, count, sha256=digest)
+                result["files"].append(source_name(source))
+            result["documents"] += len(indexed_files)
+            checkpoint.batches += 1
+            if batch_number % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint, profiler)
+
+            done_bytes += sum(source_size(source) for source in batch)
+            if progress:
+                elapsed = time.perf_counter() - start
+                byte_rate = done_bytes / elapsed if elapsed else 0.0
+                progress({
+                    "files_done": first + len(batch),
+                    "files_total": len(pending),
+                    "chunks": result["chunks"],
+                    "vectors": result["indexed"],
+                    "bytes_done": done_bytes,
+                    "bytes_total": total_bytes,
+                    "elapsed": elapsed,
+                    "chunks_per_second": result["chunks"] / elapsed if elapsed else 0.0,
+                    "vectors_per_second": result["indexed"] / elapsed if elapsed else 0.0,
+                    "bytes_per_second": byte_rate,
+                    "eta": (total_bytes - done_bytes) / byte_rate if byte_rate else None
+                })
+
+        checkpoint.completed = True
+        self.save_checkpoint(checkpoint, profiler)
+        result["stages"] = {k: round(v["seconds"], 4) for k, v in profiler.stages.items()}
+        log.info(
+            f"Indexed {result['indexed']} chunks from {result['documents']} documents "
+            f"({result['skipped']} already indexed, {len(result['duplicates'])} duplicates, "
+            f"{len(result['failed'])} failed)"
+        )
+        return result
+
+    def update_documents(
+        self,
+        paths: Sequence[Source],
+        profiler: Optional[IngestionProfiler] = None
+    ) -> Dict[str, Any]:
+        """
+        Update documents in an existing index in place.
+
+        Each file is re-chunked and compared with what is stored for it:
+        only changed chunks are embedded and upserted, and chunks the new
+        version no longer has are deleted (see VectorIndexer.replace_document).
+
+        Args:
+            paths: Files (paths or binary streams) to update or add
+            profiler: Profiler recording per-file and per-stage timings
+
+        Returns:
+            Dictionary with 'documents', 'files' (chunks per updated file),
+            'upserted', 'unchanged', 'deleted', 'failed' (file names) and
+            'stages'
+        """
+        profiler = profiler or IngestionProfiler(trace_memory=False)
+        with profiler.stage("index_setup"):
+            self.indexer.setup_index()
+
+        result = {"documents": 0, "files": {}, "upserted": 0, "unchanged": 0, "deleted": 0, "failed": []}
+        try:
+            for source in self._sources(paths):
+                loaded = self._load_file(source, profiler)
+                if not loaded:
+                    result["failed"].append(source_name(source))
+                    continue
+                doc, chunks = loaded
+                owner = self._owner(source)
+                with profiler.stage("update", owner):
+                    counts = self.indexer.replace_document(
+                        doc["source"],
+                        chunks,
+                        embed=lambda texts: self.embedding_model.encode_batch(texts, batch_size=self.embed_batch_size)
+                    )
+                result["documents"] += 1
+                result["files"][owner] = len(chunks)
+                for key, count in counts.items():
+                    result[key] += count
+        finally:
+            with profiler.stage("flush"):
+                self.indexer.flush()
+
+        result["stages"] = {k: round(v["seconds"], 4) for k, v in profiler.stages.items()}
+        log.info(
+            f"Updated {result['documents']} documents: {result['upserted']} chunks upserted, "
+            f"{result['unchanged']} unchanged, {result['deleted']} deleted"
+        )
+        return result
+
+    def save_checkpoint(self, checkpoint: IngestionCheckpoint, profiler: Optional[IngestionProfiler] = None):
+        """
+        Persist the indexer's buffered changes, then the checkpoint.
+
+        Files the checkpoint marks done rely on their lexical entries and
+        manifest rows, so callers that save a checkpoint themselves (e.g.
+        after an interrupt) should save it through this.
+
+        Args:
+            checkpoint: Checkpoint to save
+            profiler: Profiler to record the flush in
+        """
+        if profiler:
+            with profiler.stage("flush"):
+                self.indexer.flush()
+        else:
+            self.indexer.flush()
+        checkpoint.save()
+
+    def _should_stream(self, source: Source) -> bool:
+        if not self.stream_min_bytes or self.strategy != "tokens":
+            return False
+        return source_size(source) >= self.stream_min_bytes
+
+    def _index_streaming(
+        self,
+        source: Source,
+        checkpoint: IngestionCheckpoint,
+        profiler: IngestionProfiler
+    ) -> Optional[Tuple[str, List[int], int]]:
+        """
+        Read, clean, chunk, embed and upsert one large file incrementally.
+
+        Chunks are produced from a stream of text segments and indexed every
+        STREAM_CHUNK_BATCH chunks, so memory is bounded by the batch, not the
+        file. Returns (document source, chunk numbers, chunks indexed), or
+        None if no text could be extracted. The checkpoint is saved before
+        a partial upsert is raised, as in run_resumable.
+        """
+        name = self._owner(source)
+        with profiler.stage("load", name) as record:
+            record["bytes"] = source_size(source)
+            doc = self.loader.stream_document(source)
+        if not doc:
+            profiler.fail(name, "no text extracted")
+            return None
+
+        metadata = {k: v for k, v in doc.items() if k != "segments"}
+        chunks = self.chunker.iter_chunks_by_tokens(self.cleaner.iter_preprocess(doc["segments"]), metadata)
+        chunk_ids: List[int] = []
+        indexed = 0
+        while True:
+            # Reading, cleaning and chunking happen lazily while the batch is pulled
+            try:
+                with profiler.stage("stream", name) as record:
+                    batch = list(itertools.islice(chunks, STREAM_CHUNK_BATCH))
+                    record["chunks"] = len(batch)
+                    record["tokens"] = int(sum(
+                        chunk.get("token_count") or chunk.get("char_count", 0) / 4 for chunk in batch
+                    ))
+            except Exception as e:
+                log.error(f"Error streaming {name}: {e}")
+                if chunk_ids:
+                    self.indexer.delete_chunks(doc["source"], chunk_ids)
+                profiler.fail(name, str(e))
+                return None
+            if not batch:
+                break
+
+            owners = [name] * len(batch)
+            embeddings = self._embed(batch, owners, profiler)
+            count = self._upsert(batch, embeddings, owners, profiler)
+            if count < len(batch):
+                self.save_checkpoint(checkpoint, profiler)
+                raise RuntimeError(f"Upserted {count} of {len(batch)} chunks of {name}; re-run to resume")
+            indexed += count
+            chunk_ids.extend(chunk["chunk_id"] for chunk in batch)
+
+        if not chunk_ids:
+            profiler.fail(name, "no text extracted")
+            return None
+        log.info(f"Streamed {name}: {len(chunk_ids)} chunks")
+        return doc["source"], chunk_ids, indexed
+
+    @staticmethod
+    def _sources(paths: Sequence[Source]) -> List[Source]:
+        return [Path(source) if isinstance(source, str) else source for source in paths]
+
+    @staticmethod
+    def _owner(source: Source) -> str:
+        """Name a source in profiles: its path, or the name of a stream."""
+        return str(source) if isinstance(source, Path) else source_name(source)
+
+    @staticmethod
+    def deduplicate(
+        sources: Sequence[Source],
+        known: Optional[Dict[str, str]] = None
+    ) -> Tuple[List[Source], List[Optional[str]], List[Tuple[Source, str]]]:
+        """
+        Drop sources whose content was already seen, by hash and before parsing.
+
+        Args:
+            sources: Files or seekable streams
+            known: Content hash to file name of documents already indexed
+
+        Returns:
+            Tuple of (unique sources, their content hashes, and (duplicate,
+            name of the file with the same content) pairs)
+        """
+        seen = dict(known or {})
+        unique: List[Source] = []
+        hashes: List[Optional[str]] = []
+        duplicates: List[Tuple[Source, str]] = []
+        for source in sources:
+            try:
+                digest = content_hash(source)
+            except OSError:
+                digest = None  # unreadable; loading reports the error
+            if digest is not None and digest in seen:
+                log.info(f"Skipping {source_name(source)}: same content as {seen[digest]}")
+                duplicates.append((source, seen[digest]))
+                continue
+            if digest is not None:
+                seen[digest] = source_name(source)
+            unique.append(source)
+            hashes.append(digest)
+        return unique, hashes, duplicates
+
+    def _load_file(
+        self,
+        source: Source,
+        profiler: IngestionProfiler
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Parse, clean and chunk one file or stream; returns (document, chunks) or None."""
+        name = self._owner(source)
+        with profiler.stage("load", name) as record:
+            record["bytes"] = source_size(source)
+            doc = self.loader.load(source)
+        if not doc:
+            profiler.fail(name, "no text extracted")
+            return None
+
+        with profiler.stage("clean", name):
+            doc["text"] = self.cleaner.preprocess(doc["text"])
+
+        with profiler.stage("chunk", name) as record:
+            chunks = self.chunker.chunk_document(doc, strategy=self.strategy)
+            record["chunks"] = len(chunks)
+            record["tokens"] = int(sum(
+                chunk.get("token_count") or chunk.get("char_count", len(chunk["text"])) / 4 for chunk in chunks
+            ))
+        return doc, chunks
+
+    @staticmethod
+    def _shares(chunks: List[Dict[str, Any]], owners: List[str]) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Tokens and chunks per file, used to attribute batched stages."""
+        token_shares: Dict[str, float] = {}
+        chunk_shares: Dict[str, float] = {}
+        for owner, chunk in zip(owners, chunks):
+            tokens = chunk.get("token_count") or chunk.get("char_count", len(chunk["text"])) / 4
+            token_shares[owner] = token_shares.get(owner, 0) + tokens
+            chunk_shares[owner] = chunk_shares.get(owner, 0) + 1
+        return token_shares, chunk_shares
+
+    def _embed(self, chunks: List[Dict[str, Any]], owners: List[str], profiler: IngestionProfiler) -> List[List[float]]:
+        """Embed chunks in batches, attributed to files by token share."""
+        token_shares, _ = self._shares(chunks, owners)
+        texts = [chunk["text"] for chunk in chunks]
+        with profiler.stage("embed", shares=token_shares) as record:
+            embeddings = self.embedding_model.encode_batch(texts, batch_size=self.embed_batch_size)
+            record["chunks"] = len(texts)
+            record["tokens"] = int(sum(token_shares.values()))
+        return embeddings
+
+    def _upsert(
+        self,
+        chunks: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        owners: List[str],
+        profiler: IngestionProfiler
+    ) -> int:
+        """Upsert chunks, attributed to files by chunk share."""
+        _, chunk_shares = self._shares(chunks, owners)
+        with profiler.stage("upsert", shares=chunk_shares) as record:
+            indexed = self.indexer.upsert_chunks(chunks, embeddings)
+            record["chunks"] = indexed
+        return indexed
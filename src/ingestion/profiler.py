@@ -0,0 +1,385 @@
+"""Ingestion profiling: per-file and per-stage wall time, volume and memory."""
+
+import html
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+from ..utils import log
+
+
+# Volume counters recorded per stage and per file
+COUNTERS = ("bytes", "tokens", "chunks")
+
+
+class StackSampler:
+    """
+    Sampling profiler for one thread using only the standard library.
+
+    A daemon thread reads the target thread's stack via
+    sys._current_frames() every `interval` seconds and counts each
+    function (self time) and every function on the stack (cumulative).
+    Overhead stays low and independent of how many calls the code makes,
+    unlike cProfile.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        """
+        Initialize stack sampler.
+
+        Args:
+            interval: Seconds between samples
+            thread_id: Thread to sample (defaults to the calling thread)
+        """
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ingest-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def top(self, limit: int = 25) -> Dict[str, List[Dict[str, Any]]]:
+        """Functions with the most self and cumulative samples."""
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                cumulative[function] += count
+
+        def rows(counter: Counter) -> List[Dict[str, Any]]:
+            return [
+                {
+                    "function": function,
+                    "samples": count,
+                    "share": round(count / self.samples, 4) if self.samples else 0.0
+                }
+                for function, count in counter.most_common(limit)
+            ]
+
+        return {"self": rows(own), "cumulative": rows(cumulative)}
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format ("a;b;c count"), readable by flamegraph tools."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+
+class IngestionProfiler:
+    """
+    Record where ingestion time and memory go, per file and per stage.
+
+    Wrap each step in `stage()`. Stages attributed to one file update that
+    file's totals. Batched stages such as embedding and upserting cover many
+    files; their time is split across files in proportion to `shares`
+    (e.g. tokens or chunks per file). Peak memory comes from tracemalloc,
+    which only sees Python allocations, not native tensor buffers.
+    """
+
+    def __init__(self, trace_memory: bool = True, sample_interval: Optional[float] = None):
+        """
+        Initialize ingestion profiler.
+
+        Args:
+            trace_memory: Track peak Python memory per stage with tracemalloc
+            sample_interval: Seconds between stack samples (None disables sampling)
+        """
+        self.trace_memory = trace_memory
+        self.sample_interval = sample_interval
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.sampler: Optional[StackSampler] = None
+        self._started_at: Optional[str] = None
+        self._start: Optional[float] = None
+        self._wall: float = 0.0
+        self._own_tracemalloc = False
+
+    def start(self) -> "IngestionProfiler":
+        """Start the wall clock, memory tracing and sampling."""
+        self._started_at = datetime.now().isoformat(timespec="seconds")
+        self._start = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        if self.sample_interval:
+            self.sampler = StackSampler(self.sample_interval)
+            self.sampler.start()
+        return self
+
+    def stop(self):
+        """Stop the wall clock, memory tracing and sampling."""
+        if self._start is not None:
+            self._wall = time.perf_counter() - self._start
+            self._start = None
+        if self.sampler:
+            self.sampler.stop()
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+            self._own_tracemalloc = False
+
+    def __enter__(self) -> "IngestionProfiler":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def file(self, name: str) -> Dict[str, Any]:
+        """Per-file record (created on first use)."""
+        if name not in self.files:
+            self.files[name] = {
+                "file": name,
+                "seconds": 0.0,
+                **{counter: 0 for counter in COUNTERS},
+                "peak_memory_mb": 0.0,
+                "stages": {},
+                "error": None
+            }
+        return self.files[name]
+
+    @contextmanager
+    def stage(self, name: str, file: Optional[str] = None, shares: Optional[Dict[str, float]] = None):
+        """
+        Time one ingestion step.
+
+        Args:
+            name: Stage name (load, clean, chunk, embed, upsert, ...)
+            file: File the step belongs to
+            shares: For batched steps, weight of each file in the batch
+
+        Yields:
+            Dict the caller fills with 'bytes', 'tokens' and 'chunks'
+        """
+        record = {counter: 0 for counter in COUNTERS}
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20 if tracing else 0.0
+            self._record(name, seconds, peak_mb, record, file, shares)
+
+    def _record(
+        self,
+        name: str,
+        seconds: float,
+        peak_mb: float,
+        record: Dict[str, int],
+        file: Optional[str],
+        shares: Optional[Dict[str, float]]
+    ):
+        stage = self.stages.setdefault(name, {
+            "seconds": 0.0,
+            "calls": 0,
+            **{counter: 0 for counter in COUNTERS},
+            "peak_memory_mb": 0.0
+        })
+        stage["seconds"] += seconds
+        stage["calls"] += 1
+        stage["peak_memory_mb"] = max(stage["peak_memory_mb"], peak_mb)
+        for counter in COUNTERS:
+            stage[counter] += record.get(counter, 0)
+
+        if file is not None:
+            shares = {file: 1.0}
+            self.file(file)
+            for counter in COUNTERS:
+                self.files[file][counter] += record.get(counter, 0)
+
+        total = sum((shares or {}).values())
+        for owner, weight in (shares or {}).items():
+            entry = self.file(owner)
+            portion = seconds * weight / total if total else 0.0
+            entry["seconds"] += portion
+            entry["stages"][name] = entry["stages"].get(name, 0.0) + portion
+            entry["peak_memory_mb"] = max(entry["peak_memory_mb"], peak_mb)
+
+    def fail(self, file: str, error: str):
+        """Mark a file as failed (e.g. nothing could be extracted)."""
+        self.file(file)["error"] = error
+
+    def report(self, slowest: int = 10) -> Dict[str, Any]:
+        """
+        Summarize the run.
+
+        Args:
+            slowest: Number of slowest files to name
+
+        Returns:
+            Dictionary with totals, throughput, per-stage and per-file
+            breakdowns (slowest first) and, when sampling, top functions
+        """
+        wall = self._wall or (time.perf_counter() - self._start if self._start else 0.0)
+        staged = sum(stage["seconds"] for stage in self.stages.values()) or 1e-12
+        totals = {counter: sum(f[counter] for f in self.files.values()) for counter in COUNTERS}
+
+        def rate(amount: float, seconds: float) -> float:
+            return round(amount / seconds, 2) if seconds > 0 else 0.0
+
+        stages = {
+            name: {
+                **{k: v for k, v in stage.items() if k != "seconds"},
+                "seconds": round(stage["seconds"], 4),
+                "share": round(stage["seconds"] / staged, 4),
+                "peak_memory_mb": round(stage["peak_memory_mb"], 2),
+                "mb_per_s": rate(stage["bytes"] / 2 ** 20, stage["seconds"]),
+                "tokens_per_s": rate(stage["tokens"], stage["seconds"]),
+                "chunks_per_s": rate(stage["chunks"], stage["seconds"])
+            }
+            for name, stage in sorted(self.stages.items(), key=lambda item: -item[1]["seconds"])
+        }
+
+        files = sorted(self.files.values(), key=lambda f: -f["seconds"])
+        files = [
+            {
+                **f,
+                "seconds": round(f["seconds"], 4),
+                "peak_memory_mb": round(f["peak_memory_mb"], 2),
+                "stages": {k: round(v, 4) for k, v in sorted(f["stages"].items(), key=lambda kv: -kv[1])},
+                "tokens_per_s": rate(f["tokens"], f["seconds"])
+            }
+            for f in files
+        ]
+
+        report = {
+            "started_at": self._started_at,
+            "wall_seconds": round(wall, 4),
+            "files": len(self.files),
+            "failed_files": [f["file"] for f in files if f["error"]],
+            **totals,
+            "throughput": {
+                "files_per_s": rate(len(self.files), wall),
+                "mb_per_s": rate(totals["bytes"] / 2 ** 20, wall),
+                "tokens_per_s": rate(totals["tokens"], wall),
+                "chunks_per_s": rate(totals["chunks"], wall)
+            },
+            "peak_memory_mb": round(max((s["peak_memory_mb"] for s in self.stages.values()), default=0.0), 2),
+            "slowest_stages": list(stages)[:slowest],
+            "slowest_files": [f["file"] for f in files[:slowest]],
+            "stages": stages,
+            "per_file": files
+        }
+        if self.sampler:
+            report["profile"] = {
+                "interval_ms": round(self.sampler.interval * 1000, 2),
+                "samples": self.sampler.samples,
+                **self.sampler.top()
+            }
+        return report
+
+    def write(self, output_dir: Path, name: Optional[str] = None) -> Tuple[Path, Path]:
+        """
+        Write the report as JSON and HTML (and collapsed stacks when sampling).
+
+        Args:
+            output_dir: Directory for the report files
+            name: File stem (defaults to a timestamp)
+
+        Returns:
+            Tuple of (JSON path, HTML path)
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        name = name or f"ingestion_{datetime.now():%Y%m%d_%H%M%S}"
+        report = self.report()
+
+        json_path = output_dir / f"{name}.json"
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        html_path = output_dir / f"{name}.html"
+        html_path.write_text(render_html(report), encoding="utf-8")
+        if self.sampler and self.sampler.samples:
+            (output_dir / f"{name}.collapsed").write_text(self.sampler.collapsed(), encoding="utf-8")
+
+        log.info(f"Ingestion profile written to {json_path} and {html_path}")
+        return json_path, html_path
+
+
+def _bar(share: float) -> str:
+    return f'<div class="bar" style="width:{max(share, 0.0) * 100:.1f}%"></div>'
+
+
+def render_html(report: Dict[str, Any], max_files: int = 50) -> str:
+    """Render an ingestion report as a self-contained HTML page."""
+    e = html.escape
+    stage_rows = "".join(
+        f"<tr><td>{e(name)}</td><td>{s['seconds']:.3f}</td><td>{_bar(s['share'])}{s['share']:.0%}</td>"
+        f"<td>{s['calls']}</td><td>{s['bytes'] / 2 ** 20:.2f}</td><td>{s['tokens']}</td><td>{s['chunks']}</td>"
+        f"<td>{s['tokens_per_s']}</td><td>{s['peak_memory_mb']}</td></tr>"
+        for name, s in report["stages"].items()
+    )
+    slowest = max((f["seconds"] for f in report["per_file"]), default=0.0) or 1e-12
+    file_rows = "".join(
+        f"<tr class='{'failed' if f['error'] else ''}'><td>{e(f['file'])}</td><td>{f['seconds']:.3f}</td>"
+        f"<td>{_bar(f['seconds'] / slowest)}</td><td>{f['bytes'] / 2 ** 20:.2f}</td><td>{f['tokens']}</td>"
+        f"<td>{f['chunks']}</td><td>{f['tokens_per_s']}</td><td>{f['peak_memory_mb']}</td>"
+        f"<td>{e(', '.join(f'{k} {v:.3f}s' for k, v in f['stages'].items()))}</td>"
+        f"<td>{e(f['error'] or '')}</td></tr>"
+        for f in report["per_file"][:max_files]
+    )
+    profile = ""
+    if "profile" in report:
+        rows = "".join(
+            f"<tr><td>{e(row['function'])}</td><td>{row['samples']}</td><td>{_bar(row['share'])}{row['share']:.1%}</td></tr>"
+            for row in report["profile"]["self"]
+        )
+        profile = (
+            f"<h2>Hottest functions (self time, {report['profile']['samples']} samples "
+            f"every {report['profile']['interval_ms']} ms)</h2>"
+            f"<table><tr><th>Function</th><th>Samples</th><th>Share</th></tr>{rows}</table>"
+        )
+    throughput = report["throughput"]
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Ingestion profile {e(report['started_at'] or '')}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2rem; color: #222; }}
+table {{ border-collapse: collapse; margin-bottom: 2rem; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 8px; text-align: right; font-size: 0.9rem; }}
+td:first-child, th:first-child {{ text-align: left; }}
+.bar {{ display: inline-block; height: 0.7rem; background: #1f77b4; margin-right: 6px; max-width: 160px; }}
+.failed {{ background: #fde8e8; }}
+</style></head><body>
+<h1>Ingestion profile</h1>
+<p>{report['files']} files, {report['bytes'] / 2 ** 20:.2f} MB, {report['tokens']} tokens, {report['chunks']} chunks
+in {report['wall_seconds']:.2f} s &mdash; {throughput['files_per_s']} files/s, {throughput['mb_per_s']} MB/s,
+{throughput['tokens_per_s']} tokens/s. Peak traced memory {report['peak_memory_mb']} MB.</p>
+<p><b>Slowest stages:</b> {e(', '.join(report['slowest_stages']))}<br>
+<b>Slowest files:</b> {e(', '.join(report['slowest_files']))}</p>
+<h2>Stages</h2>
+<table><tr><th>Stage</th><th>Seconds</th><th>Share</th><th>Calls</th><th>MB</th><th>Tokens</th><th>Chunks</th>
+<th>Tokens/s</th><th>Peak MB</th></tr>{stage_rows}</table>
+<h2>Files (slowest first)</h2>
+<table><tr><th>File</th><th>Seconds</th><th></th><th>MB</th><th>Tokens</th><th>Chunks</th><th>Tokens/s</th>
+<th>Peak MB</th><th>Stages</th><th>Error</th></tr>{file_rows}</table>
+{profile}
+</body></html>
+"""
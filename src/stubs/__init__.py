@@ -0,0 +1,7 @@
+"""Local stand-ins for external services (LLM provider, Endee, embedding model) used in testing."""
+
+from .fake_llm import FakeLLMServer
+from .fake_endee import FakeEndeeServer
+from .hashing_embedding import HashingEmbeddingModel
+
+__all__ = ["FakeLLMServer", "FakeEndeeServer", "HashingEmbeddingModel"]
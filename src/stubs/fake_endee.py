@@ -0,0 +1,296 @@
+"""In-memory stand-in for the Endee HTTP API, for local testing and benchmarks.
+
+Speaks the wire format of the `endee` Python SDK (JSON requests, msgpack
+vector batches and search results, zlib-compressed metadata) so EndeeClient,
+VectorIndexer and VectorRetriever run unchanged against it. Search is exact
+(brute-force) cosine / inner product over the stored vectors, with optional
+per-request latency.
+
+Usage:
+    python -m src.stubs.fake_endee --port 8080
+
+Then point the app at it:
+    ENDEE_BASE_URL=http://localhost:8080/api/v1
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import unquote
+
+import msgpack
+import numpy as np
+
+
+def _json(status: int, payload: Any) -> Tuple[int, bytes, str]:
+    return status, json.dumps(payload).encode("utf-8"), "application/json"
+
+
+class _FakeIndex:
+    """Vectors, metadata and filter tags of one index."""
+
+    def __init__(self, name: str, dimension: int, space_type: str, precision: str, m: int, ef_con: int):
+        self.info = {
+            "name": name,
+            "lib_token": "fake",
+            "space_type": space_type,
+            "dimension": dimension,
+            "precision": precision,
+            "M": m,
+            "ef_con": ef_con,
+            "sparse_model": "None"  # the SDK's marker for dense-only indexes
+        }
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.records: List[list] = []  # [meta bytes, filter str, norm, vector]
+        self.filters: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._pending: List[List[float]] = []
+
+    def insert(self, batch: List[list]):
+        for vector_id, meta, filter_str, norm, vector in (item[:5] for item in batch):
+            record = [meta, filter_str, norm, vector]
+            tags = json.loads(filter_str) if filter_str else {}
+            if vector_id in self.positions:
+                position = self.positions[vector_id]
+                self._flush()
+                self.records[position] = record
+                self.filters[position] = tags
+                self.matrix[position] = vector
+                continue
+            self.positions[vector_id] = len(self.ids)
+            self.ids.append(vector_id)
+            self.records.append(record)
+            self.filters.append(tags)
+            self._pending.append(vector)
+
+    def _flush(self):
+        if self._pending:
+            self.matrix = np.vstack([self.matrix, np.asarray(self._pending, dtype=np.float32)])
+            self._pending = []
+
+    def delete(self, positions: List[int]):
+        self._flush()
+        keep = sorted(set(range(len(self.ids))) - set(positions))
+        self.ids = [self.ids[i] for i in keep]
+        self.records = [self.records[i] for i in keep]
+        self.filters = [self.filters[i] for i in keep]
+        self.matrix = self.matrix[keep] if keep else np.zeros((0, self.info["dimension"]), dtype=np.float32)
+        self.positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+
+    def matching(self, conditions: List[Dict[str, Any]]) -> np.ndarray:
+        """Boolean mask of vectors whose filter tags satisfy every condition."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for condition in conditions or []:
+            for field, spec in condition.items():
+                if "$eq" in spec:
+                    allowed = {spec["$eq"]}
+                elif "$in" in spec:
+                    allowed = set(spec["$in"])
+                else:
+                    raise ValueError(f"Unsupported filter operator in {spec}")
+                mask &= np.array([tags.get(field) in allowed for tags in self.filters], dtype=bool)
+        return mask
+
+    def search(self, vector: List[float], k: int, conditions: List[Dict[str, Any]], include_vectors: bool) -> List[list]:
+        self._flush()
+        if not self.ids:
+            return []
+        scores = self.matrix @ np.asarray(vector, dtype=np.float32)
+        if conditions:
+            scores = np.where(self.matching(conditions), scores, -np.inf)
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            if not np.isfinite(scores[i]):
+                break
+            meta, filter_str, norm, stored = self.records[i]
+            results.append([float(scores[i]), self.ids[i], meta, filter_str, norm, stored if include_vectors else []])
+        return results
+
+
+class FakeEndeeServer:
+    """Fake Endee API running in a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0):
+        """
+        Initialize fake Endee server.
+
+        Args:
+            host: Bind address
+            port: Bind port (0 picks a free port)
+            latency_ms: Added latency per request
+        """
+        self.latency_ms = latency_ms
+        self.indexes: Dict[str, _FakeIndex] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "searches": 0, "inserted": 0}
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass as ENDEE_BASE_URL (ending in /api/v1)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def start(self) -> "FakeEndeeServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeEndeeServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _dispatch(self, method: str, parts: List[str], body: bytes) -> Tuple[int, bytes, str]:
+        """Handle one API call; returns (status, body, content type)."""
+        if parts == ["index", "create"] and method == "POST":
+            request = json.loads(body)
+            name = request["index_name"]
+            if name in self.indexes:
+                return _json(409, {"error": f"Index {name} already exists"})
+            self.indexes[name] = _FakeIndex(
+                name, int(request["dim"]), request.get("space_type", "cosine"),
+                str(request.get("precision")), request.get("M", 16), request.get("ef_con", 128)
+            )
+            return _json(200, {"message": "Index created successfully"})
+
+        if parts == ["index", "list"] and method == "GET":
+            return _json(200, {"indexes": [
+                {**index.info, "total_elements": len(index.ids)} for index in self.indexes.values()
+            ]})
+
+        if parts[0] != "index" or len(parts) < 3:
+            return _json(404, {"error": "Unknown endpoint"})
+
+        name, action = parts[1], "/".join(parts[2:])
+        if action == "delete" and method == "DELETE":
+            self.indexes.pop(name)
+            return _json(200, {"message": "Index deleted"})
+
+        index = self.indexes[name]
+        if action == "info" and method == "GET":
+            return _json(200, {**index.info, "total_elements": len(index.ids)})
+
+        if action == "vector/insert" and method == "POST":
+            batch = msgpack.unpackb(body, raw=False)
+            index.insert(batch)
+            self.stats["inserted"] += len(batch)
+            return _json(200, {"message": "Vectors inserted successfully"})
+
+        if action == "search" and method == "POST":
+            request = json.loads(body)
+            conditions = json.loads(request["filter"]) if request.get("filter") else []
+            results = index.search(
+                request["vector"], int(request.get("k", 10)), conditions,
+                bool(request.get("include_vectors"))
+            )
+            self.stats["searches"] += 1
+            return 200, msgpack.packb(results, use_bin_type=True), "application/msgpack"
+
+        if action == "vector/get" and method == "POST":
+            position = index.positions.get(json.loads(body)["id"])
+            if position is None:
+                return _json(404, {"error": "Vector not found"})
+            index._flush()
+            meta, filter_str, norm, vector = index.records[position]
+            return 200, msgpack.packb([index.ids[position], meta, filter_str, norm, vector], use_bin_type=True), "application/msgpack"
+
+        if action == "vectors/delete" and method == "DELETE":
+            request = json.loads(body or b"{}")
+            positions = [int(i) for i in np.flatnonzero(index.matching(request.get("filter") or []))]
+            index.delete(positions)
+            return 200, str(len(positions)).encode("utf-8"), "text/plain"
+
+        if len(parts) == 5 and parts[2] == "vector" and parts[4] == "delete" and method == "DELETE":
+            position = index.positions.get(parts[3])
+            index.delete([position] if position is not None else [])
+            return 200, b"1" if position is not None else b"0", "text/plain"
+
+        return _json(404, {"error": f"Unknown endpoint {action}"})
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the SDK's pooled sessions
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self, method: str):
+                with server._lock:
+                    server.stats["requests"] += 1
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+
+                path = self.path.split("?")[0]
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if "/api/v1/" not in path:
+                    self._send(*_json(404, {"error": f"Unknown path {path}"}))
+                    return
+                parts = [unquote(p) for p in path.split("/api/v1/", 1)[1].strip("/").split("/")]
+                try:
+                    with server._lock:
+                        response = server._dispatch(method, parts, body)
+                except KeyError as e:
+                    response = _json(404, {"error": f"Index {e} not found"})
+                except (ValueError, TypeError) as e:
+                    response = _json(400, {"error": str(e)})
+                self._send(*response)
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+            def do_DELETE(self):
+                self._route("DELETE")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory stand-in for the Endee HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeEndeeServer(host=args.host, port=args.port, latency_ms=args.latency_ms)
+    print(f"Fake Endee listening on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""OpenAI-compatible fake LLM provider for local testing and benchmarks.
+
+Serves POST .../chat/completions (plain and streaming) with configurable
+latency, tail latency and injected failures, so rate limiting, retries and
+hedging can be exercised without a real provider.
+
+Usage:
+    python -m src.stubs.fake_llm --port 8001 --latency-ms 300 --error-rate 0.1
+
+Then point the app at it:
+    LLM_PROVIDER=openai OPENAI_API_KEY=fake LLM_BASE_URL=http://localhost:8001/v1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+
+
+class FakeLLMServer:
+    """Fake chat completions endpoint running in a background thread."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 200.0,
+        tail_rate: float = 0.0,
+        tail_multiplier: float = 10.0,
+        error_rate: float = 0.0,
+        error_status: int = 429,
+        retry_after: Optional[float] = None,
+        token_delay_ms: float = 5.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize fake provider.
+
+        Args:
+            host: Bind address
+            port: Bind port (0 picks a free port)
+            latency_ms: Base response latency
+            tail_rate: Fraction of requests that are slow
+            tail_multiplier: Latency multiplier for slow requests
+            error_rate: Fraction of requests that fail
+            error_status: HTTP status for injected failures (429, 503, ...)
+            retry_after: Retry-After header value sent with failures
+            token_delay_ms: Delay between streamed chunks
+            seed: Random seed for reproducible latency and failures
+        """
+        self.latency_ms = latency_ms
+        self.tail_rate = tail_rate
+        self.tail_multiplier = tail_multiplier
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.token_delay_ms = token_delay_ms
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "slow": 0}
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass as LLM_BASE_URL (OpenAI-style, ending in /v1)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _plan(self):
+        """Decide latency and failure for one request."""
+        with self._lock:
+            self.stats["requests"] += 1
+            fail = self._random.random() < self.error_rate
+            slow = self._random.random() < self.tail_rate
+            if fail:
+                self.stats["errors"] += 1
+            if slow:
+                self.stats["slow"] += 1
+        latency = self.latency_ms * (self.tail_multiplier if slow else 1.0) / 1000.0
+        return latency, fail
+
+    @staticmethod
+    def make_answer(messages: List[Dict[str, str]]) -> str:
+        """Deterministic answer quoting the start of the last user message."""
+        prompt = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        excerpt = " ".join(prompt.split()[:40])
+        return f"Based on the provided documentation: {excerpt}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                try:
+                    self._handle_completion()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (e.g. a cancelled hedge request)
+
+            def _handle_completion(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                latency, fail = server._plan()
+
+                if fail:
+                    time.sleep(min(latency, 0.05))
+                    headers = {}
+                    if server.retry_after is not None:
+                        headers["Retry-After"] = str(server.retry_after)
+                    self._send_json(
+                        server.error_status,
+                        {"error": {"message": "Injected failure", "type": "fake_error"}},
+                        headers
+                    )
+                    return
+
+                time.sleep(latency)
+                messages = request.get("messages", [])
+                answer = server.make_answer(messages)
+                model = request.get("model", "fake-model")
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                created = int(time.time())
+
+                if request.get("stream"):
+                    self._stream(answer, model, completion_id, created)
+                    return
+
+                prompt_tokens = sum(len((m.get("content") or "").split()) for m in messages)
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(answer.split()),
+                        "total_tokens": prompt_tokens + len(answer.split())
+                    }
+                })
+
+            def _stream(self, answer: str, model: str, completion_id: str, created: int):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+
+                def send(delta: Dict[str, Any], finish_reason: Optional[str] = None):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                send({"role": "assistant", "content": ""})
+                for word in answer.split(" "):
+                    time.sleep(server.token_delay_ms / 1000.0)
+                    send({"content": word + " "})
+                send({}, "stop")
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake LLM provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-multiplier", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        tail_rate=args.tail_rate,
+        tail_multiplier=args.tail_multiplier,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    print(f"Fake LLM provider listening on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Deterministic hashing embeddings: a drop-in EmbeddingModel without model weights."""
+
+import hashlib
+import re
+from typing import List, Union
+
+import numpy as np
+
+from ..utils import settings
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+class HashingEmbeddingModel:
+    """
+    Embed text as a normalized bag of hashed words and word bigrams.
+
+    Same interface as EmbeddingModel. Texts sharing words get similar
+    vectors, so retrieval results are meaningful enough for benchmarks and
+    tests, and nothing has to be downloaded.
+    """
+
+    def __init__(self, dimension: int = None, model_name: str = "hashing"):
+        """
+        Initialize hashing embedding model.
+
+        Args:
+            dimension: Vector dimension (defaults to EMBEDDING_DIMENSION)
+            model_name: Name reported like EmbeddingModel.model_name
+        """
+        self.dimension = dimension or settings.embedding_dimension
+        self.model_name = model_name
+        self._buckets = {}
+
+    def _bucket(self, feature: str) -> int:
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = self._buckets[feature] = int.from_bytes(digest, "little")
+        return bucket
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        words = TOKEN_PATTERN.findall(text.lower())
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            bucket = self._bucket(feature)
+            vector[bucket % self.dimension] += 1.0 if (bucket >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(
+        self,
+        texts: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress: bool = False
+    ) -> np.ndarray:
+        """Embed text(s) as a (len(texts), dimension) array."""
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.vstack([self._embed(text) for text in texts])
+
+    def encode_single(self, text: str) -> List[float]:
+        """Embed one text as a list."""
+        return self.encode(text)[0].tolist()
+
+    def encode_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Embed many texts as lists."""
+        return self.encode(texts, batch_size=batch_size).tolist()
+
+    def get_dimension(self) -> int:
+        """Get embedding dimension."""
+        return self.dimension
@@ -2,5 +2,6 @@
 
 from .config import settings
 from .logger import log
+from .metrics import metrics
 
-__all__ = ["settings", "log"]
+__all__ = ["settings", "log", "metrics"]
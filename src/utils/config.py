@@ -28,6 +28,17 @@ class Settings(BaseSettings):
     groq_api_key: Optional[str] = Field(default=None, alias="GROQ_API_KEY")
     llm_provider: str = Field(default="groq", alias="LLM_PROVIDER")
     llm_model: str = Field(default="llama-3.1-70b-versatile", alias="LLM_MODEL")
+    llm_base_url: Optional[str] = Field(default=None, alias="LLM_BASE_URL")
+    llm_timeout: float = Field(default=60.0, alias="LLM_TIMEOUT")
+    
+    # LLM Rate Limiting, Retries and Hedging (0 disables a limit / hedging)
+    llm_requests_per_minute: float = Field(default=0, alias="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: float = Field(default=0, alias="LLM_TOKENS_PER_MINUTE")
+    llm_max_retries: int = Field(default=3, alias="LLM_MAX_RETRIES")
+    llm_retry_base_delay: float = Field(default=0.5, alias="LLM_RETRY_BASE_DELAY")
+    llm_retry_max_delay: float = Field(default=8.0, alias="LLM_RETRY_MAX_DELAY")
+    llm_hedge_percentile: float = Field(default=0, alias="LLM_HEDGE_PERCENTILE")
+    llm_hedge_min_samples: int = Field(default=20, alias="LLM_HEDGE_MIN_SAMPLES")
     
     # Vector Index Configuration
     index_name: str = Field(default="technical_docs", alias="INDEX_NAME")
@@ -35,6 +46,60 @@ class Settings(BaseSettings):
     precision: str = Field(default="INT8D", alias="PRECISION")
     top_k: int = Field(default=5, alias="TOP_K")
     
+    # Retrieval Diversification ('none', 'mmr' or 'doc_cap')
+    retrieval_diversity: str = Field(default="none", alias="RETRIEVAL_DIVERSITY")
+    diversity_fetch_k: int = Field(default=20, alias="DIVERSITY_FETCH_K")
+    mmr_lambda: float = Field(default=0.5, alias="MMR_LAMBDA")
+    max_chunks_per_doc: int = Field(default=2, alias="MAX_CHUNKS_PER_DOC")
+    
+    # Hybrid Lexical (BM25) Search
+    lexical_index: bool = Field(default=True, alias="LEXICAL_INDEX")
+    hybrid_search: bool = Field(default=False, alias="HYBRID_SEARCH")
+    hybrid_fetch_k: int = Field(default=20, alias="HYBRID_FETCH_K")
+    rrf_k: int = Field(default=60, alias="RRF_K")
+    
+    # Retrieval Result Cache (in-process LRU, 0 disables)
+    retrieval_cache_size: int = Field(default=1024, alias="RETRIEVAL_CACHE_SIZE")
+    
+    # Async Query Path (threads for embedding, retrieval and cache I/O)
+    async_worker_threads: int = Field(default=16, alias="ASYNC_WORKER_THREADS")
+    
+    # Batch Generation Concurrency
+    batch_llm_concurrency: int = Field(default=8, alias="BATCH_LLM_CONCURRENCY")
+    batch_retrieval_concurrency: int = Field(default=4, alias="BATCH_RETRIEVAL_CONCURRENCY")
+    
+    # Prompt Context Packing (merge overlapping chunks, cap retrieved tokens; 0 = no cap)
+    context_packing: bool = Field(default=True, alias="CONTEXT_PACKING")
+    context_token_budget: int = Field(default=3000, alias="CONTEXT_TOKEN_BUDGET")
+    
+    # Extractive Context Compression (query-relevant sentences only)
+    context_compression: bool = Field(default=False, alias="CONTEXT_COMPRESSION")
+    compression_token_budget: int = Field(default=600, alias="COMPRESSION_TOKEN_BUDGET")
+    
+    # Extractive Fast Path (answer from the top chunk without the LLM)
+    fast_path: bool = Field(default=False, alias="FAST_PATH")
+    fast_path_threshold: float = Field(default=0.8, alias="FAST_PATH_THRESHOLD")
+    fast_path_sentence_threshold: float = Field(default=0.6, alias="FAST_PATH_SENTENCE_THRESHOLD")
+    
+    # Model Routing (fast model for simple lookups, LLM_MODEL for the rest)
+    llm_routing: bool = Field(default=False, alias="LLM_ROUTING")
+    llm_fast_model: str = Field(default="llama-3.1-8b-instant", alias="LLM_FAST_MODEL")
+    router_max_query_words: int = Field(default=20, alias="ROUTER_MAX_QUERY_WORDS")
+    router_max_fast_context_tokens: int = Field(default=1500, alias="ROUTER_MAX_FAST_CONTEXT_TOKENS")
+    router_min_top_similarity: float = Field(default=0.55, alias="ROUTER_MIN_TOP_SIMILARITY")
+    router_escalation: bool = Field(default=True, alias="ROUTER_ESCALATION")
+    
+    # Answer Cache (exact + semantic tiers, SQLite)
+    answer_cache_enabled: bool = Field(default=True, alias="ANSWER_CACHE_ENABLED")
+    answer_cache_file: Optional[str] = Field(default=None, alias="ANSWER_CACHE_PATH")
+    answer_cache_ttl: int = Field(default=86400, alias="ANSWER_CACHE_TTL")
+    answer_cache_max_entries: int = Field(default=10000, alias="ANSWER_CACHE_MAX_ENTRIES")
+    # Off by default: paraphrases differing only in a version, error code or
+    # flag name can clear the threshold and get another question's answer
+    semantic_cache_enabled: bool = Field(default=False, alias="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_threshold: float = Field(default=0.95, alias="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_scan: int = Field(default=2000, alias="SEMANTIC_CACHE_SCAN")
+    
     # Application Settings
     app_title: str = Field(
         default="Enterprise Documentation Q&A",
@@ -47,9 +112,31 @@ class Settings(BaseSettings):
     max_chunk_size: int = Field(default=512, alias="MAX_CHUNK_SIZE")
     chunk_overlap: int = Field(default=50, alias="CHUNK_OVERLAP")
     
+    # Uploads (indexed from memory; copies are written to data/raw only if enabled)
+    persist_uploads: bool = Field(default=False, alias="PERSIST_UPLOADS")
+    
+    # Streaming ingestion (files at least this large are chunked incrementally; 0 disables)
+    stream_ingest_min_bytes: int = Field(default=32 * 2 ** 20, alias="STREAM_INGEST_MIN_BYTES")
+    
+    # Ingestion Profiling (JSON + HTML report per indexing run; 0 ms disables sampling)
+    ingestion_profile: bool = Field(default=False, alias="INGESTION_PROFILE")
+    ingestion_profile_dir_name: Optional[str] = Field(default=None, alias="INGESTION_PROFILE_DIR")
+    ingestion_profile_sample_ms: float = Field(default=0, alias="INGESTION_PROFILE_SAMPLE_MS")
+    
     # Logging
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
     
+    # Metrics Endpoint (Prometheus text format on /metrics; 0 disables)
+    metrics_host: str = Field(default="127.0.0.1", alias="METRICS_HOST")
+    metrics_port: int = Field(default=0, alias="METRICS_PORT")
+    
+    # HTTP Query API (python -m src.api.server; empty API_KEY disables auth)
+    api_host: str = Field(default="127.0.0.1", alias="API_HOST")
+    api_port: int = Field(default=8000, alias="API_PORT")
+    api_workers: int = Field(default=8, alias="API_WORKERS")
+    api_max_pending: int = Field(default=64, alias="API_MAX_PENDING")
+    api_key: Optional[str] = Field(default=None, alias="API_KEY")
+    
     # Paths
     project_root: Path = Path(__file__).parent.parent.parent
     data_dir: Path = project_root / "data"
@@ -63,6 +150,20 @@ class Settings(BaseSettings):
         case_sensitive = False
         extra = "allow"
     
+    @property
+    def answer_cache_path(self) -> Path:
+        """SQLite file backing the answer cache."""
+        if self.answer_cache_file:
+            return Path(self.answer_cache_file)
+        return self.processed_data_dir / "answer_cache.sqlite3"
+    
+    @property
+    def ingestion_profile_dir(self) -> Path:
+        """Directory for ingestion profiling reports."""
+        if self.ingestion_profile_dir_name:
+            return Path(self.ingestion_profile_dir_name)
+        return self.processed_data_dir / "profiles"
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Create directories if they don't exist
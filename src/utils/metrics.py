@@ -0,0 +1,285 @@
+"""In-process metrics (counters and histograms) for the RAG system."""
+
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prometheus text exposition format content type
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((labels or {}).items()))
+
+
+class Counter:
+    """Monotonically increasing counter, optionally split by labels."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None):
+        """Increase the counter."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, labels: Optional[Dict[str, str]] = None) -> float:
+        """Current value for a label set."""
+        return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram:
+    """Bucketed histogram of observations, optionally split by labels."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None):
+        """Record an observation."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0
+                }
+            index = next(
+                (i for i, bound in enumerate(self.buckets) if value <= bound),
+                len(self.buckets)
+            )
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self) -> Dict[Tuple, Dict[str, Any]]:
+        with self._lock:
+            return {
+                key: {**series, "counts": list(series["counts"])}
+                for key, series in self._series.items()
+            }
+    
+    def percentile(self, q: float, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """
+        Estimate a percentile from the buckets, like Prometheus' histogram_quantile.
+        
+        Args:
+            q: Percentile in [0, 100]
+            labels: Label set of the series
+            
+        Returns:
+            Estimated value (linear within the bucket), or None without observations
+        """
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            if series is None or not series["count"]:
+                return None
+            counts = list(series["counts"])
+            total = series["count"]
+        
+        rank = q / 100.0 * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]  # beyond the largest bucket
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Process-wide registry of named metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, **kwargs)
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, description)
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._get_or_create(Histogram, name, description, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get current values of all metrics.
+
+        Returns:
+            Mapping of metric name to {label string: value} for counters and
+            {label string: {count, sum, counts}} for histograms
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+
+        return {
+            name: {
+                ",".join(f"{k}={v}" for k, v in key): value
+                for key, value in metric.snapshot().items()
+            }
+            for name, metric in metrics.items()
+        }
+    
+    def to_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        
+        Returns:
+            Exposition text (counters as-is, histograms as cumulative
+            _bucket series plus _sum and _count)
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        
+        lines = []
+        for name, metric in metrics:
+            if metric.description:
+                lines.append(f"# HELP {name} {_escape(metric.description)}")
+            
+            if isinstance(metric, Counter):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(metric.snapshot().items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                continue
+            
+            lines.append(f"# TYPE {name} histogram")
+            for key, series in sorted(metric.snapshot().items()):
+                cumulative = 0
+                bounds = [*(str(b) for b in metric.buckets), "+Inf"]
+                for bound, count in zip(bounds, series["counts"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', bound))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+                lines.append(f"{name}_count{_format_labels(key)} {series['count']}")
+        
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+
+class MetricsServer:
+    """Minimal HTTP endpoint serving GET /metrics in the Prometheus text format."""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, registry: MetricsRegistry = None):
+        """
+        Initialize metrics endpoint.
+        
+        Args:
+            host: Bind address
+            port: Bind port (0 picks a free port)
+            registry: Registry to export (defaults to the global one)
+        """
+        registry = registry or metrics
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+            
+            def do_GET(self):
+                if self.path.split("?")[0].rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+    
+    def start(self) -> "MetricsServer":
+        """Serve in a background thread."""
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+_metrics_server: Optional[MetricsServer] = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(host: str = "127.0.0.1", port: int = 9464) -> MetricsServer:
+    """
+    Start the process-wide metrics endpoint once (later calls return it).
+    
+    Args:
+        host: Bind address
+        port: Bind port
+        
+    Returns:
+        The running MetricsServer
+    """
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            _metrics_server = MetricsServer(host, port).start()
+        return _metrics_server
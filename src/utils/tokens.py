@@ -0,0 +1,61 @@
+"""Cached tokenizer helpers shared by chunking and prompt packing."""
+
+from functools import lru_cache
+from typing import Optional
+import tiktoken
+
+from .logger import log
+
+
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = DEFAULT_ENCODING) -> Optional[tiktoken.Encoding]:
+    """
+    Load a tiktoken encoding once per process.
+
+    Args:
+        name: Encoding name
+
+    Returns:
+        Encoding, or None if it cannot be loaded (e.g. offline without cache)
+    """
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        log.warning(f"Could not load tiktoken encoding '{name}': {e}. Using character estimates.")
+        return None
+
+
+# Longest text whose count is memoized; chunks repeat across queries, whole
+# documents and prompts do not and would only pin memory in the cache
+CACHE_MAX_CHARS = 8192
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """
+    Count tokens in text (memoized for chunk-sized text).
+
+    Args:
+        text: Text to measure
+        encoding_name: Encoding name
+
+    Returns:
+        Token count (about 4 characters per token without a tokenizer)
+    """
+    if len(text) <= CACHE_MAX_CHARS:
+        return _cached_count(text, encoding_name)
+    return _count(text, encoding_name)
+
+
+@lru_cache(maxsize=16384)
+def _cached_count(text: str, encoding_name: str) -> int:
+    return _count(text, encoding_name)
+
+
+def _count(text: str, encoding_name: str) -> int:
+    encoding = get_encoding(encoding_name)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
@@ -2,6 +2,20 @@
 
 from .endee_client import EndeeClient
 from .indexer import VectorIndexer
-from .retriever import VectorRetriever
+from .retriever import VectorRetriever, top_similarity
+from .lexical import LexicalIndex
+from .manifest import DocumentManifest
+from .index_state import get_index_version, bump_index_version, get_active_index, set_active_index
 
-__all__ = ["EndeeClient", "VectorIndexer", "VectorRetriever"]
+__all__ = [
+    "EndeeClient",
+    "VectorIndexer",
+    "VectorRetriever",
+    "top_similarity",
+    "LexicalIndex",
+    "DocumentManifest",
+    "get_index_version",
+    "bump_index_version",
+    "get_active_index",
+    "set_active_index",
+]
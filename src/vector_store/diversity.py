@@ -0,0 +1,91 @@
+"""Result diversification for retrieval (MMR and per-document caps)."""
+
+from typing import List, Sequence
+import numpy as np
+
+
+DIVERSITY_MODES = ("none", "mmr", "doc_cap")
+
+
+def mmr_select(
+    query_vector: Sequence[float],
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Select a diverse subset of candidates with maximal marginal relevance.
+
+    The candidate similarity matrix is computed once; each greedy step is a
+    single vectorized update over all remaining candidates.
+
+    Args:
+        query_vector: Query embedding
+        candidate_vectors: Candidate embeddings, shape (n, dim)
+        k: Number of candidates to select
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
+
+    Returns:
+        Indices of selected candidates in selection order
+    """
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    n = len(vectors)
+    if n == 0 or k <= 0:
+        return []
+
+    query = np.asarray(query_vector, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = vectors @ query
+    pairwise = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    max_redundancy = pairwise[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    for _ in range(min(k, n) - 1):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_redundancy, pairwise[best], out=max_redundancy)
+
+    return selected
+
+
+def cap_per_document(
+    groups: Sequence[str],
+    k: int,
+    max_per_doc: int = 2
+) -> List[int]:
+    """
+    Keep at most `max_per_doc` candidates from each document.
+
+    Candidates are assumed to be ordered by relevance already.
+
+    Args:
+        groups: Document key (e.g. source) of each candidate
+        k: Number of candidates to select
+        max_per_doc: Maximum candidates per document
+
+    Returns:
+        Indices of selected candidates in relevance order
+    """
+    if len(groups) == 0 or k <= 0:
+        return []
+
+    _, inverse = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+
+    # Occurrence number of each candidate within its group (stable cumcount)
+    order = np.argsort(inverse, kind="stable")
+    sorted_groups = inverse[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_groups)) + 1]
+    run_lengths = np.diff(np.r_[starts, len(order)])
+    occurrence = np.empty(len(order), dtype=np.int64)
+    occurrence[order] = np.arange(len(order)) - np.repeat(starts, run_lengths)
+
+    keep = np.flatnonzero(occurrence < max_per_doc)
+    return keep[:k].tolist()
@@ -66,15 +66,13 @@ class EndeeClient:
             True if successful
         """
         try:
-            # Map precision string to Precision enum
-            precision_map = {
-                "INT8D": Precision.INT8D,
-                "INT16D": Precision.INT16D,
-                "FLOAT16": Precision.FLOAT16,
-                "FLOAT32": Precision.FLOAT32
-            }
-            
-            precision_enum = precision_map.get(precision, Precision.INT8D)
+            # Map precision string to Precision enum (newer SDKs name INT8D/INT16D INT8/INT16)
+            precision_enum = (
+                getattr(Precision, precision, None)
+                or getattr(Precision, precision.rstrip("D"), None)
+                or getattr(Precision, "INT8D", None)
+                or Precision.INT8
+            )
             
             self.client.create_index(
                 name=name,
@@ -0,0 +1,101 @@
+"""Persistent index version and active-index pointer shared across processes."""
+
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+from ..utils import settings, log
+
+
+def index_state_path(index_name: str = None) -> Path:
+    """Path of the state file for a vector index."""
+    return settings.processed_data_dir / f"{index_name or settings.index_name}.state.json"
+
+
+def _read_state(index_name: str = None) -> dict:
+    try:
+        with open(index_state_path(index_name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_state(index_name: str = None, **fields) -> str:
+    """Write a new version (keeping other fields unless overridden) and return it."""
+    path = index_state_path(index_name)
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    state = {**_read_state(index_name), **fields, "version": version, "updated_at": time.time()}
+
+    # Write atomically so readers in other processes never see a partial file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    tmp_path.replace(path)
+    return version
+
+
+def get_index_version(index_name: str = None) -> str:
+    """
+    Get the current version of an index.
+
+    The version changes whenever the index is recreated or its contents
+    change, so caches keyed on it are invalidated by re-indexing.
+
+    Args:
+        index_name: Index name (defaults to settings.index_name)
+
+    Returns:
+        Version string ("0" if the index has never been built here)
+    """
+    return _read_state(index_name).get("version", "0")
+
+
+def bump_index_version(index_name: str = None) -> str:
+    """
+    Record that an index changed and return its new version.
+
+    Args:
+        index_name: Index name (defaults to settings.index_name)
+
+    Returns:
+        New version string
+    """
+    version = _write_state(index_name)
+    log.debug(f"Index '{index_name or settings.index_name}' version is now {version}")
+    return version
+
+
+def get_active_index(index_name: str = None) -> str:
+    """
+    Get the Endee index currently serving a logical index name.
+
+    Background re-indexing builds a separate staging index and then points
+    the logical name at it, so readers never see a half-built index. Until
+    that first happens, the logical name is the Endee index itself.
+
+    Args:
+        index_name: Logical index name (defaults to settings.index_name)
+
+    Returns:
+        Name of the Endee index to query
+    """
+    index_name = index_name or settings.index_name
+    return _read_state(index_name).get("active") or index_name
+
+
+def set_active_index(active: str, index_name: str = None) -> str:
+    """
+    Point a logical index name at another Endee index, bumping its version.
+
+    Args:
+        active: Endee index that now serves the logical name
+        index_name: Logical index name (defaults to settings.index_name)
+
+    Returns:
+        New version string
+    """
+    version = _write_state(index_name, active=active)
+    log.info(f"Index '{index_name or settings.index_name}' now served by '{active}' (version {version})")
+    return version
@@ -1,25 +1,89 @@
 """Vector indexer for storing embeddings in Endee."""
 
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Callable
+from urllib.parse import quote
 from tqdm import tqdm
 
 from .endee_client import EndeeClient
+from .lexical import LexicalIndex, default_lexical_path, delete_lexical_index
+from .manifest import DocumentManifest, default_manifest_path, chunk_hash
+from .index_state import bump_index_version, get_active_index
 from ..utils import settings, log
 
 
+# Chunk fields stored as Endee filter tags (queryable at search time; source
+# and chunk_id also let one document's vectors be deleted by filter)
+FILTER_FIELDS = ("format", "filename", "source", "chunk_id")
+
+# Chunk position fields kept in metadata (token spans, or char spans without tiktoken)
+SPAN_FIELDS = ("start_token", "end_token", "start_char", "end_char")
+
+
+def chunk_vector_id(chunk: Dict[str, Any], position: int = 0) -> str:
+    """Vector ID of a chunk: its source and chunk number."""
+    return f"{chunk.get('source', 'doc')}_{chunk.get('chunk_id', position)}"
+
+
+def _deleted_count(response: Any, requested: int) -> int:
+    """Number of vectors a delete response reports (`requested` if it gives none)."""
+    match = re.search(r"\d+", str(response or ""))
+    if match is None:
+        log.debug(f"Delete response without a count: {response!r}")
+        return requested
+    return int(match.group())
+
+
 class VectorIndexer:
-    """Index vectors in Endee database."""
+    """
+    Index vectors in Endee database.
+    
+    The BM25 lexical mirror and the document manifest are updated in memory
+    as chunks are upserted or deleted; call flush() to persist them (once
+    per ingestion run or batch).
+    """
     
-    def __init__(self, client: EndeeClient = None):
+    def __init__(self, client: EndeeClient = None, index_name: str = None):
         """
         Initialize vector indexer.
         
         Args:
             client: Endee client instance
+            index_name: Endee index to write (defaults to the one currently
+                serving settings.index_name; pass a staging name to build a
+                replacement index without touching the live one)
         """
         self.client = client or EndeeClient()
-        self.index_name = settings.index_name
+        self.logical_name = settings.index_name
+        self.index_name = index_name or get_active_index(self.logical_name)
         self.index = None
+        self.lexical = None
+        self.manifest = None
+    
+    def _bump_version(self):
+        """Invalidate query caches if this indexer writes the live index."""
+        if self.index_name == get_active_index(self.logical_name):
+            bump_index_version(self.logical_name)
+    
+    def _load_lexical(self, reset: bool = False) -> LexicalIndex:
+        """Load (or start) the lexical index that mirrors this vector index."""
+        if reset or self.lexical is None:
+            path = default_lexical_path(self.index_name)
+            self.lexical = None if reset else LexicalIndex.load(path)
+            if self.lexical is None:
+                self.lexical = LexicalIndex()
+        return self.lexical
+    
+    def _load_manifest(self, reset: bool = False) -> DocumentManifest:
+        """Open (or start) the manifest of documents in this index."""
+        if reset or self.manifest is None:
+            path = default_manifest_path(self.index_name)
+            if reset:
+                if self.manifest is not None:
+                    self.manifest.close()
+                path.unlink(missing_ok=True)
+            self.manifest = DocumentManifest(path)
+        return self.manifest
     
     def setup_index(
         self,
@@ -50,6 +114,11 @@ class VectorIndexer:
                 log.info(f"Index '{self.index_name}' setup complete")
                 return True
         
+        # A new vector index starts with a fresh lexical index and manifest
+        delete_lexical_index(default_lexical_path(self.index_name))
+        self._load_lexical(reset=True)
+        self._load_manifest(reset=True)
+        
         # Create new index
         success = self.client.create_index(
             name=self.index_name,
@@ -60,6 +129,7 @@ class VectorIndexer:
         
         if success:
             self.index = self.client.get_index(self.index_name)
+            self._bump_version()
             log.info(f"Index '{self.index_name}' setup complete")
         
         return success
@@ -118,6 +188,9 @@ class VectorIndexer:
             except Exception as e:
                 log.error(f"Error upserting batch {i}-{batch_end}: {e}")
         
+        if total_upserted:
+            self._bump_version()
+        
         log.info(f"Upserted {total_upserted} vectors to index '{self.index_name}'")
         return total_upserted
     
@@ -137,25 +210,207 @@ class VectorIndexer:
             return 0
         
         # Prepare data
-        ids = [f"{chunk.get('source', 'doc')}_{chunk.get('chunk_id', i)}" 
-               for i, chunk in enumerate(chunks)]
+        ids = [chunk_vector_id(chunk, i) for i, chunk in enumerate(chunks)]
         
         metadata = [
             {
                 "text": chunk.get("text", ""),
                 "source": chunk.get("source", ""),
                 "filename": chunk.get("filename", ""),
-                "chunk_id": chunk.get("chunk_id", i)
+                "chunk_id": chunk.get("chunk_id", i),
+                # Span in the source document, used to merge neighbours when packing prompts
+                **{
+                    field: chunk[field]
+                    for field in SPAN_FIELDS
+                    if field in chunk
+                }
             }
             for i, chunk in enumerate(chunks)
         ]
         
         filters = [
-            {
-                "format": chunk.get("format", ""),
-                "filename": chunk.get("filename", "")
-            }
-            for chunk in chunks
+            {field: chunk.get(field, "") for field in FILTER_FIELDS if field != "chunk_id"}
+            | {"chunk_id": chunk.get("chunk_id", i)}
+            for i, chunk in enumerate(chunks)
+        ]
+        
+        num_upserted = self.upsert_vectors(embeddings, ids, metadata, filters)
+        
+        # Mirror the same chunks into the BM25 lexical index (persisted by flush)
+        if settings.lexical_index and num_upserted:
+            self._load_lexical().add(ids, chunks)
+        
+        # Record which vectors belong to which document (committed by flush)
+        if num_upserted:
+            manifest = self._load_manifest()
+            for i, chunk in enumerate(chunks):
+                manifest.add(chunk.get("source", "doc"), chunk.get("chunk_id", i), chunk_hash(chunk))
+        
+        return num_upserted
+    
+    def flush(self) -> bool:
+        """
+        Persist lexical index and manifest changes made since the last flush.
+        
+        Lexical changes are appended to a log and manifest rows are
+        committed, so a flush costs time in proportion to what changed,
+        not to the size of the index.
+        
+        Returns:
+            True if lexical index changes were written
+        """
+        if self.manifest is not None:
+            self.manifest.save()
+        if self.lexical is None or not self.lexical.flush(default_lexical_path(self.index_name)):
+            return False
+        self._bump_version()
+        return True
+    
+    def document_chunks(self, source: str) -> List[str]:
+        """
+        Chunk numbers (as strings) stored for a document.
+        
+        Falls back to the lexical index (a scan of every chunk) if the
+        manifest does not know the document, e.g. it was indexed before the
+        manifest existed.
+        
+        Args:
+            source: Document source (as in chunk['source'])
+            
+        Returns:
+            List of chunk numbers
+        """
+        manifest = self._load_manifest()
+        if source in manifest:
+            return list(manifest.get(source))
+        lexical = self._load_lexical()
+        return [str(meta.get("chunk_id")) for meta in lexical.metadata() if meta.get("source") == source]
+    
+    def delete_chunks(self, source: str, chunk_ids: List[str] = None) -> int:
+        """
+        Delete some or all chunks of a document, with their lexical entries.
+        
+        Chunks recorded in the manifest carry source and chunk_id filter
+        tags, so they are deleted with one Endee filter request whatever
+        the count. Chunks indexed before those tags existed are deleted one
+        by one by vector ID.
+        
+        Args:
+            source: Document source (as in chunk['source'])
+            chunk_ids: Chunk numbers to delete (default: every chunk)
+            
+        Returns:
+            Number of vectors the server reported deleted
+        """
+        if not self.index:
+            log.error("Index not initialized. Call setup_index() first.")
+            return 0
+        
+        recorded = self._load_manifest().get(source)
+        chunk_ids = self.document_chunks(source) if chunk_ids is None else [str(chunk_id) for chunk_id in chunk_ids]
+        if not chunk_ids:
+            return 0
+        tagged = [c for c in chunk_ids if c in recorded]
+        untagged = [c for c in chunk_ids if c not in recorded]
+        
+        deleted = 0
+        if tagged:
+            condition = [{"source": {"$eq": source}}]
+            if len(tagged) < len(recorded):
+                condition.append({"chunk_id": {"$in": [int(c) if c.isdigit() else c for c in tagged]}})
+            try:
+                deleted += _deleted_count(self.index.delete_with_filter(condition), len(tagged))
+            except Exception as e:
+                log.error(f"Error deleting chunks of '{source}': {e}")
+                return 0
+        
+        for chunk_id in untagged:
+            # IDs contain the source path, so escape them for the URL
+            vector_id = quote(chunk_vector_id({"source": source, "chunk_id": chunk_id}), safe="")
+            try:
+                deleted += _deleted_count(self.index.delete_vector(vector_id), 1)
+            except Exception as e:
+                log.warning(f"Error deleting chunk {chunk_id} of '{source}': {e}")
+        
+        self._load_lexical().remove(chunk_vector_id({"source": source, "chunk_id": c}) for c in chunk_ids)
+        self._load_manifest().discard(source, tagged)
+        
+        self._bump_version()
+        return deleted
+    
+    def prune_document(self, source: str, keep: List[Any]) -> int:
+        """
+        Delete a document's chunks other than `keep`, e.g. after re-upserting
+        an edited document that now has fewer chunks.
+        
+        Args:
+            source: Document source (as in chunk['source'])
+            keep: Chunk numbers of the current version
+            
+        Returns:
+            Number of chunks deleted
+        """
+        keep = {str(chunk_id) for chunk_id in keep}
+        stale = [chunk_id for chunk_id in self._load_manifest().get(source) if chunk_id not in keep]
+        return self.delete_chunks(source, stale) if stale else 0
+    
+    def delete_document(self, source: str) -> int:
+        """
+        Delete every vector of a document.
+        
+        Only that document's vectors, manifest rows and lexical entries are
+        touched (the lexical removal is appended to its log on flush), so
+        the cost grows with the document, not the index. Call flush() to
+        persist the change.
+        
+        Args:
+            source: Document source (as in chunk['source'])
+            
+        Returns:
+            Number of vectors deleted
+        """
+        deleted = self.delete_chunks(source)
+        log.info(f"Deleted {deleted} vectors of '{source}' from index '{self.index_name}'")
+        return deleted
+    
+    def replace_document(
+        self,
+        source: str,
+        chunks: List[Dict],
+        embed: Callable[[List[str]], List[List[float]]]
+    ) -> Dict[str, int]:
+        """
+        Update a document in place from its new chunks.
+        
+        Chunks whose content hash is unchanged are left alone (and not
+        embedded again). Changed and new chunks are embedded and upserted,
+        and chunks the new version no longer has, such as the tail of a
+        document that got shorter, are deleted.
+        
+        Args:
+            source: Document source (as in chunk['source'])
+            chunks: All chunks of the new version
+            embed: Function embedding a list of texts
+            
+        Returns:
+            Dictionary with 'upserted', 'unchanged' and 'deleted' counts
+        """
+        previous = dict(self._load_manifest().get(source)) or dict.fromkeys(self.document_chunks(source))
+        
+        current = {str(chunk.get("chunk_id", i)): chunk for i, chunk in enumerate(chunks)}
+        changed = [
+            chunk for chunk_id, chunk in current.items()
+            if previous.get(chunk_id) != chunk_hash(chunk)
         ]
+        stale = [chunk_id for chunk_id in previous if chunk_id not in current]
         
-        return self.upsert_vectors(embeddings, ids, metadata, filters)
+        upserted = 0
+        if changed:
+            upserted = self.upsert_chunks(changed, embed([chunk["text"] for chunk in changed]))
+        deleted = self.delete_chunks(source, stale) if stale else 0
+        
+        log.info(
+            f"Updated '{source}' in index '{self.index_name}': {upserted} chunks upserted, "
+            f"{len(chunks) - len(changed)} unchanged, {deleted} deleted"
+        )
+        return {"upserted": upserted, "unchanged": len(chunks) - len(changed), "deleted": deleted}
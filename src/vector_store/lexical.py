@@ -0,0 +1,508 @@
+"""BM25 lexical index for exact-term retrieval alongside vector search."""
+
+import json
+import re
+import uuid
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+
+from ..utils import settings, log
+
+
+# Identifier-friendly tokens: keeps error codes, config keys and API paths
+# such as ERR_CONN_42, pool.max_size or /api/v1/search intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+(?:[.\-:/][a-z0-9_]+)*")
+SUBTOKEN_PATTERN = re.compile(r"[.\-:/]")
+
+# Metadata kept per chunk so lexical-only hits can be returned as context
+LEXICAL_META_FIELDS = (
+    "text", "source", "filename", "format", "chunk_id",
+    "start_token", "end_token", "start_char", "end_char"
+)
+
+# flush() appends changes to a log until the log holds this fraction of the
+# index (and at least COMPACT_MIN_ROWS chunks), then rewrites the .npz
+COMPACT_RATIO = 0.25
+COMPACT_MIN_ROWS = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text for lexical matching.
+
+    Compound identifiers are emitted whole and as their parts, so
+    "pool.max_size" matches queries for "pool.max_size" and "max_size".
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of lowercase tokens
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if SUBTOKEN_PATTERN.search(token):
+            tokens.extend(part for part in SUBTOKEN_PATTERN.split(token) if part)
+    return tokens
+
+
+def default_lexical_path(index_name: str = None) -> Path:
+    """Path of the on-disk lexical index for a vector index."""
+    return settings.processed_data_dir / f"{index_name or settings.index_name}.bm25.npz"
+
+
+def lexical_log_path(path: Path) -> Path:
+    """Path of the change log kept next to a saved lexical index."""
+    return Path(path).with_suffix(".log")
+
+
+def lexical_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Value that changes whenever a saved lexical index or its change log does.
+
+    Args:
+        path: Path to the .npz file
+
+    Returns:
+        (mtime of the .npz in ns, size of the log), or None if not saved
+    """
+    try:
+        mtime = Path(path).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    try:
+        log_size = lexical_log_path(path).stat().st_size
+    except FileNotFoundError:
+        log_size = 0
+    return mtime, log_size
+
+
+def delete_lexical_index(path: Path):
+    """Delete a saved lexical index and its change log."""
+    Path(path).unlink(missing_ok=True)
+    lexical_log_path(path).unlink(missing_ok=True)
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[List[Dict[str, Any]]],
+    k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked result lists by reciprocal rank fusion.
+
+    Results are matched by 'id'; the first occurrence of a result supplies
+    its fields and the fused score is stored under 'rrf_score'.
+
+    Args:
+        result_lists: Ranked result lists (best first)
+        k: RRF rank constant
+
+    Returns:
+        Fused results ordered by descending RRF score
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = {**result, "rrf_score": 0.0}
+            else:
+                for key, value in result.items():
+                    entry.setdefault(key, value)
+            entry["rrf_score"] += 1.0 / (k + rank)
+
+    return sorted(fused.values(), key=lambda r: r["rrf_score"], reverse=True)
+
+
+class LexicalIndex:
+    """
+    In-process BM25 inverted index over document chunks.
+
+    Removed chunks are only marked until the index is next queried or
+    saved, and flush() persists changes by appending them to a log, so
+    adding or removing a document costs time in proportion to the
+    document rather than the index.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty lexical index.
+
+        Args:
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+        self.terms: List[str] = []
+        self.term_ids: Dict[str, int] = {}
+        self.doc_ids: List[str] = []
+        self.doc_rows: Dict[str, int] = {}  # vector ID -> row of a live chunk
+        self.doc_meta: List[Dict[str, Any]] = []
+        self.doc_lengths = np.zeros(0, dtype=np.int32)
+
+        # Postings as COO triples, compacted into CSR on demand
+        self.post_terms = np.zeros(0, dtype=np.int32)
+        self.post_docs = np.zeros(0, dtype=np.int32)
+        self.post_tfs = np.zeros(0, dtype=np.uint16)
+        self._csr = None
+        self._dead = set()  # rows removed but not yet purged
+        self._blocks = []  # (terms, docs, tfs, lengths) added but not yet merged
+
+        # Persistence state: the saved .npz this index extends, changes not
+        # yet flushed, and the valid bytes and chunks of the change log
+        self.generation = ""
+        self._pending: List[Dict[str, Any]] = []
+        self._log_bytes = 0
+        self._log_rows = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_rows)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        chunks: Sequence[Dict[str, Any]],
+        term_counts: Optional[Sequence[Dict[str, int]]] = None
+    ) -> int:
+        """
+        Add (or replace) chunks in the index.
+
+        Args:
+            ids: Vector IDs of the chunks (same IDs as in Endee)
+            chunks: Chunk dictionaries with 'text' and metadata
+            term_counts: Term frequencies of each chunk, if already
+                tokenized (as in the change log)
+
+        Returns:
+            Number of chunks indexed
+        """
+        self._drop(ids)
+
+        terms, docs, tfs, lengths, metas, all_counts = [], [], [], [], [], []
+        base = len(self.doc_ids)
+
+        for offset, (doc_id, chunk) in enumerate(zip(ids, chunks)):
+            counts = term_counts[offset] if term_counts else Counter(tokenize(chunk.get("text", "")))
+            for term, tf in counts.items():
+                term_id = self.term_ids.get(term)
+                if term_id is None:
+                    term_id = self.term_ids[term] = len(self.terms)
+                    self.terms.append(term)
+                terms.append(term_id)
+                docs.append(base + offset)
+                tfs.append(min(tf, np.iinfo(np.uint16).max))
+
+            lengths.append(sum(counts.values()))
+            metas.append({field: chunk.get(field, "") for field in LEXICAL_META_FIELDS})
+            all_counts.append(counts)
+            self.doc_rows[doc_id] = base + offset
+        self.doc_ids.extend(ids[:len(metas)])
+        self.doc_meta.extend(metas)
+
+        self._blocks.append((
+            np.asarray(terms, dtype=np.int32),
+            np.asarray(docs, dtype=np.int32),
+            np.asarray(tfs, dtype=np.uint16),
+            np.asarray(lengths, dtype=np.int32)
+        ))
+        self._csr = None
+        self._pending.append({"op": "add", "ids": list(ids[:len(metas)]), "chunks": metas, "counts": all_counts})
+
+        return len(lengths)
+
+    def remove(self, ids) -> int:
+        """
+        Remove chunks by vector ID.
+
+        Args:
+            ids: Iterable of vector IDs
+
+        Returns:
+            Number of chunks removed
+        """
+        removed = self._drop(ids)
+        if removed:
+            self._pending.append({"op": "remove", "ids": removed})
+        return len(removed)
+
+    def _drop(self, ids) -> List[str]:
+        """Mark chunks removed; returns the IDs that were present."""
+        removed = []
+        for doc_id in ids:
+            row = self.doc_rows.pop(doc_id, None)
+            if row is not None:
+                self._dead.add(row)
+                removed.append(doc_id)
+        return removed
+
+    def _merge(self):
+        """Append the postings of added chunks to the arrays in one pass."""
+        if not self._blocks:
+            return
+        terms, docs, tfs, lengths = zip(*self._blocks)
+        self.post_terms = np.concatenate([self.post_terms, *terms])
+        self.post_docs = np.concatenate([self.post_docs, *docs])
+        self.post_tfs = np.concatenate([self.post_tfs, *tfs])
+        self.doc_lengths = np.concatenate([self.doc_lengths, *lengths])
+        self._blocks.clear()
+
+    def _purge(self):
+        """Drop the rows of removed chunks from the arrays."""
+        self._merge()
+        if not self._dead:
+            return
+        keep = np.ones(len(self.doc_ids), dtype=bool)
+        keep[list(self._dead)] = False
+
+        # Remap surviving document numbers to a dense range
+        remap = np.cumsum(keep, dtype=np.int64) - 1
+        post_keep = keep[self.post_docs]
+
+        self.post_terms = self.post_terms[post_keep]
+        self.post_tfs = self.post_tfs[post_keep]
+        self.post_docs = remap[self.post_docs[post_keep]].astype(np.int32)
+        self.doc_lengths = self.doc_lengths[keep]
+        self.doc_ids = [d for d, k in zip(self.doc_ids, keep) if k]
+        self.doc_meta = [m for m, k in zip(self.doc_meta, keep) if k]
+        self.doc_rows = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+        self._dead.clear()
+        self._csr = None
+
+    def metadata(self) -> List[Dict[str, Any]]:
+        """Metadata of every chunk in the index."""
+        self._purge()
+        return self.doc_meta
+
+    def _compact(self):
+        """Sort postings by term into CSR arrays for querying."""
+        self._purge()
+        if self._csr is None:
+            order = np.lexsort((self.post_docs, self.post_terms))
+            indptr = np.zeros(len(self.terms) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.post_terms, minlength=len(self.terms)), out=indptr[1:])
+            self.post_terms = self.post_terms[order]
+            self.post_docs = self.post_docs[order]
+            self.post_tfs = self.post_tfs[order]
+            self._csr = indptr
+        return self._csr
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Score chunks against a query with BM25.
+
+        Args:
+            query: Query text
+            top_k: Number of results to return
+
+        Returns:
+            List of results shaped like vector search results, with the
+            BM25 score under 'bm25_score'
+        """
+        indptr = self._compact()
+        n_docs = len(self.doc_ids)
+        if not n_docs:
+            return []
+        query_terms = {self.term_ids[t] for t in tokenize(query) if t in self.term_ids}
+        if not query_terms:
+            return []
+
+        avg_len = max(float(self.doc_lengths.mean()), 1.0)
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / avg_len)
+        scores = np.zeros(n_docs, dtype=np.float32)
+
+        for term_id in query_terms:
+            start, end = indptr[term_id], indptr[term_id + 1]
+            docs = self.post_docs[start:end]
+            tfs = self.post_tfs[start:end].astype(np.float32)
+            df = end - start
+            idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+            scores += np.bincount(
+                docs,
+                weights=idf * tfs * (self.k1 + 1) / (tfs + length_norm[docs]),
+                minlength=n_docs
+            ).astype(np.float32)
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            {
+                "id": self.doc_ids[i],
+                "bm25_score": float(scores[i]),
+                "meta": {k: v for k, v in self.doc_meta[i].items() if k != "format"},
+                "filter": {
+                    "format": self.doc_meta[i].get("format", ""),
+                    "filename": self.doc_meta[i].get("filename", "")
+                }
+            }
+            for i in candidates
+        ]
+
+    def save(self, path: Path) -> int:
+        """
+        Save the whole index to a compressed .npz file, replacing any
+        change log.
+
+        Args:
+            path: Destination path
+
+        Returns:
+            Size of the written file in bytes
+        """
+        indptr = self._compact()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.generation = uuid.uuid4().hex
+        header = json.dumps({"k1": self.k1, "b": self.b, "doc_ids": self.doc_ids, "generation": self.generation})
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                header=np.frombuffer(header.encode("utf-8"), dtype=np.uint8),
+                terms=np.frombuffer("\n".join(self.terms).encode("utf-8"), dtype=np.uint8),
+                meta=np.frombuffer(
+                    zlib.compress(json.dumps(self.doc_meta).encode("utf-8")), dtype=np.uint8
+                ),
+                indptr=indptr,
+                post_docs=self.post_docs,
+                post_tfs=self.post_tfs,
+                doc_lengths=self.doc_lengths
+            )
+        tmp_path.replace(path)
+        lexical_log_path(path).unlink(missing_ok=True)
+        self._pending.clear()
+        self._log_bytes = self._log_rows = 0
+
+        size = path.stat().st_size
+        log.info(f"Saved lexical index ({len(self)} chunks, {len(self.terms)} terms, {size} bytes) to {path}")
+        return size
+
+    def flush(self, path: Path) -> bool:
+        """
+        Persist changes made since the index was loaded, saved or flushed.
+
+        Changes are appended to a log next to the .npz, so the cost grows
+        with the change rather than the index. Once the log would hold more
+        than COMPACT_RATIO of the index, the whole index is saved instead.
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            True if anything was written
+        """
+        if not self._pending:
+            return False
+        path = Path(path)
+        changed = sum(len(record["ids"]) for record in self._pending)
+        if not path.exists() or self._log_rows + changed > max(COMPACT_MIN_ROWS, COMPACT_RATIO * len(self)):
+            self.save(path)
+            return True
+
+        log_path = lexical_log_path(path)
+        with open(log_path, "r+b" if log_path.exists() else "wb") as f:
+            # Drop a torn last line, or a log left over from an older .npz
+            f.truncate(self._log_bytes)
+            f.seek(self._log_bytes)
+            if not self._log_bytes:
+                f.write(json.dumps({"generation": self.generation}).encode("utf-8") + b"\n")
+            for record in self._pending:
+                f.write(json.dumps(record).encode("utf-8") + b"\n")
+            self._log_bytes = f.tell()
+
+        self._log_rows += changed
+        self._pending.clear()
+        log.debug(f"Appended {changed} lexical index changes to {log_path}")
+        return True
+
+    def _replay(self, log_path: Path):
+        """Apply the changes flush() logged on top of the loaded .npz."""
+        try:
+            with open(log_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        records, offset = [], 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # torn write
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not offset and record.get("generation") != self.generation:
+                return  # log of an older .npz
+            if offset:
+                records.append(record)
+            offset += len(line)
+
+        for record in records:
+            if record["op"] == "add":
+                self.add(record["ids"], record["chunks"], record.get("counts"))
+            else:
+                self.remove(record["ids"])
+        self._pending.clear()
+        self._log_bytes = offset
+        self._log_rows = sum(len(record["ids"]) for record in records)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["LexicalIndex"]:
+        """
+        Load an index saved with save(), with changes logged by flush().
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            LexicalIndex, or None if the file is missing or unreadable
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        try:
+            with np.load(path) as data:
+                header = json.loads(data["header"].tobytes().decode("utf-8"))
+                terms_blob = data["terms"].tobytes().decode("utf-8")
+                meta = json.loads(zlib.decompress(data["meta"].tobytes()).decode("utf-8"))
+                indptr = data["indptr"]
+                post_docs = data["post_docs"]
+                post_tfs = data["post_tfs"]
+                doc_lengths = data["doc_lengths"]
+        except Exception as e:
+            log.error(f"Error loading lexical index from {path}: {e}")
+            return None
+
+        index = cls(k1=header["k1"], b=header["b"])
+        index.terms = terms_blob.split("\n") if terms_blob else []
+        index.term_ids = {term: i for i, term in enumerate(index.terms)}
+        index.doc_ids = header["doc_ids"]
+        index.doc_rows = {doc_id: row for row, doc_id in enumerate(index.doc_ids)}
+        index.doc_meta = meta
+        index.doc_lengths = doc_lengths
+        index.post_docs = post_docs
+        index.post_tfs = post_tfs
+        index.post_terms = np.repeat(
+            np.arange(len(index.terms), dtype=np.int32), np.diff(indptr)
+        )
+        index._csr = indptr
+        index.generation = header.get("generation", "")
+        index._replay(lexical_log_path(path))
+        index._purge()
+
+        log.debug(f"Loaded lexical index with {len(index)} chunks from {path}")
+        return index
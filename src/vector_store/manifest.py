@@ -0,0 +1,94 @@
+"""Per-document manifest of the vectors stored for each source."""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import List, Dict, Any
+
+from ..utils import settings
+
+
+# Chunk fields whose change means the stored vector or metadata is stale
+HASHED_FIELDS = ("text", "filename", "format", "start_token", "end_token", "start_char", "end_char")
+
+
+def default_manifest_path(index_name: str = None) -> Path:
+    """Where the manifest for a vector index is stored."""
+    return settings.processed_data_dir / f"{index_name or settings.index_name}.manifest.sqlite3"
+
+
+def chunk_hash(chunk: Dict[str, Any]) -> str:
+    """Content hash of a chunk's text and stored metadata."""
+    payload = json.dumps([chunk.get(field) for field in HASHED_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class DocumentManifest:
+    """
+    Chunk numbers and chunk hashes of every document in an index.
+
+    Endee cannot list the vectors of one document, so this records them at
+    upsert time. Rows live in SQLite keyed by (source, chunk number), so
+    reading, updating or deleting a document touches only that document's
+    rows. Changes are buffered in a transaction until save().
+    """
+
+    def __init__(self, path: Path):
+        """
+        Open (or create) a manifest.
+
+        Args:
+            path: SQLite database path
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Used by whichever thread runs the indexer, one at a time
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    source TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    PRIMARY KEY (source, chunk_id)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(DISTINCT source) FROM chunks").fetchone()[0]
+
+    def __contains__(self, source: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM chunks WHERE source = ? LIMIT 1", (source,)).fetchone() is not None
+
+    def get(self, source: str) -> Dict[str, str]:
+        """Chunk number (as a string) to chunk hash for a document (empty if unknown)."""
+        return dict(self._conn.execute("SELECT chunk_id, hash FROM chunks WHERE source = ?", (source,)))
+
+    def add(self, source: str, chunk_id: Any, digest: str):
+        """Record (or overwrite) one chunk of a document."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO chunks (source, chunk_id, hash) VALUES (?, ?, ?)",
+            (source, str(chunk_id), digest)
+        )
+
+    def discard(self, source: str, chunk_ids: List[Any] = None):
+        """Forget some chunks of a document, or the whole document."""
+        if chunk_ids is None:
+            self._conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            return
+        self._conn.executemany(
+            "DELETE FROM chunks WHERE source = ? AND chunk_id = ?",
+            [(source, str(chunk_id)) for chunk_id in chunk_ids]
+        )
+
+    def save(self):
+        """Commit the changes made since the last save."""
+        self._conn.commit()
+
+    def close(self):
+        """Commit and close the database."""
+        self._conn.commit()
+        self._conn.close()
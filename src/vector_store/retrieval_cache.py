@@ -0,0 +1,141 @@
+"""Bounded LRU cache for retrieval results."""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+
+from ..utils import settings, log
+from ..utils.metrics import metrics
+
+
+# Quantization step for query vectors: near-identical embeddings share a key
+QUANTIZATION_SCALE = 1000
+
+
+class RetrievalCache:
+    """
+    LRU cache of get_context results scoped to an index version.
+
+    Keys hash the quantized query vector together with every retrieval
+    parameter. When the index version changes (re-index or upsert), the
+    whole cache is dropped on the next access.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Initialize retrieval cache.
+
+        Args:
+            max_entries: Maximum number of cached result lists
+        """
+        self.max_entries = max_entries or settings.retrieval_cache_size
+        self._entries: "OrderedDict[str, Tuple[List[Dict[str, Any]], Dict[str, Any]]]" = OrderedDict()
+        self._index_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        self._hits = metrics.counter("retrieval_cache_hits_total", "Retrieval cache hits")
+        self._misses = metrics.counter("retrieval_cache_misses_total", "Retrieval cache misses")
+        self._evictions = metrics.counter("retrieval_cache_evictions_total", "Retrieval cache LRU evictions")
+        self._invalidations = metrics.counter(
+            "retrieval_cache_invalidations_total", "Retrieval cache drops after index changes"
+        )
+
+    @staticmethod
+    def make_key(query_vector: Sequence[float], **params) -> str:
+        """
+        Build a cache key from a query vector and retrieval parameters.
+
+        Args:
+            query_vector: Query embedding
+            **params: Retrieval parameters (top_k, filters, mode, ...)
+
+        Returns:
+            Hex digest key
+        """
+        quantized = np.round(
+            np.asarray(query_vector, dtype=np.float32) * QUANTIZATION_SCALE
+        ).astype(np.int32)
+        digest = hashlib.sha256(quantized.tobytes())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _check_version(self, index_version: str):
+        """Drop all entries if the index changed (caller holds the lock)."""
+        if index_version != self._index_version:
+            if self._entries:
+                log.info(f"Index version changed, dropping {len(self._entries)} cached retrievals")
+                self._invalidations.inc()
+            self._entries.clear()
+            self._index_version = index_version
+
+    def get(
+        self,
+        key: str,
+        index_version: str
+    ) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Look up cached results.
+
+        Args:
+            key: Key from make_key()
+            index_version: Current index version
+
+        Returns:
+            Copy of the cached (results, retrieval stats), or None on a miss
+        """
+        with self._lock:
+            self._check_version(index_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses.inc()
+                return None
+            self._entries.move_to_end(key)
+            self._hits.inc()
+        return copy.deepcopy(entry)
+
+    def put(
+        self,
+        key: str,
+        index_version: str,
+        results: List[Dict[str, Any]],
+        stats: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Store results.
+
+        Args:
+            key: Key from make_key()
+            index_version: Index version the results came from
+            results: Retrieval results
+            stats: Retrieval diagnostics produced with the results
+        """
+        with self._lock:
+            self._check_version(index_version)
+            self._entries[key] = copy.deepcopy((results, stats or {}))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions.inc()
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit-rate statistics (process-wide counters)."""
+        hits, misses = self._hits.value(), self._misses.value()
+        lookups = hits + misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": int(hits),
+            "misses": int(misses),
+            "evictions": int(self._evictions.value()),
+            "invalidations": int(self._invalidations.value()),
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
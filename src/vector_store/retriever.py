@@ -1,11 +1,38 @@
 """Vector retriever for querying Endee database."""
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import functools
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 from .endee_client import EndeeClient
+from .diversity import mmr_select, cap_per_document
+from .lexical import LexicalIndex, default_lexical_path, lexical_signature, reciprocal_rank_fusion
+from .retrieval_cache import RetrievalCache
+from .index_state import get_index_version, get_active_index
+from .indexer import FILTER_FIELDS
 from ..utils import settings, log
 
 
+# How a scoping filter was applied to a query
+FILTER_PUSHDOWN = "pushdown"
+FILTER_POST = "post_filter"
+
+# Over-fetch factor used when filters must be applied after the search
+POST_FILTER_FETCH_FACTOR = 4
+
+
+def top_similarity(results: List[Dict[str, Any]]) -> float:
+    """
+    Best vector similarity among results.
+    
+    Fused results are ordered by RRF score, and lexical-only hits carry a
+    similarity of 0.0, so the first result is not necessarily the best.
+    """
+    return max((r.get('similarity', 0) for r in results), default=0.0)
+
+
 class VectorRetriever:
     """Retrieve similar vectors from Endee database."""
     
@@ -18,20 +45,36 @@ class VectorRetriever:
         """
         self.client = client or EndeeClient()
         self.index_name = settings.index_name
+        self.active_name = self.index_name
         self.top_k = settings.top_k
         self.index = None
+        self._lexical = None
+        self._lexical_signature = None
+        self._lexical_lock = threading.Lock()
+        self.cache = RetrievalCache() if settings.retrieval_cache_size > 0 else None
         
-        # Get index reference
-        if self.client.index_exists(self.index_name):
-            self.index = self.client.get_index(self.index_name)
+        self.refresh()
+    
+    def refresh(self):
+        """Re-resolve the index handle, e.g. after the index was (re)created."""
+        self.active_name = get_active_index(self.index_name)
+        if self.client.index_exists(self.active_name):
+            self.index = self.client.get_index(self.active_name)
         else:
-            log.warning(f"Index '{self.index_name}' does not exist")
+            self.index = None
+            log.warning(f"Index '{self.active_name}' does not exist")
+    
+    def _sync(self):
+        """Follow the logical index to a new Endee index after a background rebuild."""
+        if get_active_index(self.index_name) != self.active_name:
+            self.refresh()
     
     def search(
         self,
         query_vector: List[float],
         top_k: int = None,
-        filters: Dict[str, Any] = None
+        filters: Dict[str, Any] = None,
+        include_vectors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search for similar vectors.
@@ -40,10 +83,12 @@ class VectorRetriever:
             query_vector: Query embedding
             top_k: Number of results to return
             filters: Optional filters
+            include_vectors: Whether to return stored vectors with results
             
         Returns:
             List of search results with metadata
         """
+        self._sync()
         if not self.index:
             log.error(f"Index '{self.index_name}' not available")
             return []
@@ -51,19 +96,7 @@ class VectorRetriever:
         top_k = top_k or self.top_k
         
         try:
-            # Query the index
-            if filters:
-                results = self.index.query(
-                    vector=query_vector,
-                    top_k=top_k,
-                    filter=filters
-                )
-            else:
-                results = self.index.query(
-                    vector=query_vector,
-                    top_k=top_k
-                )
-            
+            results = self._query(query_vector, top_k, filters, include_vectors)
             log.debug(f"Retrieved {len(results)} results")
             return results
             
@@ -71,11 +104,151 @@ class VectorRetriever:
             log.error(f"Error searching index: {e}")
             return []
     
+    def _query(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        endee_filter: List[Dict[str, Any]] = None,
+        include_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Run a raw Endee query, letting errors propagate."""
+        if endee_filter:
+            return self.index.query(
+                vector=query_vector,
+                top_k=top_k,
+                filter=endee_filter,
+                include_vectors=include_vectors
+            )
+        return self.index.query(
+            vector=query_vector,
+            top_k=top_k,
+            include_vectors=include_vectors
+        )
+    
+    @staticmethod
+    def _normalize_filters(
+        filters: Dict[str, Union[str, List[str]]] = None
+    ) -> Dict[str, List[str]]:
+        """Normalize filter values to non-empty lists of strings."""
+        normalized = {}
+        for field, value in (filters or {}).items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            values = [str(v) for v in values if v not in (None, "")]
+            if field == "format":
+                values = [v if v.startswith(".") else f".{v}" for v in values]
+            if values:
+                normalized[field] = values
+        return normalized
+    
+    def build_filter(
+        self,
+        filters: Dict[str, Union[str, List[str]]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]]]:
+        """
+        Split scoping filters into an Endee filter and post-search filters.
+        
+        Fields stored as Endee filter tags (see FILTER_FIELDS) are pushed
+        down into the query; any other field is matched against result
+        metadata after the search.
+        
+        Args:
+            filters: Mapping of field name to a value or list of values
+            
+        Returns:
+            Tuple of (Endee filter list, post-search filters)
+        """
+        endee_filter = []
+        post_filters = {}
+        
+        for field, values in self._normalize_filters(filters).items():
+            if field not in FILTER_FIELDS:
+                post_filters[field] = values
+            elif len(values) == 1:
+                endee_filter.append({field: {"$eq": values[0]}})
+            else:
+                endee_filter.append({field: {"$in": values}})
+        
+        return endee_filter, post_filters
+    
+    @staticmethod
+    def _matches(result: Dict[str, Any], post_filters: Dict[str, List[str]]) -> bool:
+        """Check a search result against post-search filters."""
+        tags = {**result.get('meta', {}), **(result.get('filter') or {})}
+        return all(
+            str(tags.get(field, "")) in values
+            for field, values in post_filters.items()
+        )
+    
+    def filtered_search(
+        self,
+        query_vector: List[float],
+        top_k: int = None,
+        filters: Dict[str, Union[str, List[str]]] = None,
+        include_vectors: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """
+        Search with scoping filters, pushing them down to Endee when possible.
+        
+        If the filtered query is rejected by the server, the search falls
+        back to an over-fetched unfiltered query and every filter is applied
+        to the results instead.
+        
+        Args:
+            query_vector: Query embedding
+            top_k: Number of results to return
+            filters: Mapping of field name to a value or list of values
+            include_vectors: Whether to return stored vectors with results
+            
+        Returns:
+            Tuple of (results, mapping of filter field to how it was applied)
+        """
+        self._sync()
+        if not self.index:
+            log.error(f"Index '{self.index_name}' not available")
+            return [], {}
+        
+        top_k = top_k or self.top_k
+        endee_filter, post_filters = self.build_filter(filters)
+        
+        status = {field: FILTER_PUSHDOWN for f in endee_filter for field in f}
+        status.update({field: FILTER_POST for field in post_filters})
+        
+        if endee_filter:
+            try:
+                fetch_k = top_k * POST_FILTER_FETCH_FACTOR if post_filters else top_k
+                results = self._query(query_vector, fetch_k, endee_filter, include_vectors)
+            except Exception as e:
+                log.warning(f"Filtered search failed ({e}), filtering after search")
+                post_filters = self._normalize_filters(filters)
+                status = {field: FILTER_POST for field in post_filters}
+                results = self.search(
+                    query_vector, top_k * POST_FILTER_FETCH_FACTOR,
+                    include_vectors=include_vectors
+                )
+        elif post_filters:
+            results = self.search(
+                query_vector, top_k * POST_FILTER_FETCH_FACTOR,
+                include_vectors=include_vectors
+            )
+        else:
+            results = self.search(query_vector, top_k, include_vectors=include_vectors)
+        
+        if post_filters:
+            results = [r for r in results if self._matches(r, post_filters)]
+        
+        log.debug(f"Filtered search returned {len(results)} results ({status})")
+        return results[:top_k], status
+    
     def get_context(
         self,
         query_vector: List[float],
         top_k: int = None,
-        min_similarity: float = 0.0
+        min_similarity: float = 0.0,
+        filters: Dict[str, Union[str, List[str]]] = None,
+        diversity: Optional[str] = None,
+        query_text: Optional[str] = None,
+        hybrid: Optional[bool] = None,
+        stats: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get context chunks for RAG.
@@ -84,11 +257,59 @@ class VectorRetriever:
             query_vector: Query embedding
             top_k: Number of chunks to retrieve
             min_similarity: Minimum similarity threshold
+            filters: Optional scoping filters, e.g. {"filename": "manual.pdf"}
+            diversity: Diversification mode ('none', 'mmr' or 'doc_cap');
+                defaults to settings.retrieval_diversity
+            query_text: Query text, required for hybrid lexical search
+            hybrid: Fuse BM25 lexical results with vector results;
+                defaults to settings.hybrid_search
+            stats: Optional dict populated with retrieval diagnostics
             
         Returns:
             List of context chunks with metadata
         """
-        results = self.search(query_vector, top_k)
+        top_k = top_k or self.top_k
+        diversity = diversity or settings.retrieval_diversity
+        diversify = diversity in ("mmr", "doc_cap")
+        hybrid = settings.hybrid_search if hybrid is None else hybrid
+        hybrid = hybrid and bool(query_text)
+        
+        # Over-fetch candidates (with vectors for MMR) when diversifying
+        fetch_k = max(top_k, settings.diversity_fetch_k) if diversify else top_k
+        if hybrid:
+            fetch_k = max(fetch_k, settings.hybrid_fetch_k)
+        include_vectors = diversity == "mmr"
+        
+        # Serve repeated queries from the retrieval cache until the index changes
+        cache_key = index_version = None
+        if self.cache is not None:
+            index_version = get_index_version(self.index_name)
+            cache_key = self.cache.make_key(
+                query_vector,
+                index=self.index_name,
+                top_k=top_k,
+                min_similarity=min_similarity,
+                filters=self._normalize_filters(filters),
+                diversity=diversity if diversify else "none",
+                hybrid_query=query_text if hybrid else None
+            )
+            cached = self.cache.get(cache_key, index_version)
+            if cached is not None:
+                results, cached_stats = cached
+                if stats is not None:
+                    stats.update(cached_stats)
+                    stats["cache"] = "hit"
+                log.info(f"Retrieved {len(results)} context chunks from retrieval cache")
+                return results
+        
+        retrieval_stats = {}
+        if filters:
+            results, filter_status = self.filtered_search(
+                query_vector, fetch_k, filters, include_vectors=include_vectors
+            )
+            retrieval_stats["filters"] = filter_status
+        else:
+            results = self.search(query_vector, fetch_k, include_vectors=include_vectors)
         
         # Filter by minimum similarity
         filtered_results = [
@@ -96,9 +317,232 @@ class VectorRetriever:
             if r.get('similarity', 0) >= min_similarity
         ]
         
+        if hybrid:
+            # The threshold applies to vector hits only: lexical-only hits
+            # have no similarity, but a vector hit below it stays dropped
+            # even when BM25 also returns it
+            below = {r['id'] for r in results} - {r['id'] for r in filtered_results}
+            filtered_results = [
+                r for r in self.fuse_lexical(query_text, filtered_results, fetch_k, filters, retrieval_stats)
+                if r['id'] not in below
+            ]
+        
+        if diversify:
+            filtered_results = self.diversify(
+                query_vector, filtered_results, top_k, diversity, retrieval_stats
+            )
+        else:
+            filtered_results = filtered_results[:top_k]
+        
+        for result in filtered_results:
+            result.pop('vector', None)
+        
+        # Empty results may come from a failed search, so they are not cached
+        if cache_key and filtered_results:
+            self.cache.put(cache_key, index_version, filtered_results, retrieval_stats)
+        
+        if stats is not None:
+            stats.update(retrieval_stats)
+            if cache_key:
+                stats["cache"] = "miss"
+        
         log.info(f"Retrieved {len(filtered_results)} context chunks (min_sim={min_similarity})")
         return filtered_results
     
+    async def aget_context(self, query_vector: List[float], **kwargs) -> List[Dict[str, Any]]:
+        """
+        Get context chunks without blocking the event loop.
+        
+        The Endee SDK is synchronous, so the query runs in the loop's
+        default executor. Takes the same keyword arguments as get_context.
+        
+        Args:
+            query_vector: Query embedding
+            **kwargs: Arguments for get_context
+            
+        Returns:
+            List of context chunks with metadata
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.get_context, query_vector, **kwargs)
+        )
+    
+    def get_lexical_index(self) -> Optional[LexicalIndex]:
+        """Load the on-disk lexical index, reloading it after it changes."""
+        path = default_lexical_path(self.active_name)
+        with self._lexical_lock:
+            signature = lexical_signature(path)
+            if signature is None:
+                self._lexical = self._lexical_signature = None
+                return None
+            
+            if signature != self._lexical_signature:
+                self._lexical = LexicalIndex.load(path)
+                self._lexical_signature = signature
+            return self._lexical
+    
+    def lexical_search(
+        self,
+        query_text: str,
+        top_k: int = None,
+        filters: Dict[str, Union[str, List[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the BM25 lexical index.
+        
+        Args:
+            query_text: Query text
+            top_k: Number of results to return
+            filters: Optional scoping filters
+            
+        Returns:
+            List of results with 'bm25_score'
+        """
+        lexical = self.get_lexical_index()
+        if lexical is None:
+            log.warning(f"No lexical index for '{self.index_name}', skipping BM25 search")
+            return []
+        
+        top_k = top_k or self.top_k
+        normalized = self._normalize_filters(filters)
+        fetch_k = top_k * POST_FILTER_FETCH_FACTOR if normalized else top_k
+        
+        results = lexical.search(query_text, fetch_k)
+        if normalized:
+            results = [r for r in results if self._matches(r, normalized)]
+        
+        return results[:top_k]
+    
+    def fuse_lexical(
+        self,
+        query_text: str,
+        vector_results: List[Dict[str, Any]],
+        top_k: int,
+        filters: Dict[str, Union[str, List[str]]] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse vector results with BM25 results by reciprocal rank fusion.
+        
+        Lexical-only hits have no vector similarity and get 0.0; use
+        top_similarity() rather than the first result for the best score.
+        
+        Args:
+            query_text: Query text
+            vector_results: Vector search results, best first
+            top_k: Number of lexical results to fuse
+            filters: Optional scoping filters
+            stats: Optional dict populated with retrieval diagnostics
+            
+        Returns:
+            Fused results ordered by RRF score
+        """
+        start = time.perf_counter()
+        lexical_results = self.lexical_search(query_text, top_k, filters)
+        lexical_ms = (time.perf_counter() - start) * 1000
+        
+        fused = reciprocal_rank_fusion([vector_results, lexical_results], k=settings.rrf_k)
+        for result in fused:
+            result.setdefault('similarity', 0.0)
+        
+        if stats is not None:
+            vector_ids = {r['id'] for r in vector_results}
+            stats["hybrid"] = {
+                "lexical_hits": len(lexical_results),
+                "lexical_only": sum(1 for r in lexical_results if r['id'] not in vector_ids),
+                "lexical_ms": round(lexical_ms, 3)
+            }
+        
+        return fused
+    
+    def diversify(
+        self,
+        query_vector: List[float],
+        candidates: List[Dict[str, Any]],
+        top_k: int,
+        mode: str = "mmr",
+        stats: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Reduce over-fetched candidates to a diverse top-k.
+        
+        MMR needs every candidate's vector; those missing one (lexical-only
+        hits of a hybrid search) are fetched from the index. If that fails,
+        the per-document cap is used instead and stats report the fallback.
+        
+        Args:
+            query_vector: Query embedding
+            candidates: Candidates ordered by similarity
+            top_k: Number of results to keep
+            mode: 'mmr' or 'doc_cap'
+            stats: Optional dict populated with retrieval diagnostics
+            
+        Returns:
+            Diversified results without vector payloads
+        """
+        start = time.perf_counter()
+        
+        fetched, fallback = 0, None
+        if mode == "mmr" and candidates:
+            fetched = self.fetch_vectors(candidates)
+        vectors = [r.get('vector') for r in candidates]
+        if mode == "mmr" and candidates and all(len(v or []) for v in vectors):
+            selected = mmr_select(query_vector, vectors, top_k, settings.mmr_lambda)
+        else:
+            if mode == "mmr" and candidates:
+                log.warning("Candidate vectors unavailable, falling back to per-document cap")
+                mode, fallback = "doc_cap", "missing_vectors"
+            sources = [r.get('meta', {}).get('source', '') for r in candidates]
+            selected = cap_per_document(sources, top_k, settings.max_chunks_per_doc)
+        
+        results = []
+        for i in selected:
+            result = dict(candidates[i])
+            result.pop('vector', None)
+            results.append(result)
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log.debug(f"Diversified {len(candidates)} candidates to {len(results)} ({mode}, {elapsed_ms:.2f} ms)")
+        
+        if stats is not None:
+            stats["diversity"] = {
+                "mode": mode,
+                "candidates": len(candidates),
+                "selected": len(results),
+                "fetched_vectors": fetched,
+                "ms": round(elapsed_ms, 3)
+            }
+            if fallback:
+                stats["diversity"]["fallback"] = fallback
+        
+        return results
+    
+    def fetch_vectors(self, results: List[Dict[str, Any]]) -> int:
+        """
+        Attach stored vectors to results that lack them.
+        
+        Lexical-only hits come from the BM25 index without vectors; each is
+        fetched from Endee by id. Stops at the first failure.
+        
+        Args:
+            results: Search results, updated in place
+            
+        Returns:
+            Number of vectors fetched
+        """
+        fetched = 0
+        for result in results:
+            if len(result.get('vector') or []):
+                continue
+            try:
+                result['vector'] = self.index.get_vector(result['id'])['vector']
+            except Exception as e:
+                log.warning(f"Could not fetch vector '{result['id']}': {e}")
+                break
+            fetched += 1
+        return fetched
+    
     def format_context(self, results: List[Dict[str, Any]]) -> str:
         """
         Format search results into context string for LLM.